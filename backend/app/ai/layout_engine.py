@@ -1,26 +1,82 @@
+import asyncio
 from app.models.creative import Creative, TextLayer, Asset
-from typing import List
+from app.ai.layout_solver import DEFAULT_TIME_BUDGET, Layout, LayoutElement, LayoutSolver
+from app.services.resize_engine import format_size
+from typing import List, Optional, Tuple
+
+# Default copy for generated layouts: role -> (text, font size, colour)
+DEFAULT_TEXT = {
+    "headline": ("Headline Goes Here", 48, "#000000"),
+    "cta": ("Shop Now", 24, "#FFFFFF"),
+}
+
+# Share of the canvas' shorter side (width, height) an asset takes when it has no size metadata
+ASSET_SIZE = {"packshot": (0.45, 0.45), "logo": (0.15, 0.08), "value_tile": (0.22, 0.22), "cta": (0.25, 0.08)}
+
+def estimate_text_box(text: str, font_size: int, max_width: float) -> Tuple[float, float]:
+    # ~0.55em average glyph width, wrapped to max_width, Fabric's 1.16 line height
+    line_width = len(text) * font_size * 0.55
+    lines = max(1, -(-line_width // max_width))
+    return min(line_width, max_width), lines * font_size * 1.16
 
 class LayoutEngine:
-    async def generate_layout(self, assets: List[Asset], format: str) -> Creative:
-        # Mock LLM response for layout generation
-        # In production, this would call Gemini/GPT-4
-        
-        return Creative(
-            id="generated_layout_1",
-            name="AI Generated Layout",
-            format=format,
-            assets=assets,
-            text_layers=[
-                TextLayer(
-                    id="t1", text="Headline Goes Here", role="headline",
-                    font_family="Inter", font_size=48, color="#000000",
-                    x=100, y=100, width=800, height=60, z_index=10
-                ),
-                TextLayer(
-                    id="t2", text="Shop Now", role="cta",
-                    font_family="Inter", font_size=24, color="#FFFFFF",
-                    x=100, y=800, width=200, height=50, z_index=10
-                )
+    async def generate_layout(self, assets: List[Asset], format: str, time_budget: float = DEFAULT_TIME_BUDGET) -> Creative:
+        creative, _ = (await self.suggest_layouts(assets, format, k=1, time_budget=time_budget))[0]
+        return creative
+
+    async def suggest_layouts(self, assets: List[Asset], format: str, k: int = 3,
+                              roles: Optional[List[str]] = None, time_budget: float = DEFAULT_TIME_BUDGET) -> List[Tuple[Creative, Layout]]:
+        """
+        Top-k (creative, solver layout) pairs for the assets plus the given text roles.
+        Asset placements are recorded in each asset's metadata (x, y, width, height).
+        """
+        width, height = format_size(format)
+        elements = self.elements(assets, roles or list(DEFAULT_TEXT), width, height)
+        # The search is CPU-bound NumPy work; keep it off the event loop
+        layouts, _ = await asyncio.to_thread(LayoutSolver(width, height).solve, elements, k, time_budget)
+
+        creatives = []
+        for rank, layout in enumerate(layouts, start=1):
+            text_layers = []
+            for role in roles or list(DEFAULT_TEXT):
+                text, font_size, color = DEFAULT_TEXT.get(role, (role.title(), 24, "#000000"))
+                x, y, w, h = layout.placements[f"text_{role}"]
+                text_layers.append(TextLayer(
+                    id=f"t{len(text_layers) + 1}", text=text, role=role,
+                    font_family="Inter", font_size=font_size, color=color,
+                    x=x, y=y, width=w, height=h, z_index=10
+                ))
+            placed_assets = [
+                asset.model_copy(update={"metadata": {**asset.metadata, **dict(zip(("x", "y", "width", "height"), layout.placements[asset.id]))}})
+                if asset.id in layout.placements else asset
+                for asset in assets
             ]
-        )
+            creatives.append((Creative(
+                id=f"generated_layout_{rank}",
+                name="AI Generated Layout",
+                format=format,
+                assets=placed_assets,
+                text_layers=text_layers
+            ), layout))
+        return creatives
+
+    def elements(self, assets: List[Asset], roles: List[str], width: int, height: int) -> List[LayoutElement]:
+        elements = []
+        for asset in assets:
+            role = asset.role.value
+            if role == "background" or asset.type.value != "image":
+                continue  # backgrounds fill the canvas; nothing to place
+            fw, fh = ASSET_SIZE.get(role, (0.3, 0.3))
+            side = min(width, height)
+            w = float(asset.metadata.get("width") or side * fw)
+            h = float(asset.metadata.get("height") or side * fh)
+            # Fit oversized assets into the canvas, keeping their aspect ratio
+            fit = min(1.0, width * 0.9 / w, height * 0.9 / h)
+            elements.append(LayoutElement(asset.id, role, w * fit, h * fit))
+        for role in roles:
+            text, font_size, _ = DEFAULT_TEXT.get(role, (role.title(), 24, "#000000"))
+            w, h = estimate_text_box(text, font_size, width * 0.8)
+            if role == "cta":
+                w, h = w + 48, h + 24  # button padding
+            elements.append(LayoutElement(f"text_{role}", role, w, h))
+        return elements
@@ -0,0 +1,201 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.geometry import safe_band
+
+MARGIN_RATIO = 0.05  # of the shorter canvas side
+GRID_STEPS = 16      # candidate positions per axis
+BATCH_SIZE = 2048
+DEFAULT_TIME_BUDGET = 0.25  # seconds
+
+# Roles in the order they should be read (top-to-bottom, then left-to-right)
+READING_ORDER = ["logo", "headline", "subhead", "packshot", "value_tile", "cta", "tag"]
+
+# Element scales the solver may choose from, by role
+SCALE_OPTIONS = {"packshot": (1.0, 0.85, 0.7), "logo": (1.0, 0.8), "value_tile": (1.0, 0.85)}
+
+WEIGHTS = {
+    "overlap": 4.0,
+    "safe_zone": 3.0,
+    "margin": 2.0,
+    "balance": 1.0,
+    "reading_order": 2.0,
+    "size": -0.5,  # reward for larger packshots
+}
+
+@dataclass
+class LayoutElement:
+    id: str
+    role: str
+    width: float
+    height: float
+
+@dataclass
+class Layout:
+    score: float
+    placements: Dict[str, Tuple[float, float, float, float]]  # id -> (x, y, width, height)
+    breakdown: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            "score": round(self.score, 4),
+            "placements": {k: {"x": x, "y": y, "width": w, "height": h} for k, (x, y, w, h) in self.placements.items()},
+            "breakdown": {k: round(v, 4) for k, v in self.breakdown.items()},
+        }
+
+class LayoutSolver:
+    """
+    Searches placements for a set of elements on one canvas.
+
+    Every element gets a table of candidate boxes (scale x grid position), so a batch of
+    layouts is just a (batch, elements) index array. Whole batches are scored at once for
+    overlap, safe-zone intrusion, margin violations, visual balance and reading order;
+    the first batch is random and later ones mix fresh samples with mutations of the
+    current best layouts, until the time budget runs out.
+    """
+
+    def __init__(self, width: int, height: int, safe_zone: Optional[Tuple[int, int]] = None,
+                 grid_steps: int = GRID_STEPS, weights: Optional[Dict[str, float]] = None):
+        self.width = width
+        self.height = height
+        self.safe_zone = safe_zone if safe_zone is not None else safe_band(width, height)
+        self.grid_steps = grid_steps
+        self.weights = {**WEIGHTS, **(weights or {})}
+        self.margin = min(width, height) * MARGIN_RATIO
+
+    # --- Candidates ---
+
+    def candidates(self, elements: Sequence[LayoutElement]) -> np.ndarray:
+        """
+        (elements, candidates, 4) array of x0, y0, x1, y1 boxes. Elements with fewer scale
+        options repeat their last candidate to pad the table.
+        """
+        tables = []
+        steps = np.linspace(0.0, 1.0, self.grid_steps)
+        for element in elements:
+            boxes = []
+            for scale in SCALE_OPTIONS.get(element.role, (1.0,)):
+                w = min(element.width * scale, self.width)
+                h = min(element.height * scale, self.height)
+                xs = steps * (self.width - w)
+                ys = steps * (self.height - h)
+                gx, gy = np.meshgrid(xs, ys, indexing="ij")
+                boxes.append(np.stack([gx.ravel(), gy.ravel(), gx.ravel() + w, gy.ravel() + h], axis=1))
+            tables.append(np.concatenate(boxes))
+        longest = max(len(t) for t in tables)
+        return np.stack([np.concatenate([t, np.repeat(t[-1:], longest - len(t), axis=0)]) for t in tables])
+
+    # --- Scoring ---
+
+    def score(self, boxes: np.ndarray, roles: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Penalty terms for a (batch, elements, 4) array of boxes; each term has shape (batch,).
+        """
+        x0, y0, x1, y1 = boxes[..., 0], boxes[..., 1], boxes[..., 2], boxes[..., 3]
+        area = (x1 - x0) * (y1 - y0)
+        canvas_area = float(self.width * self.height)
+
+        # Pairwise intersection, normalised by the smaller box so a fully covered element counts as 1
+        ix = np.clip(np.minimum(x1[:, :, None], x1[:, None, :]) - np.maximum(x0[:, :, None], x0[:, None, :]), 0, None)
+        iy = np.clip(np.minimum(y1[:, :, None], y1[:, None, :]) - np.maximum(y0[:, :, None], y0[:, None, :]), 0, None)
+        smaller = np.minimum(area[:, :, None], area[:, None, :])
+        pair = ix * iy / np.maximum(smaller, 1.0)
+        overlap = np.triu(pair, k=1).sum(axis=(1, 2))
+
+        # Intrusion into the top/bottom safe zones, as a fraction of each element's area
+        top, bottom = self.safe_zone
+        width = x1 - x0
+        intrusion = np.clip(top - y0, 0, None).clip(max=y1 - y0) + np.clip(y1 - (self.height - bottom), 0, None).clip(max=y1 - y0)
+        safe_zone = (intrusion * width / np.maximum(area, 1.0)).sum(axis=1) if top or bottom else np.zeros(len(boxes))
+
+        # Distance outside the margin box, relative to the margin itself
+        m = self.margin
+        outside = (np.clip(m - x0, 0, None) + np.clip(x1 - (self.width - m), 0, None)
+                   + np.clip(m - y0, 0, None) + np.clip(y1 - (self.height - m), 0, None))
+        margin = (outside / m).sum(axis=1)
+
+        # Area-weighted centroid distance from the canvas centre (0 = balanced, ~1 = in a corner)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        total = np.maximum(area.sum(axis=1), 1.0)
+        gx = (area * cx).sum(axis=1) / total - self.width / 2
+        gy = (area * cy).sum(axis=1) / total - self.height / 2
+        balance = np.hypot(gx / self.width, gy / self.height) * 2
+
+        # Consecutive roles in READING_ORDER should read top-to-bottom
+        reading_order = np.zeros(len(boxes))
+        ranked = sorted((READING_ORDER.index(r), i) for i, r in enumerate(roles) if r in READING_ORDER)
+        for (_, a), (_, b) in zip(ranked, ranked[1:]):
+            reading_order += np.clip(y0[:, a] - y0[:, b], 0, None) / self.height
+
+        packshots = np.array([r == "packshot" for r in roles])
+        size = area[:, packshots].sum(axis=1) / canvas_area if packshots.any() else np.zeros(len(boxes))
+
+        return {
+            "overlap": overlap, "safe_zone": safe_zone, "margin": margin,
+            "balance": balance, "reading_order": reading_order, "size": size,
+        }
+
+    def total(self, terms: Dict[str, np.ndarray]) -> np.ndarray:
+        return sum(self.weights[name] * values for name, values in terms.items())
+
+    # --- Search ---
+
+    def solve(self, elements: Sequence[LayoutElement], k: int = 3, time_budget: float = DEFAULT_TIME_BUDGET,
+              batch_size: int = BATCH_SIZE, seed: int = 0, max_batches: Optional[int] = None) -> Tuple[List[Layout], int]:
+        """
+        Top-k layouts (lowest cost first) and the number of layouts scored.
+        """
+        if not elements:
+            return [], 0
+        rng = np.random.default_rng(seed)
+        table = self.candidates(elements)
+        n_elements, n_candidates = table.shape[:2]
+        roles = [e.role for e in elements]
+        rows = np.arange(n_elements)
+
+        best_idx = np.zeros((0, n_elements), dtype=np.int64)
+        best_cost = np.zeros(0)
+        scored = 0
+        batches = 0
+        deadline = time.perf_counter() + time_budget
+
+        while True:
+            idx = rng.integers(0, n_candidates, size=(batch_size, n_elements))
+            if len(best_idx):
+                # Half the batch: copies of the elites with one element moved
+                half = batch_size // 2
+                parents = best_idx[rng.integers(0, len(best_idx), size=half)]
+                which = rng.integers(0, n_elements, size=half)
+                parents[np.arange(half), which] = rng.integers(0, n_candidates, size=half)
+                idx[:half] = parents
+
+            cost = self.total(self.score(table[rows, idx], roles))
+            scored += batch_size
+            batches += 1
+
+            # Keep the best distinct layouts seen so far
+            pool_idx = np.concatenate([best_idx, idx])
+            pool_cost = np.concatenate([best_cost, cost])
+            pool_idx, unique = np.unique(pool_idx, axis=0, return_index=True)
+            pool_cost = pool_cost[unique]
+            keep = np.argsort(pool_cost)[:max(k, 32)]
+            best_idx, best_cost = pool_idx[keep], pool_cost[keep]
+
+            if time.perf_counter() >= deadline or (max_batches is not None and batches >= max_batches):
+                break
+
+        top = best_idx[:k]
+        terms = self.score(table[rows, top], roles)
+        layouts = []
+        for i, choice in enumerate(top):
+            boxes = table[rows, choice]
+            placements = {
+                e.id: (float(b[0]), float(b[1]), float(b[2] - b[0]), float(b[3] - b[1]))
+                for e, b in zip(elements, boxes)
+            }
+            breakdown = {name: float(values[i]) for name, values in terms.items()}
+            layouts.append(Layout(float(best_cost[i]), placements, breakdown))
+        return layouts, scored
@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import os
+import re
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from app.services.asset_store import SIMILAR_DISTANCE, asset_store
+from app.services.derivatives import FORMATS, derivative_service, parse_derivative_params
+from app.services.image_hash import hash_file
+from app.utils.cache import LRUCache
+from app.utils.static_files import IMMUTABLE_CACHE_CONTROL
+
+router = APIRouter()
+
+# Hashes of legacy static files, which have no index record; keyed like derivatives (name, mtime, size)
+_static_hashes = LRUCache(maxsize=1024)
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+STATIC_NAME_RE = re.compile(r"^[\w.-]+\.(png|jpe?g|webp)$", re.IGNORECASE)
+
+def _resolve_source(asset_id: str):
+    """
+    Returns (cache key, path) for a content-addressed asset or a top-level static image.
+    """
+    if DIGEST_RE.match(asset_id):
+        record = asset_store.get(asset_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        return record.digest, asset_store.path_for(record)
+
+    # Legacy files such as ai_gen_<uuid>.png written straight into static/
+    if STATIC_NAME_RE.match(asset_id):
+        path = os.path.join("static", asset_id)
+        if os.path.isfile(path):
+            st = os.stat(path)
+            key = hashlib.sha256(f"{asset_id}:{st.st_mtime_ns}:{st.st_size}".encode()).hexdigest()
+            return key, path
+    raise HTTPException(status_code=404, detail="Asset not found")
+
+class _DerivativeResponse(FileResponse):
+    # The cached file stays pinned until it has been sent, or the client has gone away
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            derivative_service.release(self.path)
+
+@router.get("/{asset_id}")
+async def get_asset(asset_id: str, w: int = 0, h: int = 0, fmt: str = "webp", q: int = 80):
+    """
+    Serve a resized/transcoded derivative of an asset, e.g. /api/assets/<id>?w=256&h=256&fmt=webp&q=75.
+    """
+    try:
+        w, h, fmt, q = parse_derivative_params(w, h, fmt, q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    source_key, source_path = _resolve_source(asset_id)
+    try:
+        path = await derivative_service.get(source_key, source_path, w, h, fmt, q)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Could not render derivative: {e}")
+
+    return _DerivativeResponse(
+        path,
+        media_type=FORMATS[fmt][1],
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{os.path.basename(path)}"'},
+    )
+
+@router.get("/{asset_id}/similar")
+async def similar_assets(asset_id: str, distance: int = Query(SIMILAR_DISTANCE, ge=0, le=32),
+                         limit: int = Query(20, ge=1, le=200)):
+    """
+    Stored images that look like this one, nearest first, by pHash Hamming distance.
+    Works for legacy ai_gen_*.png files too; they're hashed on first request.
+    """
+    source_key, source_path = _resolve_source(asset_id)
+    record = asset_store.get(source_key)
+    phash = record.phash if record is not None else None
+    if phash is None:
+        hashes = _static_hashes.get(source_key)
+        if hashes is None:
+            hashes = await asyncio.to_thread(hash_file, source_path)
+            if hashes is None:
+                raise HTTPException(status_code=422, detail="Asset is not a readable image")
+            _static_hashes.put(source_key, hashes)
+        phash = hashes[0]
+    matches = await asyncio.to_thread(asset_store.similar, phash, distance, limit, source_key)
+    return {"id": asset_id, "phash": phash,
+            "items": [{**r.to_dict(), "distance": d} for r, d in matches]}
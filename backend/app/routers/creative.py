@@ -1,9 +1,25 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Body
+from fastapi import APIRouter, HTTPException, Form, Body, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from app.models.creative import Creative, ComplianceReport, CreativeFormat
+from app.models.creative import Asset, Creative, ComplianceReport, CreativeFormat
+from app.ai.layout_engine import LayoutEngine
 from app.services.validation_service import validation_service
-from app.services.image_processing import generate_background as generate_bg_service
-from typing import Dict, Any
+from app.services.canvas import ParsedCanvas, loads as load_json, parse_canvas
+from app.services.batch_validation import batch_validator
+from app.services.asset_store import asset_store
+from app.services.creative_store import VersionConflictError, creative_store
+from app.utils.json_patch import JsonPatchError, apply_patch
+from app.utils.metrics import timed
+from app.services.background_removal import background_remover, QueueFullError
+from app.utils.file_handler import read_image_source
+from app.services.uploads import UploadRejected, UploadResult, upload_pipeline
+from app.services.rule_packs import RulePackError, rule_pack_registry
+from app.services.validation_session import validation_sessions
+from app.services.generation import DEFAULT_SIZE, GenerationRequest, generation_service
+from app.services.export import MAX_EXPORT_BYTES, export_service
+from app.services.bulk_resize import DEFAULT_FORMATS, bulk_resizer
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import json
 import os
 import uuid
@@ -15,85 +31,453 @@ router = APIRouter()
 class ValidationRequest(BaseModel):
     creative: Dict[str, Any]
     brandKit: Dict[str, Any] = None
+    rulePack: Optional[str] = None
 
-@router.post("/validate")
-async def validate_creative(request: ValidationRequest):
+def _check_rule_pack(rule_pack: Optional[str]):
+    try:
+        rule_pack_registry.get(rule_pack)
+    except RulePackError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _parse_validation_request(body: bytes) -> Tuple[ParsedCanvas, Optional[Dict[str, Any]], Optional[str]]:
+    # Decoded once (orjson when installed) and parsed straight into a ParsedCanvas, skipping
+    # Pydantic's walk over the whole canvas; the shape checks are the ones ValidationRequest makes
+    try:
+        payload = load_json(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(payload, dict) or not isinstance(payload.get("creative"), dict):
+        raise HTTPException(status_code=422, detail="Body must be {\"creative\": {...}, \"brandKit\": {...}, \"rulePack\": \"...\"}")
+    brand_kit, rule_pack = payload.get("brandKit"), payload.get("rulePack")
+    if brand_kit is not None and not isinstance(brand_kit, dict):
+        raise HTTPException(status_code=422, detail="brandKit must be an object")
+    if rule_pack is not None and not isinstance(rule_pack, str):
+        raise HTTPException(status_code=422, detail="rulePack must be a string")
+    return parse_canvas(payload["creative"]), brand_kit, rule_pack
+
+@router.post("/validate", openapi_extra={"requestBody": {
+    "required": True, "content": {"application/json": {"schema": ValidationRequest.model_json_schema()}},
+}})
+async def validate_creative(request: Request):
+    """
+    Validate a creative against guidelines using the ValidationService: brand usage,
+    geometry, contrast and the rule pack's copy, tag and alcohol rules.
+    `rulePack` selects the retailer rule pack (default: DEFAULT_RULE_PACK).
+    """
+    canvas, brand_kit, rule_pack = _parse_validation_request(await request.body())
+    _check_rule_pack(rule_pack)
+    return validation_service.validate_creative(canvas, brand_kit, rule_pack=rule_pack)
+
+class ValidationSessionRequest(BaseModel):
+    creative: Optional[Dict[str, Any]] = None
+    patch: Optional[List[Dict[str, Any]]] = None  # RFC 6902, against the session's last canvas
+    baseRevision: Optional[int] = None
+    brandKit: Dict[str, Any] = None
+    rulePack: Optional[str] = None
+
+def _run_session(session, request: ValidationSessionRequest) -> Dict[str, Any]:
+    with session.lock:
+        if request.patch is not None:
+            if session.canvas is None:
+                raise HTTPException(status_code=409, detail={"message": "Session has no canvas yet", "revision": 0})
+            if request.baseRevision is not None and request.baseRevision != session.revision:
+                raise HTTPException(status_code=409, detail={"message": "Stale base revision",
+                                                             "revision": session.revision})
+            try:
+                with timed("patch"):
+                    canvas = apply_patch(session.canvas, request.patch)
+            except JsonPatchError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+        elif request.creative is not None:
+            canvas = request.creative
+        else:
+            raise HTTPException(status_code=400, detail="Send either creative or patch")
+
+        prepared_kit = validation_service.prepare_brand_kit(request.brandKit) if request.brandKit else None
+        report, stats = session.validate(canvas, rule_pack_registry.get(request.rulePack), prepared_kit)
+        return {**report, "session": {"id": session.id, "revision": session.revision, **stats}}
+
+@router.post("/validate/session")
+async def start_validation_session(request: ValidationSessionRequest):
+    """
+    Validate a creative and keep a session for live revalidation: later calls to
+    /validate/session/{id} only re-check objects that changed since the last call.
+    """
+    _check_rule_pack(request.rulePack)
+    session = validation_sessions.create()
+    return await asyncio.to_thread(_run_session, session, request)
+
+@router.post("/validate/session/{session_id}")
+async def update_validation_session(session_id: str, request: ValidationSessionRequest):
+    """
+    Revalidate with the full canvas (`creative`) or a JSON Patch against the last one.
+    """
+    session = validation_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Validation session not found")
+    _check_rule_pack(request.rulePack)
+    return await asyncio.to_thread(_run_session, session, request)
+
+@router.delete("/validate/session/{session_id}")
+async def end_validation_session(session_id: str):
+    if not validation_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Validation session not found")
+    return {"deleted": session_id}
+
+@router.get("/rule-packs")
+async def list_rule_packs():
+    """
+    Rule packs available for validation, with their current versions.
+    """
+    return {"items": await asyncio.to_thread(rule_pack_registry.available)}
+
+class BatchValidationRequest(BaseModel):
+    creatives: List[Dict[str, Any]]
+    brandKit: Dict[str, Any] = None
+    rulePack: Optional[str] = None
+
+def _parse_ndjson_batch(body: bytes) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]:
+    # One creative per line; an optional first line of {"brandKit": {...}, "rulePack": "..."} applies to all of them
+    creatives = []
+    brand_kit = None
+    rule_pack = None
+    for line_no, line in enumerate(body.splitlines()):
+        if not line.strip():
+            continue
+        try:
+            item = load_json(line)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_no + 1}")
+        if not creatives and brand_kit is None and rule_pack is None and isinstance(item, dict) \
+                and item and set(item) <= {"brandKit", "rulePack"}:
+            brand_kit = item.get("brandKit")
+            rule_pack = item.get("rulePack")
+            if rule_pack is not None and not isinstance(rule_pack, str):
+                raise HTTPException(status_code=422, detail=f"rulePack on line {line_no + 1} must be a string")
+        elif not isinstance(item, dict):
+            raise HTTPException(status_code=422, detail=f"Line {line_no + 1} is not a creative object")
+        else:
+            creatives.append(item)
+    if brand_kit is not None and not isinstance(brand_kit, dict):
+        raise HTTPException(status_code=422, detail="brandKit must be an object")
+    return creatives, brand_kit, rule_pack
+
+@router.post("/validate/batch")
+async def validate_creatives_batch(request: Request, order: str = "input"):
+    """
+    Validate many creatives against one brand kit. Accepts a JSON body
+    ({"creatives": [...], "brandKit": {...}}) or NDJSON, and streams one NDJSON
+    result line per creative, in input order or as each one finishes (order=completed).
+    A creative that can't be validated gets an {"index": i, "error": "..."} line instead.
+    """
+    if order not in ("input", "completed"):
+        raise HTTPException(status_code=400, detail="order must be 'input' or 'completed'")
+
+    body = await request.body()
+    if "ndjson" in request.headers.get("content-type", ""):
+        creatives, brand_kit, rule_pack = _parse_ndjson_batch(body)
+    else:
+        try:
+            batch = BatchValidationRequest.model_validate_json(body)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        creatives, brand_kit, rule_pack = batch.creatives, batch.brandKit, batch.rulePack
+    _check_rule_pack(rule_pack)
+
+    async def results():
+        async for index, report, error in batch_validator.validate_stream(
+                creatives, brand_kit, ordered=order == "input", rule_pack=rule_pack):
+            line = {"index": index, "result": report} if error is None else {"index": index, "error": error}
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# --- Export ---
+
+class ExportRequest(BaseModel):
+    creative: Dict[str, Any]
+    format: str = "jpeg"
+    maxBytes: int = MAX_EXPORT_BYTES
+    multiplier: float = 1.0
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+@router.post("/export")
+async def export_creative(request: ExportRequest):
+    """
+    Render the creative server-side and return the highest-quality file under maxBytes.
+    Encoding details are reported in X-Export-* headers.
+    """
+    if request.maxBytes <= 0 or not 0 < request.multiplier <= 4:
+        raise HTTPException(status_code=400, detail="maxBytes must be positive and multiplier in (0, 4]")
+    try:
+        result = await asyncio.to_thread(
+            export_service.export, request.creative, request.format, request.maxBytes,
+            request.multiplier, request.width, request.height,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="creative{result.extension}"',
+        "X-Export-Attempts": str(result.attempts),
+        "X-Export-Quality": str(result.quality or ""),
+        "X-Export-Subsampling": result.subsampling_label or "",
+        "X-Export-Scale": f"{result.scale:.3f}",
+        "X-Export-Size": f"{result.width}x{result.height}",
+    }
+    return Response(content=result.data, media_type=result.mime, headers=headers)
+
+class BulkResizeRequest(BaseModel):
+    creatives: List[Dict[str, Any]]
+    formats: List[str] = DEFAULT_FORMATS
+    format: str = "png"
+    quality: int = 90
+    maxBytes: Optional[int] = None
+
+@router.post("/resize/batch")
+async def resize_batch(request: BulkResizeRequest, output: str = "zip"):
+    """
+    Render every creative in every format ("1080x1080", "1200x628", or any custom WIDTHxHEIGHT).
+    Returns a zip, or with ?output=multipart a multipart/mixed stream with one part per file as it finishes.
+    A file that can't be fitted into maxBytes fails a zip request with 422; in a stream, which has
+    already started, it ends the stream with an application/json part naming the file.
+    """
+    if not request.creatives or not request.formats:
+        raise HTTPException(status_code=400, detail="At least one creative and one format are required")
+    if output not in ("zip", "multipart"):
+        raise HTTPException(status_code=400, detail="output must be 'zip' or 'multipart'")
+    args = (request.creatives, request.formats, request.format, request.quality, request.maxBytes)
+    try:
+        bulk_resizer.check(request.formats, request.format, request.maxBytes)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if output == "zip":
+        try:
+            data = await bulk_resizer.render_zip(*args)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return Response(content=data, media_type="application/zip",
+                        headers={"Content-Disposition": 'attachment; filename="creatives.zip"'})
+
+    boundary = uuid.uuid4().hex
+
+    async def parts():
+        try:
+            async for rendered in bulk_resizer.render_stream(*args):
+                yield (f"--{boundary}\r\nContent-Type: {rendered.mime}\r\n"
+                       f'Content-Disposition: attachment; filename="{rendered.filename}"\r\n'
+                       f"Content-Length: {len(rendered.data)}\r\n\r\n").encode() + rendered.data + b"\r\n"
+        except ValueError as e:
+            error = json.dumps({"error": str(e)}).encode()
+            yield (f"--{boundary}\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(error)}\r\n\r\n").encode() + error + b"\r\n"
+        yield f"--{boundary}--\r\n".encode()
+
+    return StreamingResponse(parts(), media_type=f"multipart/mixed; boundary={boundary}")
+
+# --- Layout ---
+
+layout_engine = LayoutEngine()
+
+class LayoutRequest(BaseModel):
+    assets: List[Asset] = []
+    format: CreativeFormat = CreativeFormat.SQUARE
+    roles: List[str] = ["headline", "cta"]
+    k: int = 3
+    timeBudgetMs: int = 250
+
+@router.post("/layout/suggest")
+async def suggest_layouts(request: LayoutRequest):
     """
-    Validate a creative against guidelines using the ValidationService.
+    Top-k layouts for the given assets and text roles, best first, with each layout's cost breakdown.
     """
-    return validation_service.validate_creative(request.creative, request.brandKit)
+    k = max(1, min(request.k, 10))
+    time_budget = max(10, min(request.timeBudgetMs, 2000)) / 1000
+    results = await layout_engine.suggest_layouts(request.assets, request.format.value, k, request.roles, time_budget)
+    return {"layouts": [{"creative": creative, **layout.to_dict()} for creative, layout in results]}
 
 # --- Sharing ---
 
+async def _compliance_score(data: Dict[str, Any]) -> Optional[int]:
+    # Sharing stores whatever the editor sends; a canvas too malformed to validate is kept unscored
+    try:
+        report = await asyncio.to_thread(validation_service.validate_creative, data)
+    except Exception:
+        return None
+    return report["score"]
+
+async def _save_creative(data: Dict[str, Any], share_id: Optional[str] = None) -> Dict[str, Any]:
+    # Index the compliance score alongside the creative so it can be filtered on later
+    record = await asyncio.to_thread(creative_store.save, data, share_id, await _compliance_score(data))
+    return {"id": record.id, "url": f"/share/{record.id}", "version": record.version}
+
 @router.post("/share")
 async def share_creative(data: Dict[str, Any] = Body(...)):
     """
     Save creative JSON and return a unique ID.
     """
-    share_id = str(uuid.uuid4())
-    os.makedirs("data/creatives", exist_ok=True)
-    
-    with open(f"data/creatives/{share_id}.json", "w") as f:
-        json.dump(data, f)
-        
-    return {"id": share_id, "url": f"/share/{share_id}"}
+    return await _save_creative(data)
 
-@router.get("/load/{share_id}")
-async def load_creative(share_id: str):
+@router.put("/share/{share_id}")
+async def update_shared_creative(share_id: str, data: Dict[str, Any] = Body(...)):
     """
-    Load creative JSON by ID.
+    Save a new version of a shared creative; earlier versions stay loadable.
+    """
+    if await asyncio.to_thread(creative_store.get, share_id) is None:
+        raise HTTPException(status_code=404, detail="Creative not found")
+    return await _save_creative(data, share_id)
+
+class CreativePatchRequest(BaseModel):
+    baseVersion: int
+    patch: List[Dict[str, Any]]
+
+@router.patch("/share/{share_id}")
+async def patch_shared_creative(share_id: str, request: CreativePatchRequest):
+    """
+    Save a new version as an RFC 6902 JSON Patch against baseVersion, which must be the latest version.
     """
     try:
-        with open(f"data/creatives/{share_id}.json", "r") as f:
-            data = json.load(f)
-        return data
-    except FileNotFoundError:
+        record, data = await asyncio.to_thread(creative_store.save_patch, share_id, request.baseVersion, request.patch)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Creative not found")
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "headVersion": e.head_version})
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=f"Patch does not apply: {e}")
+
+    score = await _compliance_score(data)
+    if score is not None:
+        await asyncio.to_thread(creative_store.update_score, record.id, record.version, score)
+    return {"id": record.id, "url": f"/share/{record.id}", "version": record.version}
+
+@router.get("/load/{share_id}")
+async def load_creative(share_id: str, version: Optional[int] = None):
+    """
+    Load creative JSON by ID (latest version unless `version` is given).
+    """
+    data = await asyncio.to_thread(creative_store.load, share_id, version)
+    if data is None:
         raise HTTPException(status_code=404, detail="Creative not found")
+    return data
+
+@router.get("/load/{share_id}/versions")
+async def list_creative_versions(share_id: str):
+    versions = await asyncio.to_thread(creative_store.versions, share_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail="Creative not found")
+    return {"id": share_id, "versions": versions}
+
+@router.get("/creatives")
+async def list_creatives(brand: Optional[str] = None, format: Optional[str] = None, minScore: Optional[int] = None,
+                         limit: int = 20, cursor: Optional[str] = None):
+    """
+    Shared creatives, newest first, filtered by brand/format/score. Pass `nextCursor` back as `cursor` for the next page.
+    """
+    try:
+        records, next_cursor = await asyncio.to_thread(creative_store.list, brand, format, minScore, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": [r.to_dict() for r in records], "nextCursor": next_cursor}
 
 # --- Assets & AI ---
 
 @router.post("/upload")
-async def upload_asset(file: UploadFile = File(...)):
+async def upload_asset(request: Request):
     """
-    Upload an asset and save it to static directory.
+    Upload an image (multipart field "file") into the content-addressed asset store.
+    Identical uploads are stored once and get the same URL.
     """
-    import shutil
-    
-    file_location = f"static/{file.filename}"
-    # Ensure static directory exists
-    os.makedirs("static", exist_ok=True)
-    
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
-        
-    return {"filename": file.filename, "url": f"/static/{file.filename}"}
+    try:
+        results = await upload_pipeline.receive(request, max_files=1)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if not results:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    if results[0].error is not None:
+        raise HTTPException(status_code=results[0].error.status_code, detail=str(results[0].error))
+    return _with_duplicates(results[0])
+
+@router.post("/upload/batch")
+async def upload_assets(request: Request):
+    """
+    Upload up to UPLOAD_MAX_FILES images in one multipart request. Files are stored as
+    they finish streaming; each gets its own result or error, in request order.
+    """
+    try:
+        results = await upload_pipeline.receive(request)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return {"results": [_with_duplicates(r) for r in results]}
+
+def _with_duplicates(result: UploadResult) -> dict:
+    # Earlier uploads of the same picture at another size or compression, so the editor can offer those instead
+    data = result.to_dict()
+    record = result.record
+    if record is not None and record.phash:
+        data["duplicates"] = [
+            {"id": r.digest, "url": r.url, "filename": r.filename, "width": r.width, "height": r.height, "distance": d}
+            for r, d in asset_store.duplicates(record.phash, record.dhash, exclude=record.digest)[:5]
+        ]
+    return data
 
 @router.post("/generate-bg")
-async def generate_background(prompt: str = Form(...)):
+async def generate_background(
+    prompt: str = Form(...),
+    width: int = Form(DEFAULT_SIZE[0]),
+    height: int = Form(DEFAULT_SIZE[1]),
+    seed: Optional[int] = Form(None),
+    fresh: bool = Form(False),
+):
     """
     Generate a background image using the Flux service.
+    Identical prompts (after normalisation) are served from cache; pass fresh=true to force a new image.
     """
-    # Generate unique filename
-    filename = f"ai_gen_{uuid.uuid4()}.png"
-    output_path = f"static/{filename}"
-    
+    if not prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt must not be empty")
+    try:
+        request = GenerationRequest(prompt=prompt, width=width, height=height, seed=seed)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     try:
-        # Call the service (uses Flux via HF Inference Client)
-        await generate_bg_service(prompt, output_path)
-        
-        return {
-            "url": f"/static/{filename}", 
-            "name": filename
-        }
+        record = await generation_service.generate(request, use_cache=not fresh)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    return {"url": record.url, "id": record.digest, "name": record.filename}
+
+async def _read_image_url(image_url: str) -> bytes:
+    data = await asyncio.to_thread(read_image_source, image_url)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"Image not found: {image_url}")
+    return data
+
 @router.post("/remove-bg")
 async def remove_background(image_url: str = Form(...)):
     """
-    Remove background from an image (Stub).
+    Remove the background from an uploaded or generated image using rembg.
+    Results are cached by input content, so repeat requests are free.
     """
-    # In a real app, this would call rembg
-    # For now, return the original url or a transparent placeholder
-    return {"url": image_url}
+    data = await _read_image_url(image_url)
+    try:
+        record = await background_remover.remove(data, filename=os.path.basename(image_url))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"url": record.url, "id": record.digest, "name": record.filename}
+
+class RemoveBackgroundBatchRequest(BaseModel):
+    image_urls: List[str]
 
+@router.post("/remove-bg/batch")
+async def remove_background_batch(request: RemoveBackgroundBatchRequest):
+    """
+    Remove backgrounds from several images in one call. Results are returned in input order.
+    """
+    items = [await _read_image_url(url) for url in request.image_urls]
+    try:
+        records = await background_remover.remove_many(items)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"results": [{"url": r.url, "id": r.digest, "name": r.filename} for r in records]}
@@ -0,0 +1,83 @@
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.services.ai_jobs import job_queue
+from app.services.jobs import JobQueueFullError, UnknownJobKindError
+
+router = APIRouter()
+
+class JobRequest(BaseModel):
+    params: Dict[str, Any] = {}
+    priority: int = 0
+
+@router.post("/{kind}", status_code=202)
+async def submit_job(kind: str, request: JobRequest):
+    """
+    Queue a long-running operation ("generate-bg", "remove-bg") and return its job at once.
+    Follow it with GET /{id}, the /{id}/events SSE stream or the /{id}/ws WebSocket.
+    """
+    try:
+        job = await job_queue.submit(kind, request.params, request.priority)
+    except UnknownJobKindError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return job.to_dict()
+
+@router.get("")
+async def list_jobs(kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50):
+    jobs = await job_queue.list(kind, status, limit)
+    return {"items": [j.to_dict() for j in jobs], "queues": job_queue.stats()}
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-Sent Events: a `progress` event per state change and a final `done` event.
+    """
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for state in job_queue.watch(job_id):
+            if state is None:
+                yield ": keep-alive\n\n"
+                continue
+            name = "done" if state["finished_at"] is not None else "progress"
+            yield f"event: {name}\ndata: {json.dumps(state)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/{job_id}/ws")
+async def job_socket(websocket: WebSocket, job_id: str):
+    await websocket.accept()
+    if await job_queue.get(job_id) is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+    try:
+        async for state in job_queue.watch(job_id):
+            if state is not None:
+                await websocket.send_json(state)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
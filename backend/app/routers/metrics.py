@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from app.services.backends import backends
+from app.utils.metrics import CONTENT_TYPE, metrics
+from app.utils.profiler import PROFILING_ENABLED, profiler
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus text exposition: per-route and per-stage latency histograms, cache hit
+    ratios, worker queue depths and in-flight counts.
+    """
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+@router.get("/ready")
+async def readiness():
+    """
+    Which heavy backends are loaded. 503 until every backend in PRELOAD_BACKENDS is;
+    the others load on first use and are reported but never block readiness.
+    """
+    ready, body = backends.readiness()
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+def _check_profiling():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING_ENABLED=1)")
+
+@router.get("/metrics/profiles")
+async def list_profiles():
+    _check_profiling()
+    return {"items": profiler.recent()}
+
+@router.get("/metrics/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "json", limit: int = 25):
+    """
+    A request profile taken with `X-Profile: 1`: a top-functions summary (`format=json`)
+    or folded stacks for flame graphs (`format=folded`).
+    """
+    _check_profiling()
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(profile.folded())
+    return {**profile.summary(), "top": profile.top(limit)}
@@ -0,0 +1,51 @@
+import asyncio
+import os
+from typing import Any, Dict
+
+from app.services.background_removal import REMBG_MAX_QUEUE, REMBG_WORKERS, background_remover
+from app.services.generation import DEFAULT_SIZE, GenerationRequest, generation_service
+from app.services.jobs import Job, Progress, job_queue
+from app.utils.file_handler import read_image_source
+
+GENERATE_CONCURRENCY = int(os.environ.get("GENERATE_JOB_CONCURRENCY", 2))
+GENERATE_MAX_QUEUED = int(os.environ.get("GENERATE_JOB_MAX_QUEUED", 64))
+
+def _generation_request(params: Dict[str, Any]) -> GenerationRequest:
+    prompt = str(params.get("prompt") or "")
+    if not prompt.strip():
+        raise ValueError("Prompt must not be empty")
+    seed = params.get("seed")
+    try:
+        width = int(params.get("width") or DEFAULT_SIZE[0])
+        height = int(params.get("height") or DEFAULT_SIZE[1])
+        seed = int(seed) if seed is not None else None
+    except (TypeError, ValueError):
+        raise ValueError("width, height and seed must be integers")
+    # GenerationRequest rejects sizes outside MIN_SIZE..MAX_SIZE
+    return GenerationRequest(prompt=prompt, width=width, height=height, seed=seed)
+
+async def generate_background(job: Job, progress: Progress) -> Dict[str, Any]:
+    request = _generation_request(job.params)
+    progress(0.1, "Generating image")
+    record = await generation_service.generate(request, use_cache=not job.params.get("fresh"))
+    return {"url": record.url, "id": record.digest, "name": record.filename}
+
+def _check_image_url(params: Dict[str, Any]):
+    if not str(params.get("image_url") or "").strip():
+        raise ValueError("image_url is required")
+
+async def remove_background(job: Job, progress: Progress) -> Dict[str, Any]:
+    image_url = job.params["image_url"]
+    progress(0.05, "Reading image")
+    data = await asyncio.to_thread(read_image_source, image_url)
+    if data is None:
+        raise ValueError(f"Image not found: {image_url}")
+    progress(0.2, "Removing background")
+    record = await background_remover.remove(data, filename=os.path.basename(image_url))
+    return {"url": record.url, "id": record.digest, "name": record.filename}
+
+job_queue.register("generate-bg", generate_background, concurrency=GENERATE_CONCURRENCY,
+                   max_queued=GENERATE_MAX_QUEUED, validate=_generation_request)
+# One job per rembg worker process; the remover's own queue limit still applies underneath
+job_queue.register("remove-bg", remove_background, concurrency=REMBG_WORKERS,
+                   max_queued=REMBG_MAX_QUEUE, validate=_check_image_url)
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+from PIL import Image
+
+from app.services.image_hash import HammingIndex, distance, hash_file
+from app.utils.metrics import timed
+
+ASSET_DIR = "static/assets"
+INDEX_PATH = "data/assets/index.jsonl"
+CHUNK_SIZE = 1024 * 1024
+# pHash bits two images may differ by and still count as the same picture (resized,
+# recompressed, re-exported); dHash must agree within twice that. Up to 7 the index
+# probes only one-bit neighbours of each 16-bit substring (see HammingIndex).
+DUPLICATE_DISTANCE = int(os.environ.get("ASSET_DUPLICATE_DISTANCE", 7))
+SIMILAR_DISTANCE = int(os.environ.get("ASSET_SIMILAR_DISTANCE", 16))
+
+@dataclass
+class AssetRecord:
+    digest: str
+    ext: str
+    size: int
+    mime: str
+    width: Optional[int]
+    height: Optional[int]
+    filename: str
+    created_at: float
+    # Perceptual hashes (16 hex digits), None for non-images and records from before hashing
+    phash: Optional[str] = None
+    dhash: Optional[str] = None
+
+    @property
+    def relative_path(self) -> str:
+        return f"{self.digest[:2]}/{self.digest}{self.ext}"
+
+    @property
+    def url(self) -> str:
+        return f"/static/assets/{self.relative_path}"
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "id": self.digest, "url": self.url}
+
+def _probe_image(path: str):
+    # Header-only read: Image.open doesn't decode pixel data
+    try:
+        with Image.open(path) as image:
+            return image.width, image.height, Image.MIME.get(image.format)
+    except (OSError, ValueError):
+        return None, None, None
+
+class AssetStore:
+    """
+    Content-addressed blob store: each unique payload is written once under its
+    SHA-256 digest, so URLs are stable and safe to cache forever. A JSONL index
+    keeps size, mime, dimensions and perceptual hashes so lookups never re-open the
+    file. Images are pHashed as they're committed and indexed by Hamming distance, so
+    re-uploads at another size or compression are found without scanning the library.
+    """
+
+    def __init__(self, root: str = ASSET_DIR, index_path: str = INDEX_PATH):
+        self.root = root
+        self.index_path = index_path
+        self._records: Dict[str, AssetRecord] = {}
+        self.hashes = HammingIndex()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load_index(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r") as f:
+                    for line in f:
+                        if line.strip():
+                            record = AssetRecord(**json.loads(line))
+                            self._records[record.digest] = record
+            self.hashes.add_many((r.digest, int(r.phash, 16)) for r in self._records.values() if r.phash)
+            self._loaded = True
+
+    def get(self, digest: str) -> Optional[AssetRecord]:
+        self._load_index()
+        return self._records.get(digest)
+
+    def path_for(self, record: AssetRecord) -> str:
+        return os.path.join(self.root, record.relative_path)
+
+    def similar(self, phash: str, max_distance: int = SIMILAR_DISTANCE, limit: Optional[int] = None,
+                exclude: Optional[str] = None) -> List[Tuple[AssetRecord, int]]:
+        """
+        (record, pHash distance) of stored images within `max_distance` bits, nearest first.
+        """
+        self._load_index()
+        matches = self.hashes.query(int(phash, 16), max_distance)
+        found = [(self._records[digest], d) for digest, d in matches if digest != exclude]
+        return found[:limit] if limit is not None else found
+
+    def duplicates(self, phash: str, dhash: Optional[str] = None, exclude: Optional[str] = None,
+                   max_distance: int = DUPLICATE_DISTANCE) -> List[Tuple[AssetRecord, int]]:
+        """
+        Stored images that look the same as the given hashes: the same picture at another
+        size or compression. Both hashes have to agree, which keeps look-alikes out.
+        """
+        found = self.similar(phash, max_distance, exclude=exclude)
+        if dhash is None:
+            return found
+        value = int(dhash, 16)
+        return [(r, d) for r, d in found if r.dhash is None or distance(int(r.dhash, 16), value) <= 2 * max_distance]
+
+    def backfill_hashes(self) -> int:
+        """
+        Hashes stored images indexed before perceptual hashing existed. Returns how many were added.
+        """
+        self._load_index()
+        missing = [r for r in list(self._records.values())
+                   if r.phash is None and r.width is not None and os.path.exists(self.path_for(r))]
+        added = 0
+        for record in missing:
+            hashes = hash_file(self.path_for(record))
+            # Records are shared with readers, so the hashes go on a copy swapped in under the lock
+            if hashes is not None and self._append(replace(record, phash=hashes[0], dhash=hashes[1]), replacing=record):
+                added += 1
+        return added
+
+    async def save_upload(self, upload: UploadFile, chunk_size: int = CHUNK_SIZE) -> AssetRecord:
+        """
+        Streams an upload to a temp file while hashing it, then commits it under its digest.
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = self.temp_file()
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while True:
+                    chunk = await upload.read(chunk_size)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(tmp.write, chunk)
+            return await asyncio.to_thread(
+                self._commit, tmp_path, hasher.hexdigest(), size, upload.filename or "", upload.content_type
+            )
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save_bytes(self, data: bytes, filename: str, content_type: Optional[str] = None) -> AssetRecord:
+        fd, tmp_path = self.temp_file()
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            return self._commit(tmp_path, hashlib.sha256(data).hexdigest(), len(data), filename, content_type)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def temp_file(self) -> Tuple[int, str]:
+        """
+        (fd, path) for a staging file next to the blobs, so committing it is an atomic rename.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkstemp(dir=self.root, suffix=".part")
+
+    def commit(self, tmp_path: str, digest: str, size: int, filename: str, content_type: Optional[str] = None,
+               probe: Optional[Tuple[Optional[int], Optional[int], Optional[str]]] = None) -> AssetRecord:
+        """
+        Moves a fully written staging file into the store. Pass `probe` (width, height, mime)
+        if the image header was already read.
+        """
+        return self._commit(tmp_path, digest, size, filename, content_type, probe)
+
+    @timed("save")
+    def _commit(self, tmp_path: str, digest: str, size: int, filename: str,
+                content_type: Optional[str], probe=None) -> AssetRecord:
+        existing = self.get(digest)
+        if existing is not None and os.path.exists(self.path_for(existing)):
+            # Same bytes already stored: drop the temp copy and reuse the blob
+            return existing
+
+        width, height, mime = probe or _probe_image(tmp_path)
+        phash = dhash = None
+        if width is not None:
+            with timed("hash"):
+                phash, dhash = hash_file(tmp_path) or (None, None)
+        mime = mime or content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        ext = mimetypes.guess_extension(mime) or os.path.splitext(filename)[1].lower()
+        if ext == ".jpe":
+            ext = ".jpg"
+        record = AssetRecord(
+            digest=digest, ext=ext, size=size, mime=mime, width=width, height=height,
+            filename=os.path.basename(filename), created_at=time.time(), phash=phash, dhash=dhash,
+        )
+
+        final_path = self.path_for(record)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        self._append(record)
+        return record
+
+    def _append(self, record: AssetRecord, replacing: Optional[AssetRecord] = None) -> bool:
+        # The index is append-only; a later line for the same digest replaces the earlier one.
+        # With `replacing`, only if that is still the current record (it may have been re-uploaded meanwhile).
+        with self._lock:
+            if replacing is not None and self._records.get(record.digest) is not replacing:
+                return False
+            self._records[record.digest] = record
+            if record.phash:
+                self.hashes.add(record.digest, int(record.phash, 16))
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(asdict(record)) + "\n")
+        return True
+
+asset_store = AssetStore()
@@ -0,0 +1,154 @@
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Backends to load in the background at startup: comma-separated names, or "all".
+# The rest load on first use, so a worker that only validates never imports them.
+PRELOAD_BACKENDS = os.environ.get("PRELOAD_BACKENDS", "")
+
+COLD, LOADING, READY, FAILED = "cold", "loading", "ready", "failed"
+
+def load_module(name: str) -> Callable[[], Any]:
+    """
+    A loader that imports `name` and returns the module.
+    """
+    return lambda: importlib.import_module(name)
+
+class LazyBackend:
+    """
+    A heavy dependency (an ML runtime, an SDK, a worker pool) loaded on the first
+    `get()` or by the startup preload. `get()` blocks, so call it from a worker thread.
+    Concurrent callers wait for the one load. A failed load is recorded and tried
+    again by the next call.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], description: str = ""):
+        self.name = name
+        self.loader = loader
+        self.description = description
+        self.state = COLD
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self._value: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def get(self) -> Any:
+        if self.state == READY:
+            return self._value
+        with self._lock:
+            if self.state == READY:
+                return self._value
+            self.state = LOADING
+            start = time.perf_counter()
+            try:
+                value = self.loader()
+            except Exception as e:
+                self.state, self.error = FAILED, f"{type(e).__name__}: {e}"
+                logger.warning("Loading backend %s failed: %s", self.name, self.error)
+                raise
+            self._value = value
+            self.load_seconds = time.perf_counter() - start
+            self.loaded_at = time.time()
+            self.state, self.error = READY, None
+            logger.info("Loaded backend %s in %.2fs", self.name, self.load_seconds)
+            return value
+
+    def reset(self):
+        """
+        Forgets the loaded value (e.g. after its worker pool broke); the next get() loads again.
+        """
+        with self._lock:
+            self._value = None
+            self.state = COLD
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "loadSeconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "loadedAt": self.loaded_at,
+            "error": self.error,
+            "description": self.description,
+        }
+
+class BackendRegistry:
+    """
+    The process's lazily loaded backends by name, with an optional background preload
+    of the ones named in PRELOAD_BACKENDS. Readiness means every preloaded backend is
+    loaded; backends left to load on first use don't hold it back.
+    """
+
+    def __init__(self, preload: str = PRELOAD_BACKENDS):
+        self.preload = preload
+        self._backends: Dict[str, LazyBackend] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, backend: LazyBackend) -> LazyBackend:
+        self._backends[backend.name] = backend
+        return backend
+
+    def register(self, name: str, loader: Callable[[], Any], description: str = "") -> LazyBackend:
+        return self.add(LazyBackend(name, loader, description))
+
+    def get(self, name: str) -> Any:
+        return self._backends[name].get()
+
+    def backend(self, name: str) -> Optional[LazyBackend]:
+        return self._backends.get(name)
+
+    def names(self) -> List[str]:
+        return sorted(self._backends)
+
+    def preload_targets(self) -> List[str]:
+        requested = [n.strip() for n in self.preload.split(",") if n.strip()]
+        if "all" in requested:
+            return self.names()
+        unknown = [n for n in requested if n not in self._backends]
+        if unknown:
+            logger.warning("PRELOAD_BACKENDS names unknown backends: %s", ", ".join(unknown))
+        return [n for n in requested if n in self._backends]
+
+    def start_preload(self) -> Optional[asyncio.Task]:
+        """
+        Loads the preload targets one by one on a worker thread without holding up startup.
+        """
+        targets = self.preload_targets()
+        if targets and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._preload(targets))
+        return self._task
+
+    async def _preload(self, targets: List[str]):
+        for name in targets:
+            try:
+                await asyncio.to_thread(self._backends[name].get)
+            except Exception:
+                pass  # recorded on the backend and reported by /ready
+
+    def stop_preload(self):
+        # A load already running on its thread finishes in the background
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        targets = set(self.preload_targets())
+        ready = all(self._backends[name].ready for name in targets)
+        return ready, {
+            "ready": ready,
+            "backends": {
+                name: {**backend.status(), "preload": name in targets}
+                for name, backend in sorted(self._backends.items())
+            },
+        }
+
+backends = BackendRegistry()
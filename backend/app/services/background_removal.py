@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from app.services.asset_store import AssetRecord, AssetStore, asset_store as default_asset_store
+from app.services.backends import LazyBackend, backends
+from app.utils.metrics import timed
+
+REMBG_MODEL = os.environ.get("REMBG_MODEL", "u2net")
+REMBG_WORKERS = int(os.environ.get("REMBG_WORKERS", 1))
+REMBG_MAX_QUEUE = int(os.environ.get("REMBG_MAX_QUEUE", 16))
+CUTOUT_INDEX_PATH = "data/assets/cutouts.jsonl"
+
+# --- Worker process side ---
+
+_session = None
+
+def _init_worker(model_name: str):
+    # Loaded once per worker process; every later call reuses the ONNX session
+    global _session
+    from rembg import new_session
+    _session = new_session(model_name)
+
+def _remove(data: bytes) -> bytes:
+    from rembg import remove
+    return remove(data, session=_session, force_return_bytes=True)
+
+def _warmup() -> bool:
+    return _session is not None
+
+# --- Server side ---
+
+class QueueFullError(Exception):
+    pass
+
+class BackgroundRemover:
+    """
+    Runs rembg on a process pool whose workers each hold a warm U²-Net session.
+
+    Cut-outs are stored in the asset store and remembered by the input's SHA-256,
+    so removing the background of the same packshot twice is a dictionary lookup.
+    Identical in-flight requests share one job, and at most `max_queue` jobs may be
+    pending before new ones are rejected.
+    """
+
+    def __init__(self, store: AssetStore = default_asset_store, model_name: str = REMBG_MODEL,
+                 max_workers: int = REMBG_WORKERS, max_queue: int = REMBG_MAX_QUEUE,
+                 index_path: str = CUTOUT_INDEX_PATH):
+        self.store = store
+        self.model_name = model_name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.index_path = index_path
+        self.pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._cutouts: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+        # "Warm" means every worker has loaded its session; rembg itself is only imported in the workers
+        self.workers = LazyBackend("rembg", self.start_workers, f"rembg worker pool with warm {model_name} sessions")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: onnxruntime's thread pools don't survive being forked
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.model_name,),
+            )
+        return self._pool
+
+    def _index(self) -> Dict[str, str]:
+        with self._lock:
+            if self._cutouts is None:
+                self._cutouts = {}
+                if os.path.exists(self.index_path):
+                    with open(self.index_path, "r") as f:
+                        for line in f:
+                            if line.strip():
+                                entry = json.loads(line)
+                                self._cutouts[entry["input"]] = entry["output"]
+            return self._cutouts
+
+    def _remember(self, input_digest: str, output_digest: str):
+        index = self._index()
+        with self._lock:
+            index[input_digest] = output_digest
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps({"input": input_digest, "output": output_digest}) + "\n")
+
+    def cached(self, input_digest: str) -> Optional[AssetRecord]:
+        output_digest = self._index().get(input_digest)
+        return self.store.get(output_digest) if output_digest else None
+
+    def start_workers(self) -> ProcessPoolExecutor:
+        """
+        Starts the pool and blocks until every worker has loaded its session.
+        """
+        pool = self._get_pool()
+        try:
+            for future in [pool.submit(_warmup) for _ in range(self.max_workers)]:
+                future.result()
+        except BrokenProcessPool as e:
+            self._pool = None
+            raise RuntimeError(f"Background removal worker failed: {e}") from e
+        return pool
+
+    async def warmup(self):
+        """
+        Starts the workers and loads their sessions ahead of the first request.
+        """
+        await asyncio.to_thread(self.workers.get)
+
+    async def remove(self, data: bytes, filename: str = "cutout.png") -> AssetRecord:
+        """
+        Returns the stored cut-out for `data`, computing it only if it's not cached.
+        """
+        input_digest = hashlib.sha256(data).hexdigest()
+        record = self.cached(input_digest)
+        if record is not None:
+            return record
+
+        pending = self._inflight.get(input_digest)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        if self.pending >= self.max_queue:
+            raise QueueFullError("Background removal queue is full, try again shortly")
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[input_digest] = future
+        self.pending += 1
+        try:
+            if not self.workers.ready:
+                # The first request (unless preloaded) waits for the workers' sessions
+                await asyncio.to_thread(self.workers.get)
+            loop = asyncio.get_running_loop()
+            with timed("remove_bg"):
+                output = await loop.run_in_executor(self._get_pool(), _remove, data)
+            name = f"no_bg_{os.path.splitext(os.path.basename(filename))[0]}.png"
+            record = await asyncio.to_thread(self.store.save_bytes, output, name, "image/png")
+            await asyncio.to_thread(self._remember, input_digest, record.digest)
+            future.set_result(record)
+            return record
+        except BrokenProcessPool as e:
+            # A worker died (e.g. the model failed to load); start a fresh pool next time
+            self._pool = None
+            self.workers.reset()
+            error = RuntimeError(f"Background removal worker failed: {e}")
+            future.set_exception(error)
+            future.exception()
+            raise error from e
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self.pending -= 1
+            del self._inflight[input_digest]
+
+    async def remove_many(self, items: List[bytes]) -> List[AssetRecord]:
+        """
+        Cut-outs for a batch, in input order. The whole batch is rejected up front if it
+        wouldn't fit in the queue, rather than failing part-way through.
+        """
+        uncached = {hashlib.sha256(data).hexdigest() for data in items}
+        uncached = {d for d in uncached if self.cached(d) is None and d not in self._inflight}
+        if self.pending + len(uncached) > self.max_queue:
+            raise QueueFullError(f"Batch needs {len(uncached)} slots but only {self.max_queue - self.pending} are free")
+        return await asyncio.gather(*[self.remove(data) for data in items])
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+            self.workers.reset()
+
+background_remover = BackgroundRemover()
+backends.add(background_remover.workers)
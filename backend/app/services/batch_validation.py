@@ -0,0 +1,87 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.services.validation_service import validation_service
+from app.utils.metrics import timed
+
+# 0 disables the process pool and validates on a thread instead (useful for dev/tests)
+DEFAULT_WORKERS = int(os.environ.get("VALIDATION_WORKERS", os.cpu_count() or 1))
+DEFAULT_CHUNK_SIZE = int(os.environ.get("VALIDATION_CHUNK_SIZE", 16))
+
+def _validate_chunk(creatives: List[Dict[str, Any]], brand_kit: Optional[Dict[str, Any]],
+                    rule_pack: Optional[str] = None) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    # Runs inside a worker process: normalise the brand kit once for the whole chunk
+    prepared_kit = validation_service.prepare_brand_kit(brand_kit) if brand_kit else None
+    results = []
+    for creative in creatives:
+        # One malformed creative gets its own error instead of failing the rest of the chunk
+        try:
+            results.append((validation_service.validate_creative(creative, prepared_kit=prepared_kit,
+                                                                 rule_pack=rule_pack), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+class BatchValidator:
+    """
+    Fans batches of creatives out over a process pool in fixed-size chunks.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self.pending = 0  # chunks submitted and not yet finished, across all batches
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers <= 0:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def validate_stream(self, creatives: List[Dict[str, Any]], brand_kit: Optional[Dict[str, Any]] = None,
+                              ordered: bool = True, rule_pack: Optional[str] = None
+                              ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Yields (input_index, report, error) triples, either in input order or as chunks
+        complete. A creative that can't be validated has no report and an error message.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+
+        async def run_chunk(start: int, chunk: List[Dict[str, Any]]):
+            self.pending += 1
+            try:
+                # Includes the wait for a free worker
+                with timed("validate_batch_chunk"):
+                    if pool is None:
+                        results = await asyncio.to_thread(_validate_chunk, chunk, brand_kit, rule_pack)
+                    else:
+                        results = await loop.run_in_executor(pool, _validate_chunk, chunk, brand_kit, rule_pack)
+            finally:
+                self.pending -= 1
+            return start, results
+
+        tasks = [
+            asyncio.ensure_future(run_chunk(start, creatives[start:start + self.chunk_size]))
+            for start in range(0, len(creatives), self.chunk_size)
+        ]
+        try:
+            for next_task in (tasks if ordered else asyncio.as_completed(tasks)):
+                start, results = await next_task
+                for offset, (report, error) in enumerate(results):
+                    yield start + offset, report, error
+        finally:
+            # Client went away or a chunk failed: don't leave queued work behind
+            for task in tasks:
+                task.cancel()
+
+batch_validator = BatchValidator()
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from PIL import ImageColor
+
+from app.utils.cache import LRUCache
+
+# White and black are always allowed alongside the brand palette
+NEUTRAL_COLORS = frozenset({0xFFFFFF, 0x000000})
+
+def parse_color(value: Any) -> Optional[int]:
+    """
+    Normalises a CSS colour (#rgb, #rrggbb, rgb()/rgba(), hsl(), named) to a 24-bit int.
+    Alpha is ignored. Returns None for anything that isn't a plain colour (gradients, patterns).
+    """
+    # Fabric gradients and patterns are dicts, which can't be cache keys
+    if not isinstance(value, str):
+        return None
+    return _parse_color(value)
+
+@lru_cache(maxsize=4096)
+def _parse_color(value: str) -> Optional[int]:
+    try:
+        rgb = ImageColor.getrgb(value.strip().lower())
+    except ValueError:
+        return None
+    r, g, b = rgb[:3]
+    return (r << 16) | (g << 8) | b
+
+def normalize_font(name: str) -> str:
+    return name.strip().strip("'\"").casefold()
+
+def _ints_to_lab(colors: np.ndarray) -> np.ndarray:
+    # 24-bit ints -> CIE L*a*b* (D65), vectorised over any number of colours
+    rgb = np.stack([(colors >> 16) & 0xFF, (colors >> 8) & 0xFF, colors & 0xFF], axis=-1) / 255.0
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ np.array([
+        [0.4124564, 0.2126729, 0.0193339],
+        [0.3575761, 0.7151522, 0.1191920],
+        [0.1804375, 0.0721750, 0.9503041],
+    ])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+def _parse_tolerance(value: Any) -> float:
+    # Like unparseable colours, a malformed tolerance is ignored rather than failing validation
+    try:
+        tolerance = float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+    return tolerance if math.isfinite(tolerance) and tolerance > 0 else 0.0
+
+class BrandKitIndex:
+    """
+    Pre-normalised view of a brand kit: colours as 24-bit ints (plus their Lab
+    coordinates for tolerance checks) and fonts as a casefolded frozenset.
+    """
+
+    def __init__(self, colors: Iterable[str] = (), fonts: Iterable[str] = (), color_tolerance: float = 0.0):
+        parsed = (parse_color(c) for c in colors)
+        self.colors = frozenset(c for c in parsed if c is not None)
+        self.fonts = frozenset(normalize_font(f) for f in fonts if isinstance(f, str))
+        self.color_tolerance = _parse_tolerance(color_tolerance)
+        self._palette_lab = _ints_to_lab(np.fromiter(sorted(self.colors), dtype=np.int64)) if self.colors else None
+
+    @classmethod
+    def from_brand_kit(cls, brand_kit: Dict[str, Any]) -> "BrandKitIndex":
+        return cls(
+            colors=brand_kit.get('colors') or [],
+            fonts=brand_kit.get('fonts') or [],
+            color_tolerance=brand_kit.get('colorTolerance') or 0.0,
+        )
+
+    def is_brand_font(self, font: str) -> bool:
+        return normalize_font(font) in self.fonts
+
+    def nearest_delta_e(self, colors: Iterable[int]) -> np.ndarray:
+        """
+        CIE76 ΔE from each colour to its nearest palette colour (inf if the palette is empty).
+        """
+        values = np.fromiter(colors, dtype=np.int64)
+        if self._palette_lab is None or values.size == 0:
+            return np.full(values.shape, np.inf)
+        lab = _ints_to_lab(values)
+        distances = np.linalg.norm(lab[:, None, :] - self._palette_lab[None, :, :], axis=-1)
+        return distances.min(axis=1)
+
+    def off_palette_colors(self, colors: List[str]) -> List[str]:
+        """
+        Returns the colours (as given) that are neither neutral nor in the brand palette.
+        Unparseable values are skipped. With a colour tolerance, near matches count as on-palette.
+        """
+        candidates = []
+        for color in colors:
+            value = parse_color(color)
+            if value is None or value in NEUTRAL_COLORS or value in self.colors:
+                continue
+            candidates.append((color, value))
+
+        if not candidates or self.color_tolerance <= 0:
+            return [color for color, _ in candidates]
+
+        delta_e = self.nearest_delta_e(value for _, value in candidates)
+        return [color for (color, _), d in zip(candidates, delta_e) if d > self.color_tolerance]
+
+_index_cache = LRUCache(maxsize=256)
+
+def brand_kit_key(brand_kit: Dict[str, Any]) -> str:
+    # Only hash the fields the index uses; kits also carry large base64 logos
+    relevant = {k: brand_kit.get(k) for k in ('colors', 'fonts', 'colorTolerance')}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()
+
+def get_brand_kit_index(brand_kit: Dict[str, Any]) -> BrandKitIndex:
+    """
+    Returns a cached BrandKitIndex for this brand kit's content.
+    """
+    return _index_cache.get_or_create(brand_kit_key(brand_kit), lambda: BrandKitIndex.from_brand_kit(brand_kit))
@@ -0,0 +1,156 @@
+import asyncio
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.models.creative import CreativeFormat
+from app.services.canvas import parse_canvas
+from app.services.compositor import Compositor, compositor as default_compositor, object_kind
+from app.services.export import FORMATS, BudgetEncoder, encode
+from app.services.resize_engine import ResizeEngine, format_size, resize_engine as default_resize_engine
+from app.utils.metrics import timed
+
+RESIZE_WORKERS = int(os.environ.get("RESIZE_WORKERS", min(4, os.cpu_count() or 1)))
+DEFAULT_FORMATS = [f.value for f in CreativeFormat]
+DEFAULT_QUALITY = 90
+
+@dataclass
+class ResizeJob:
+    index: int
+    name: str
+    canvas: Dict[str, Any]
+    width: int
+    height: int
+
+@dataclass
+class RenderedFormat:
+    index: int
+    filename: str
+    width: int
+    height: int
+    mime: str
+    data: bytes
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", value).strip("_") or "creative"
+
+def _image_sources(canvas_json: Dict[str, Any]) -> List[str]:
+    objects = list(canvas_json.get("objects", []))
+    if isinstance(canvas_json.get("backgroundImage"), dict):
+        objects.append(canvas_json["backgroundImage"])
+    return [obj["src"] for obj in objects if object_kind(obj) == "image" and obj.get("src")]
+
+class BulkResizer:
+    """
+    Renders N creatives x M formats. Layouts are planned up front with ResizeEngine,
+    every distinct image source is decoded once into the shared compositor cache,
+    and render + encode jobs run on a thread pool (Pillow releases the GIL for both).
+    """
+
+    def __init__(self, compositor: Compositor = default_compositor, engine: ResizeEngine = default_resize_engine,
+                 max_workers: int = RESIZE_WORKERS):
+        self.compositor = compositor
+        self.engine = engine
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="resize")
+        return self._pool
+
+    @staticmethod
+    def check(formats: List[str], image_format: str, max_bytes: Optional[int] = None) -> str:
+        """
+        Validates the request up front (so streamed responses don't fail mid-way); returns the
+        normalised output format.
+        """
+        for f in formats:
+            format_size(f)
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("maxBytes must be positive")
+        image_format = "jpeg" if image_format.lower() == "jpg" else image_format.lower()
+        if image_format not in FORMATS:
+            raise ValueError(f"Unsupported format '{image_format}'. Use one of: {', '.join(sorted(FORMATS))}")
+        return image_format
+
+    def plan(self, creatives: List[Dict[str, Any]], formats: List[str]) -> List[ResizeJob]:
+        """
+        One job per (creative, format); raises ValueError for malformed format strings.
+        """
+        sizes = [format_size(f) for f in formats]
+        jobs = []
+        seen = set()
+        for i, creative in enumerate(creatives):
+            name = _slug(str(creative.get("name") or creative.get("id") or f"creative_{i + 1}"))
+            if name in seen:
+                name = f"{name}_{i + 1}"
+            seen.add(name)
+            parsed = parse_canvas(creative)  # read once, laid out for every format
+            for width, height in sizes:
+                canvas = self.engine.resize_canvas(parsed, f"{width}x{height}")
+                jobs.append(ResizeJob(len(jobs), f"{name}_{width}x{height}", canvas, width, height))
+        return jobs
+
+    def _render(self, job: ResizeJob, image_format: str, quality: int, max_bytes: Optional[int]) -> RenderedFormat:
+        with timed("render"):
+            image = self.compositor.render(job.canvas)
+        with timed("encode"):
+            if max_bytes:
+                try:
+                    result = BudgetEncoder(max_bytes=max_bytes).fit(image, image_format)
+                except ValueError as e:
+                    raise ValueError(f"{job.name}: {e}") from e
+                data, fmt = result.data, result.format
+            else:
+                data, fmt = encode(image, image_format, quality), image_format
+        _, mime, ext = FORMATS[fmt]
+        return RenderedFormat(job.index, job.name + ext, job.width, job.height, mime, data)
+
+    async def _prefetch(self, creatives: List[Dict[str, Any]]):
+        sources = {src for creative in creatives for src in _image_sources(creative)}
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._get_pool(), self.compositor.load_source, src)
+                               for src in sources])
+
+    async def render_stream(self, creatives: List[Dict[str, Any]], formats: Optional[List[str]] = None,
+                            image_format: str = "png", quality: int = DEFAULT_QUALITY,
+                            max_bytes: Optional[int] = None) -> AsyncIterator[RenderedFormat]:
+        """
+        Yields rendered files in completion order. Raises ValueError, naming the file, if one
+        can't be fitted into `max_bytes`; the remaining renders are cancelled.
+        """
+        image_format = self.check(formats or DEFAULT_FORMATS, image_format, max_bytes)
+        jobs = self.plan(creatives, formats or DEFAULT_FORMATS)
+        await self._prefetch(creatives)
+
+        loop = asyncio.get_running_loop()
+        tasks = [loop.run_in_executor(self._get_pool(), self._render, job, image_format, quality, max_bytes)
+                 for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def render_zip(self, creatives: List[Dict[str, Any]], formats: Optional[List[str]] = None,
+                         image_format: str = "png", quality: int = DEFAULT_QUALITY,
+                         max_bytes: Optional[int] = None) -> bytes:
+        buffer = io.BytesIO()
+        # Images are already compressed; deflating them again only costs time
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            async for rendered in self.render_stream(creatives, formats, image_format, quality, max_bytes):
+                archive.writestr(rendered.filename, rendered.data)
+        return buffer.getvalue()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+bulk_resizer = BulkResizer()
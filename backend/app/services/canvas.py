@@ -0,0 +1,231 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.models.creative import Asset, AssetRole, AssetType, Creative, CreativeFormat, TextLayer
+from app.services.compositor import object_kind
+from app.services.geometry import LINE_HEIGHT, Box, corner_boxes, transformed_corners
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib parser gives the same result, a few times slower
+    orjson = None
+
+ASSET_ROLES = {role.value for role in AssetRole}
+FORMATS = {fmt.value: fmt for fmt in CreativeFormat}
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parses a JSON request body, with orjson when it's installed. Raises ValueError on bad JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def canonical_json(value: Any) -> bytes:
+    """
+    Sorted-key JSON of `value`, for content hashes and cache keys.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder copes
+    return json.dumps(value, sort_keys=True, default=str).encode()
+
+@lru_cache(maxsize=64)
+def _kind(type_name: str) -> str:
+    return object_kind({"type": type_name})
+
+def _origin(value: Any, far: str) -> float:
+    # 'left'/'top' (or unset), 'center', 'right'/'bottom' or a fraction of the object's size
+    if value is None:
+        return 0.0
+    if value == "center":
+        return 0.5
+    if value == far:
+        return 1.0
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+@dataclass(slots=True)
+class CanvasObject:
+    """
+    The fields of one Fabric object that validation, resizing and contrast read, pulled
+    out of its dict once. `data` is the original object, passed through to the renderer.
+    """
+    index: int
+    id: str  # the Fabric id, else the index
+    kind: str  # object_kind(): 'text', 'image', 'rect', ...
+    role: str
+    left: float
+    top: float
+    width: float  # unscaled; text without a height gets its line boxes' height
+    height: float
+    scale_x: float
+    scale_y: float
+    angle: float
+    origin_x: float  # fraction of the width, 0 = left
+    origin_y: float
+    text: str
+    fill: Optional[str]
+    font_family: Optional[str]
+    font_size: float
+    font_weight: str
+    visible: bool
+    data: Dict[str, Any]
+    box: Optional[Box] = None
+
+    @classmethod
+    def from_fabric(cls, obj: Dict[str, Any], index: int) -> "CanvasObject":
+        # Called for every object of every request: one .get per field, positional construction
+        get = obj.get
+        type_name = get("type", "")
+        kind = _kind(type_name) if isinstance(type_name, str) else object_kind(obj)
+        text = str(get("text", "")) if kind == "text" else ""
+        height = float(get("height") or 0)
+        if not height and kind == "text":
+            height = float(get("fontSize", 40)) * LINE_HEIGHT * (text.count("\n") + 1)
+        fill = get("fill")
+        return cls(
+            index, str(get("id") or index), kind, str(get("role") or ""),
+            float(get("left") or 0), float(get("top") or 0), float(get("width") or 0), height,
+            float(get("scaleX") or 1), float(get("scaleY") or 1), float(get("angle") or 0),
+            _origin(get("originX"), "right"), _origin(get("originY"), "bottom"),
+            text, fill if isinstance(fill, str) and fill else None, get("fontFamily"), float(get("fontSize", 16)),
+            str(get("fontWeight", "normal")).lower(), bool(get("visible", True)), obj,
+        )
+
+    @property
+    def label(self) -> str:
+        if self.kind == "text":
+            return f"Text '{self.text[:10]}...'"
+        return f"{str(self.data.get('type', 'object')).capitalize()} element"
+
+    def text_layer(self) -> TextLayer:
+        """
+        The object as a TextLayer for GuidelineEngine, built without Pydantic validation.
+        """
+        x0, y0, x1, y1 = self.box.bounds
+        return TextLayer.model_construct(
+            id=self.id, text=self.text, role=self.role, font_family=self.font_family or "",
+            font_size=int(self.font_size * self.scale_y), color=self.fill or "",
+            x=x0, y=y0, width=x1 - x0, height=y1 - y0, z_index=self.index,
+        )
+
+    def asset(self) -> Asset:
+        """
+        An image object as an Asset, named by its `name` property or file name.
+        """
+        src = str(self.data.get("src") or "")
+        role = AssetRole(self.role) if self.role in ASSET_ROLES else AssetRole.OTHER
+        name = str(self.data.get("name") or os.path.basename(src.split("?")[0]))
+        return Asset.model_construct(id=self.id, url=src, type=AssetType.IMAGE, role=role, name=name, metadata={})
+
+@dataclass(slots=True)
+class Columns:
+    """
+    Per-object transforms as parallel arrays, for vectorised geometry and resizing.
+    """
+    left: np.ndarray
+    top: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    scale_x: np.ndarray
+    scale_y: np.ndarray
+    angle: np.ndarray
+    origin_x: np.ndarray
+    origin_y: np.ndarray
+    roles: np.ndarray  # object dtype
+
+    @classmethod
+    def of(cls, objects: Sequence[CanvasObject]) -> "Columns":
+        table = np.array([(o.left, o.top, o.width, o.height, o.scale_x, o.scale_y, o.angle, o.origin_x, o.origin_y)
+                          for o in objects], dtype=np.float64).reshape(-1, 9)
+        return cls(*table.T, roles=np.array([o.role for o in objects], dtype=object))
+
+    def corners(self) -> np.ndarray:
+        return transformed_corners(self.left, self.top, self.width * self.scale_x, self.height * self.scale_y,
+                                   self.angle, self.origin_x, self.origin_y)
+
+def attach_boxes(objects: Sequence[CanvasObject], columns: Optional[Columns] = None):
+    """
+    Sets `box` on every object, computing all their corners in one vectorised pass.
+    """
+    columns = columns if columns is not None else Columns.of(objects)
+    boxes = corner_boxes([o.id for o in objects], [o.kind for o in objects], columns.corners(), columns.angle)
+    for obj, box in zip(objects, boxes):
+        obj.box = box
+
+def parse_objects(objects: Sequence[Dict[str, Any]]) -> List[CanvasObject]:
+    """
+    CanvasObjects (with their boxes) for a list of Fabric objects.
+    """
+    parsed = [CanvasObject.from_fabric(obj, i) for i, obj in enumerate(objects)]
+    attach_boxes(parsed)
+    return parsed
+
+def object_boxes(objects: Sequence[Dict[str, Any]]) -> List[Box]:
+    return [o.box for o in parse_objects(objects)]
+
+class ParsedCanvas:
+    """
+    A Fabric canvas parsed once per request and shared by the validators, the resizer
+    and the contrast check: every object as a CanvasObject, plus the same transforms as
+    columns. Boxes are computed on first access to `objects` (the resizer only needs the
+    columns). `data` is the original canvas JSON, which is not modified.
+    """
+    __slots__ = ("data", "width", "height", "columns", "_objects", "_boxed")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.width = float(data.get("width", 1080))
+        self.height = float(data.get("height", 1080))
+        self._objects = [CanvasObject.from_fabric(obj, i) for i, obj in enumerate(data.get("objects", []))]
+        self.columns = Columns.of(self._objects)
+        self._boxed = False
+
+    @property
+    def objects(self) -> List[CanvasObject]:
+        if not self._boxed:
+            attach_boxes(self._objects, self.columns)
+            self._boxed = True
+        return self._objects
+
+    @property
+    def texts(self) -> List[CanvasObject]:
+        return [o for o in self.objects if o.kind == "text"]
+
+    def text_layers(self) -> List[TextLayer]:
+        return [o.text_layer() for o in self.texts]
+
+    def assets(self) -> List[Asset]:
+        return [o.asset() for o in self.objects if o.kind == "image"]
+
+    def to_creative(self) -> Creative:
+        """
+        The canvas as a Creative (text layers and image assets), so GuidelineEngine can
+        check it. Built with model_construct: the fields come from already parsed JSON.
+        """
+        size = f"{int(self.width)}x{int(self.height)}"
+        background = self.data.get("background")
+        return Creative.model_construct(
+            id=str(self.data.get("id") or ""), name=str(self.data.get("name") or ""),
+            format=FORMATS.get(size, size), assets=self.assets(), text_layers=self.text_layers(),
+            background_color=background if isinstance(background, str) else None,
+        )
+
+def parse_canvas(source: Union[ParsedCanvas, Dict[str, Any], bytes, str]) -> ParsedCanvas:
+    """
+    A ParsedCanvas from canvas JSON (already decoded or not); parsed canvases pass through.
+    """
+    if isinstance(source, ParsedCanvas):
+        return source
+    if isinstance(source, (bytes, str)):
+        source = loads(source)
+    if not isinstance(source, dict):
+        raise ValueError("Canvas JSON must be an object")
+    return ParsedCanvas(source)
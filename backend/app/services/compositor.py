@@ -0,0 +1,329 @@
+import hashlib
+import io
+import math
+import os
+import warnings
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.brand_kit import parse_color
+from app.utils.cache import LRUCache
+from app.utils.file_handler import read_image_source
+
+STATIC_DIR = "static"
+FONT_DIRS = [os.path.join(STATIC_DIR, "fonts"), "/usr/share/fonts/truetype", "/Library/Fonts", "C:\\Windows\\Fonts"]
+
+# Fabric's default line height and the extra glyph-box factor it applies per line
+DEFAULT_LINE_HEIGHT = 1.16
+FONT_SIZE_MULT = 1.13
+MAX_RENDER_SIDE = int(os.environ.get("MAX_RENDER_SIDE", 8192))  # px, for the output and each layer
+# Byte budgets for decoded sources, transformed image layers and rasterised text
+SOURCE_CACHE_BYTES = int(os.environ.get("COMPOSITOR_SOURCE_CACHE_BYTES", 256 * 1024 * 1024))
+LAYER_CACHE_BYTES = int(os.environ.get("COMPOSITOR_LAYER_CACHE_BYTES", 256 * 1024 * 1024))
+TEXT_CACHE_BYTES = int(os.environ.get("COMPOSITOR_TEXT_CACHE_BYTES", 64 * 1024 * 1024))
+
+class RenderTooLargeError(ValueError):
+    pass
+
+def _check_size(width: float, height: float, what: str):
+    # Refuse before allocating: a few hostile numbers in the JSON would otherwise ask Pillow for gigabytes
+    if width > MAX_RENDER_SIDE or height > MAX_RENDER_SIDE:
+        raise RenderTooLargeError(
+            f"{what} would be {math.ceil(width)}x{math.ceil(height)} px; the limit is {MAX_RENDER_SIDE} px per side"
+        )
+
+def _image_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+def object_kind(obj: Dict[str, Any]) -> str:
+    """
+    Normalises Fabric type names across versions ('i-text', 'IText', 'Textbox', ...).
+    """
+    kind = str(obj.get("type", "")).lower().replace("-", "")
+    return "text" if kind in ("text", "itext", "textbox") else kind
+
+def _rgba(color: Any, default: Tuple[int, int, int, int] = (0, 0, 0, 255)) -> Tuple[int, int, int, int]:
+    value = parse_color(color) if isinstance(color, str) else None
+    if value is None:
+        return default
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF, 255
+
+def _origin_offset(origin: str, size: float, near: str, far: str) -> float:
+    if origin == "center":
+        return size / 2
+    if origin == far:
+        return size
+    if isinstance(origin, (int, float)):
+        return size * origin
+    return 0.0
+
+@lru_cache(maxsize=128)
+def _load_font(family: str, size: int, bold: bool, italic: bool) -> ImageFont.ImageFont:
+    base = family.split(",")[0].strip().strip("'\"")
+    compact = base.replace(" ", "")
+    style = ("Bold" if bold else "") + ("Italic" if italic else "")
+    names = []
+    for name in (compact, base, base.lower(), compact.lower()):
+        if style:
+            names += [f"{name}-{style}.ttf", f"{name}{style}.ttf"]
+        names.append(f"{name}.ttf")
+    for name in names:
+        for directory in [""] + FONT_DIRS:
+            try:
+                return ImageFont.truetype(os.path.join(directory, name) if directory else name, size)
+            except OSError:
+                continue
+    return ImageFont.load_default(size)
+
+class Compositor:
+    """
+    Headless rasteriser for Fabric.js canvas JSON (image, rect and text objects).
+
+    Decoded sources, scaled/rotated image layers and rasterised text blocks are
+    cached, so rendering several formats of the same creative only pays for the
+    objects whose size or styling actually changed.
+    """
+
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self.source_cache = LRUCache(maxsize=64, maxweight=SOURCE_CACHE_BYTES, weigh=_image_bytes)
+        self.layer_cache = LRUCache(maxsize=256, maxweight=LAYER_CACHE_BYTES, weigh=_image_bytes)
+        self.text_cache = LRUCache(maxsize=512, maxweight=TEXT_CACHE_BYTES, weigh=_image_bytes)
+
+    # --- Public API ---
+
+    def render(self, canvas_json: Dict[str, Any], width: Optional[int] = None, height: Optional[int] = None,
+               scale: float = 1.0) -> Image.Image:
+        """
+        Renders canvas JSON to an RGBA image of (width, height) * scale. Raises
+        RenderTooLargeError if the output or any layer is over MAX_RENDER_SIDE on a side.
+        """
+        width = int(width or canvas_json.get("width", 1080))
+        height = int(height or canvas_json.get("height", 1080))
+        out_w, out_h = max(1, round(width * scale)), max(1, round(height * scale))
+        _check_size(out_w, out_h, "The output")
+
+        canvas = Image.new("RGBA", (out_w, out_h), _rgba(canvas_json.get("background"), (255, 255, 255, 0)))
+
+        background_image = canvas_json.get("backgroundImage")
+        if isinstance(background_image, dict):
+            self.draw_object(canvas, background_image, scale)
+
+        for obj in canvas_json.get("objects", []):
+            self.draw_object(canvas, obj, scale)
+        return canvas
+
+    def draw_object(self, canvas: Image.Image, obj: Dict[str, Any], scale: float = 1.0):
+        if not obj.get("visible", True) or obj.get("opacity", 1) <= 0:
+            return
+        layer = self.render_object(obj, scale)
+        if layer is None:
+            return
+        image, (x, y) = layer
+        self._composite(canvas, image, round(x), round(y))
+
+    def render_object(self, obj: Dict[str, Any], scale: float = 1.0) -> Optional[Tuple[Image.Image, Tuple[float, float]]]:
+        """
+        Returns the transformed RGBA layer for one object and its top-left position on the canvas.
+        """
+        kind = object_kind(obj)
+        if kind == "image":
+            content = self._image_content(obj, scale)
+        elif kind == "rect":
+            content = self._rect_content(obj, scale)
+        elif kind == "text":
+            content = self._text_content(obj, scale)
+        else:
+            return None
+        if content is None:
+            return None
+
+        if obj.get("flipX"):
+            content = content.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        if obj.get("flipY"):
+            content = content.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+
+        opacity = float(obj.get("opacity", 1))
+        if opacity < 1:
+            content = self._apply_opacity(content, opacity)
+
+        w, h = content.size
+        ox = _origin_offset(obj.get("originX", "left"), w, "left", "right")
+        oy = _origin_offset(obj.get("originY", "top"), h, "top", "bottom")
+        left = float(obj.get("left", 0)) * scale
+        top = float(obj.get("top", 0)) * scale
+
+        angle = float(obj.get("angle", 0)) % 360
+        if angle:
+            # Fabric rotates clockwise about the origin point; PIL rotates counter-clockwise about the centre
+            rotated = content.rotate(-angle, resample=Image.Resampling.BICUBIC, expand=True)
+            theta = math.radians(angle)
+            vx, vy = ox - w / 2, oy - h / 2
+            ox = rotated.width / 2 + vx * math.cos(theta) - vy * math.sin(theta)
+            oy = rotated.height / 2 + vx * math.sin(theta) + vy * math.cos(theta)
+            content = rotated
+
+        return content, (left - ox, top - oy)
+
+    def load_source(self, src: str) -> Optional[Image.Image]:
+        """
+        Decodes an image `src` (data URL, /static path or URL pointing at /static) once and caches it.
+        Raises RenderTooLargeError for a decompression bomb.
+        """
+        if not src:
+            return None
+        key = hashlib.sha1(src.encode()).hexdigest() if src.startswith("data:") else src
+        cached = self.source_cache.get(key)
+        if cached is not None:
+            return cached
+
+        with warnings.catch_warnings():
+            # Pillow only warns between MAX_IMAGE_PIXELS and twice that; treat both as bombs
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            try:
+                data = read_image_source(src, self.static_dir)
+                if data is None:
+                    return None
+                image = Image.open(io.BytesIO(data))
+                image.load()
+            except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+                raise RenderTooLargeError("An image source exceeds the decompression limit")
+            except (OSError, ValueError):
+                # Missing, truncated or undecodable sources are skipped rather than failing the render
+                return None
+        image = image.convert("RGBA")
+        self.source_cache.put(key, image)
+        return image
+
+    # --- Object content ---
+
+    def _image_content(self, obj: Dict[str, Any], scale: float) -> Optional[Image.Image]:
+        src = obj.get("src", "")
+        source = self.load_source(src)
+        if source is None:
+            return None
+        w = max(1, round(float(obj.get("width") or source.width) * float(obj.get("scaleX", 1)) * scale))
+        h = max(1, round(float(obj.get("height") or source.height) * float(obj.get("scaleY", 1)) * scale))
+        _check_size(w, h, "An image layer")
+
+        crop_x, crop_y = float(obj.get("cropX", 0)), float(obj.get("cropY", 0))
+        key = (src if not src.startswith("data:") else hashlib.sha1(src.encode()).hexdigest(), w, h, crop_x, crop_y)
+        cached = self.layer_cache.get(key)
+        if cached is not None:
+            return cached
+
+        crop_w = float(obj.get("width") or source.width)
+        crop_h = float(obj.get("height") or source.height)
+        region = source
+        if crop_x or crop_y or (crop_w, crop_h) != source.size:
+            region = source.crop((crop_x, crop_y, crop_x + crop_w, crop_y + crop_h))
+        content = region if region.size == (w, h) else region.resize((w, h), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        self.layer_cache.put(key, content)
+        return content
+
+    def _rect_content(self, obj: Dict[str, Any], scale: float) -> Optional[Image.Image]:
+        sx, sy = float(obj.get("scaleX", 1)) * scale, float(obj.get("scaleY", 1)) * scale
+        w = max(1, round(float(obj.get("width", 0)) * sx))
+        h = max(1, round(float(obj.get("height", 0)) * sy))
+        _check_size(w, h, "A rect layer")
+        fill = _rgba(obj.get("fill"), (0, 0, 0, 0))
+        rx = float(obj.get("rx", 0) or 0) * sx
+        if not rx:
+            return Image.new("RGBA", (w, h), fill)
+        content = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+        ImageDraw.Draw(content).rounded_rectangle((0, 0, w - 1, h - 1), radius=rx, fill=fill)
+        return content
+
+    def _text_content(self, obj: Dict[str, Any], scale: float) -> Optional[Image.Image]:
+        text = str(obj.get("text", ""))
+        if not text:
+            return None
+        font_size = float(obj.get("fontSize", 40))
+        # Text is laid out at the vertical scale, then stretched if scaleX differs
+        sy = float(obj.get("scaleY", 1)) * scale
+        stretch = float(obj.get("scaleX", 1)) / float(obj.get("scaleY", 1) or 1)
+        box_width = float(obj.get("width", 0) or 0) * sy
+        wrap = str(obj.get("type", "")).lower() == "textbox"
+        key = (
+            text, obj.get("fontFamily", "Times New Roman"), str(obj.get("fontWeight", "normal")),
+            obj.get("fontStyle", "normal"), round(font_size * sy, 2), round(stretch, 3), str(obj.get("fill")),
+            obj.get("textAlign", "left"), float(obj.get("lineHeight", DEFAULT_LINE_HEIGHT)), round(box_width, 1), wrap,
+        )
+        cached = self.text_cache.get(key)
+        if cached is None:
+            cached = self._rasterize_text(obj, text, font_size * sy, stretch, box_width, wrap)
+            self.text_cache.put(key, cached)
+        return cached
+
+    def _rasterize_text(self, obj: Dict[str, Any], text: str, size: float, stretch: float,
+                        box_width: float, wrap: bool) -> Image.Image:
+        weight = str(obj.get("fontWeight", "normal")).lower()
+        bold = weight == "bold" or (weight.isdigit() and int(weight) >= 600)
+        italic = str(obj.get("fontStyle", "normal")).lower() in ("italic", "oblique")
+        font_px = max(1, round(size))
+        _check_size(box_width, font_px, "A text layer")
+        font = _load_font(str(obj.get("fontFamily", "Times New Roman")), font_px, bold, italic)
+
+        lines = text.split("\n")
+        if wrap and box_width > 0:
+            lines = [wrapped for line in lines for wrapped in self._wrap_line(line, font, box_width)]
+
+        line_widths = [font.getlength(line) for line in lines]
+        width = max([box_width] + line_widths)
+        line_step = font_px * float(obj.get("lineHeight", DEFAULT_LINE_HEIGHT))
+        height = line_step * (len(lines) - 1) + font_px * FONT_SIZE_MULT
+        _check_size(width * max(stretch, 1), height, "A text layer")
+
+        content = Image.new("RGBA", (max(1, math.ceil(width)), max(1, math.ceil(height))), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(content)
+        fill = _rgba(obj.get("fill"))
+        align = obj.get("textAlign", "left")
+        for i, (line, line_width) in enumerate(zip(lines, line_widths)):
+            x = 0.0
+            if align == "center":
+                x = (width - line_width) / 2
+            elif align == "right":
+                x = width - line_width
+            draw.text((x, i * line_step), line, font=font, fill=fill)
+
+        if abs(stretch - 1) > 0.001:
+            content = content.resize((max(1, round(content.width * stretch)), content.height), Image.Resampling.BICUBIC)
+        return content
+
+    @staticmethod
+    def _wrap_line(line: str, font: ImageFont.ImageFont, max_width: float) -> List[str]:
+        words = line.split(" ")
+        wrapped, current = [], ""
+        for word in words:
+            candidate = f"{current} {word}" if current else word
+            if current and font.getlength(candidate) > max_width:
+                wrapped.append(current)
+                current = word
+            else:
+                current = candidate
+        wrapped.append(current)
+        return wrapped
+
+    # --- Helpers ---
+
+    @staticmethod
+    def _apply_opacity(image: Image.Image, opacity: float) -> Image.Image:
+        pixels = np.array(image)
+        pixels[..., 3] = (pixels[..., 3].astype(np.float32) * opacity).astype(np.uint8)
+        return Image.fromarray(pixels, "RGBA")
+
+    @staticmethod
+    def _composite(canvas: Image.Image, layer: Image.Image, x: int, y: int):
+        # alpha_composite needs the destination inside the canvas, so clip first
+        src_left, src_top = max(0, -x), max(0, -y)
+        dest_x, dest_y = max(0, x), max(0, y)
+        width = min(layer.width - src_left, canvas.width - dest_x)
+        height = min(layer.height - src_top, canvas.height - dest_y)
+        if width <= 0 or height <= 0:
+            return
+        canvas.alpha_composite(layer, dest=(dest_x, dest_y), source=(src_left, src_top, src_left + width, src_top + height))
+
+compositor = Compositor()
@@ -0,0 +1,138 @@
+import hashlib
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.services.brand_kit import parse_color
+from app.services.canvas import CanvasObject, ParsedCanvas, canonical_json, parse_canvas
+from app.services.compositor import Compositor, RenderTooLargeError, compositor as default_compositor
+from app.utils.cache import LRUCache
+
+# Backgrounds are rendered so their longest side is about this many pixels
+BACKGROUND_RESOLUTION = 256
+
+# WCAG 2.x AA thresholds
+MIN_CONTRAST_NORMAL = 4.5
+MIN_CONTRAST_LARGE = 3.0
+
+@dataclass
+class ContrastResult:
+    element_id: Optional[str]
+    text: str
+    ratio: float
+    required: float
+
+    @property
+    def passed(self) -> bool:
+        return self.ratio >= self.required
+
+def relative_luminance(rgb: np.ndarray) -> np.ndarray:
+    """
+    WCAG relative luminance for an (..., 3) array of 0-255 sRGB values.
+    """
+    c = rgb.astype(np.float32) / 255.0
+    linear = np.where(c <= 0.03928, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+def contrast_ratio(l1: float, l2: float) -> float:
+    return (max(l1, l2) + 0.05) / (min(l1, l2) + 0.05)
+
+def is_large_text(obj: CanvasObject) -> bool:
+    # WCAG "large": 18pt (24px), or 14pt (~18.66px) bold
+    size = obj.font_size * obj.scale_y
+    weight = obj.font_weight
+    bold = weight == "bold" or (weight.isdigit() and int(weight) >= 600)
+    return size >= 24 or (bold and size >= 18.66)
+
+def is_checked_text(obj: CanvasObject) -> bool:
+    return obj.kind == "text" and obj.visible
+
+class ContrastAnalyzer:
+    """
+    Measures text contrast against the rendered (non-text) background.
+
+    The background is rendered once per creative at low resolution and cached as a
+    luminance array keyed by a hash of the background objects, so editing text or
+    checking many text layers never re-renders it.
+    """
+
+    def __init__(self, renderer: Compositor = default_compositor, resolution: int = BACKGROUND_RESOLUTION):
+        self.renderer = renderer
+        self.resolution = resolution
+        self.luminance_cache = LRUCache(maxsize=128)
+
+    def background_luminance(self, creative_data: Union[ParsedCanvas, Dict[str, Any]]) -> Tuple[np.ndarray, float]:
+        """
+        Returns (luminance array, scale) for the creative's background layers.
+        """
+        canvas = parse_canvas(creative_data)
+        width, height = int(canvas.width), int(canvas.height)
+        scale = min(1.0, self.resolution / max(width, height, 1))
+
+        background = {
+            "width": width,
+            "height": height,
+            "background": canvas.data.get("background"),
+            "backgroundImage": canvas.data.get("backgroundImage"),
+            "objects": [o.data for o in canvas.objects if o.kind != "text"],
+        }
+        key = hashlib.sha1(canonical_json(background)).hexdigest()
+
+        cached = self.luminance_cache.get(key)
+        if cached is None:
+            # Flatten onto white, matching how the exported creative is viewed
+            rendered = np.asarray(self.renderer.render(background, scale=scale), dtype=np.float32)
+            alpha = rendered[..., 3:4] / 255.0
+            rgb = rendered[..., :3] * alpha + 255.0 * (1 - alpha)
+            cached = relative_luminance(rgb)
+            self.luminance_cache.put(key, cached)
+        return cached, scale
+
+    def check(self, creative_data: Union[ParsedCanvas, Dict[str, Any]]) -> List[ContrastResult]:
+        """
+        Returns the worst-case contrast ratio for each visible text object.
+        """
+        canvas = parse_canvas(creative_data)
+        texts = [o for o in canvas.objects if is_checked_text(o)]
+        if not texts:
+            return []
+
+        try:
+            luminance, scale = self.background_luminance(canvas)
+        except RenderTooLargeError:
+            # A layer too large to rasterise can't be measured; the rest of validation still runs
+            return []
+        results = (self.check_text(obj, luminance, scale) for obj in texts)
+        return [r for r in results if r is not None]
+
+    def check_text(self, obj: CanvasObject, luminance: np.ndarray, scale: float) -> Optional[ContrastResult]:
+        """
+        Contrast of one text object against an already rendered background, None if it
+        has no plain fill colour or lies off-canvas.
+        """
+        # obj.fill is None for gradients and patterns; Fabric draws text without a fill in black
+        color = parse_color(obj.fill if "fill" in obj.data else "#000000")
+        if color is None:
+            return None
+        text_lum = float(relative_luminance(np.array([(color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF])))
+
+        rows, cols = luminance.shape
+        x0, y0, x1, y1 = obj.box.bounds
+        c0, r0 = max(0, int(x0 * scale)), max(0, int(y0 * scale))
+        c1, r1 = min(cols, math.ceil(x1 * scale)), min(rows, math.ceil(y1 * scale))
+        if c1 <= c0 or r1 <= r0:
+            return None
+
+        # The worst pixel is the one whose luminance is closest to the text's
+        region = luminance[r0:r1, c0:c1]
+        closest = float(region.flat[np.abs(region - text_lum).argmin()])
+        return ContrastResult(
+            element_id=obj.data.get("id"),
+            text=obj.text,
+            ratio=round(contrast_ratio(text_lum, closest), 2),
+            required=MIN_CONTRAST_LARGE if is_large_text(obj) else MIN_CONTRAST_NORMAL,
+        )
+
+contrast_analyzer = ContrastAnalyzer()
@@ -0,0 +1,392 @@
+import base64
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.cache import LRUCache
+from app.utils.json_patch import JsonPatchError, apply_patch, compact_patch
+from app.utils.metrics import timed
+
+try:
+    import zstandard
+except ImportError:  # optional: payloads fall back to zlib
+    zstandard = None
+
+DB_PATH = os.environ.get("CREATIVE_DB", "data/creatives.db")
+LEGACY_DIR = "data/creatives"
+POOL_SIZE = int(os.environ.get("CREATIVE_DB_POOL", 4))
+ZSTD_LEVEL = 6
+MAX_PAGE_SIZE = 100
+SNAPSHOT_INTERVAL = int(os.environ.get("CREATIVE_SNAPSHOT_INTERVAL", 20))  # max patches between snapshots
+SNAPSHOT_RATIO = 0.5  # store a snapshot instead when a patch is at least this share of the full document
+
+# Columns added after the first release of the schema
+MIGRATIONS = [
+    ("creative_versions", "kind", "ALTER TABLE creative_versions ADD COLUMN kind TEXT NOT NULL DEFAULT 'snapshot'"),
+    ("creative_versions", "base_version", "ALTER TABLE creative_versions ADD COLUMN base_version INTEGER"),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS creatives (
+    id TEXT PRIMARY KEY,
+    brand TEXT,
+    format TEXT,
+    compliance_score INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    head_version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS creative_versions (
+    creative_id TEXT NOT NULL REFERENCES creatives(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'snapshot',
+    base_version INTEGER,
+    PRIMARY KEY (creative_id, version)
+);
+CREATE INDEX IF NOT EXISTS idx_creatives_created ON creatives (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_creatives_brand ON creatives (brand, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_creatives_format ON creatives (format, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_creatives_score ON creatives (compliance_score);
+"""
+
+@dataclass
+class CreativeRecord:
+    id: str
+    version: int
+    brand: Optional[str]
+    format: Optional[str]
+    compliance_score: Optional[int]
+    created_at: float
+    updated_at: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def compress(data: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+def decompress(codec: str, payload: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Creative was stored with zstd but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    return payload
+
+def _dimension(value: Any) -> Optional[int]:
+    # Client JSON is stored as-is, so width/height may be anything; only positive numbers index
+    try:
+        size = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return size if size > 0 else None
+
+def extract_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Indexed fields pulled from a creative's JSON: brand, "WIDTHxHEIGHT" format and compliance score.
+    """
+    brand_kit = data.get("brandKit")
+    brand = data.get("brand") or (brand_kit.get("name") if isinstance(brand_kit, dict) else None)
+    width, height = _dimension(data.get("width")), _dimension(data.get("height"))
+    score = data.get("complianceScore")
+    return {
+        "brand": str(brand) if brand else None,
+        "format": f"{width}x{height}" if width and height else None,
+        "compliance_score": int(score) if isinstance(score, (int, float)) else None,
+    }
+
+def encode_cursor(created_at: float, creative_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at!r}|{creative_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        created_at, creative_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return float(created_at), creative_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+class VersionConflictError(Exception):
+    def __init__(self, head_version: int):
+        super().__init__(f"Base version is stale; the latest version is {head_version}")
+        self.head_version = head_version
+
+class CreativeStore:
+    """
+    Shared creatives in SQLite (WAL mode) instead of one JSON file per share.
+
+    Payloads are compressed (zstd when available) and every save appends a version, so
+    history is kept. Versions saved from a JSON Patch are stored as that (compacted) patch,
+    with a full snapshot at least every SNAPSHOT_INTERVAL versions, so rebuilding any
+    revision replays a bounded chain. Brand, format, creation time and compliance score are indexed for
+    listing, which is paginated with an opaque (created_at, id) keyset cursor. Connections
+    come from a small pool so concurrent requests don't reopen the database.
+    """
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = POOL_SIZE, legacy_dir: Optional[str] = LEGACY_DIR):
+        self.path = path
+        self.pool_size = pool_size
+        self.legacy_dir = legacy_dir
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        # Rebuilt documents by (id, version), serialised so callers can't mutate the cache
+        self._rebuilt = LRUCache(maxsize=128)
+
+    def _connect(self) -> sqlite3.Connection:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            for table, column, statement in MIGRATIONS:
+                if column not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(statement)
+            self._schema_ready = True
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            conn = None
+            if self._pool.empty() and self._created < self.pool_size:
+                conn = self._connect()
+                self._created += 1
+        if conn is None:
+            conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # --- Writes ---
+
+    @timed("store_save")
+    def save(self, data: Dict[str, Any], creative_id: Optional[str] = None,
+             compliance_score: Optional[int] = None) -> CreativeRecord:
+        """
+        Stores `data` as a new creative, or as the next version of `creative_id` if it exists.
+        """
+        creative_id = creative_id or str(uuid.uuid4())
+        with self.transaction() as conn:
+            row = conn.execute("SELECT head_version, created_at FROM creatives WHERE id = ?", (creative_id,)).fetchone()
+            return self._append(conn, creative_id, row, data, None, compliance_score)
+
+    @timed("store_save")
+    def save_patch(self, creative_id: str, base_version: int, patch: List[Dict[str, Any]],
+                   compliance_score: Optional[int] = None) -> Tuple[CreativeRecord, Dict[str, Any]]:
+        """
+        Applies an RFC 6902 patch to `base_version`, which must be the latest version, and
+        stores the result as the next version. Returns the record and the patched document.
+        Raises KeyError for unknown creatives, VersionConflictError for stale bases and
+        JsonPatchError for patches that don't apply.
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT head_version, created_at FROM creatives WHERE id = ?", (creative_id,)).fetchone()
+            if row is None:
+                raise KeyError(creative_id)
+            if row["head_version"] != base_version:
+                raise VersionConflictError(row["head_version"])
+            data = apply_patch(self._rebuild(conn, creative_id, base_version), patch, in_place=True)
+            if not isinstance(data, dict):
+                raise JsonPatchError("the patched creative must be a JSON object")
+            record = self._append(conn, creative_id, row, data, compact_patch(patch), compliance_score)
+        return record, data
+
+    def _append(self, conn: sqlite3.Connection, creative_id: str, row: Optional[sqlite3.Row], data: Dict[str, Any],
+                patch: Optional[List[Dict[str, Any]]], compliance_score: Optional[int]) -> CreativeRecord:
+        raw = json.dumps(data, separators=(",", ":")).encode()
+        meta = extract_metadata(data)
+        if compliance_score is not None:
+            meta["compliance_score"] = int(compliance_score)
+        now = time.time()
+
+        if row is None:
+            version, created_at = 1, now
+            conn.execute(
+                "INSERT INTO creatives (id, brand, format, compliance_score, created_at, updated_at, head_version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (creative_id, meta["brand"], meta["format"], meta["compliance_score"], now, now, version),
+            )
+        else:
+            version, created_at = row["head_version"] + 1, row["created_at"]
+            conn.execute(
+                "UPDATE creatives SET brand = ?, format = ?, compliance_score = ?, updated_at = ?, head_version = ? "
+                "WHERE id = ?",
+                (meta["brand"], meta["format"], meta["compliance_score"], now, version, creative_id),
+            )
+
+        kind, body = "snapshot", raw
+        if patch is not None:
+            delta = json.dumps(patch, separators=(",", ":")).encode()
+            since_snapshot = conn.execute(
+                "SELECT COUNT(*) FROM creative_versions WHERE creative_id = ? AND kind = 'patch' AND version > "
+                "(SELECT MAX(version) FROM creative_versions WHERE creative_id = ? AND kind = 'snapshot')",
+                (creative_id, creative_id),
+            ).fetchone()[0]
+            if since_snapshot + 1 < SNAPSHOT_INTERVAL and len(delta) < len(raw) * SNAPSHOT_RATIO:
+                kind, body = "patch", delta
+
+        codec, payload = compress(body)
+        conn.execute(
+            "INSERT INTO creative_versions (creative_id, version, created_at, codec, size, payload, kind, base_version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (creative_id, version, now, codec, len(body), payload, kind, version - 1 if kind == "patch" else None),
+        )
+        self._rebuilt.put((creative_id, version), raw)
+        return CreativeRecord(creative_id, version, meta["brand"], meta["format"], meta["compliance_score"],
+                              created_at, now)
+
+    def _rebuild(self, conn: sqlite3.Connection, creative_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """
+        The document at `version`: the nearest snapshot at or before it with the later patches replayed.
+        """
+        cached = self._rebuilt.get((creative_id, version))
+        if cached is not None:
+            return json.loads(cached)
+
+        rows = conn.execute(
+            "SELECT version, kind, codec, payload FROM creative_versions WHERE creative_id = ? AND version <= ? "
+            "AND version >= (SELECT MAX(version) FROM creative_versions "
+            "                WHERE creative_id = ? AND version <= ? AND kind = 'snapshot') "
+            "ORDER BY version",
+            (creative_id, version, creative_id, version),
+        ).fetchall()
+        if not rows or rows[-1]["version"] != version:
+            return None
+
+        data = json.loads(decompress(rows[0]["codec"], rows[0]["payload"]))
+        for row in rows[1:]:
+            data = apply_patch(data, json.loads(decompress(row["codec"], row["payload"])), in_place=True)
+        self._rebuilt.put((creative_id, version), json.dumps(data, separators=(",", ":")).encode())
+        return data
+
+    def update_score(self, creative_id: str, version: int, compliance_score: int):
+        """
+        Records the compliance score computed for `version`, unless a newer version has landed since.
+        """
+        with self.connection() as conn:
+            conn.execute("UPDATE creatives SET compliance_score = ? WHERE id = ? AND head_version = ?",
+                         (int(compliance_score), creative_id, version))
+
+    # --- Reads ---
+
+    @timed("store_load")
+    def load(self, creative_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        The creative's JSON at `version` (latest by default), or None if it doesn't exist.
+        """
+        with self.connection() as conn:
+            if version is None:
+                row = conn.execute("SELECT head_version FROM creatives WHERE id = ?", (creative_id,)).fetchone()
+                version = row["head_version"] if row is not None else None
+            data = self._rebuild(conn, creative_id, version) if version is not None else None
+        if data is not None:
+            return data
+        return self._import_legacy(creative_id) if version in (None, 1) else None
+
+    def _import_legacy(self, creative_id: str) -> Optional[Dict[str, Any]]:
+        # Shares made before the database existed live in data/creatives/<id>.json; move them over on first read
+        if not self.legacy_dir:
+            return None
+        try:
+            uuid.UUID(creative_id)
+        except ValueError:
+            return None
+        path = os.path.join(self.legacy_dir, f"{creative_id}.json")
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r") as f:
+            data = json.load(f)
+        try:
+            self.save(data, creative_id)
+        except sqlite3.IntegrityError:
+            pass  # imported concurrently
+        return data
+
+    def get(self, creative_id: str) -> Optional[CreativeRecord]:
+        with self.connection() as conn:
+            row = conn.execute("SELECT * FROM creatives WHERE id = ?", (creative_id,)).fetchone()
+        return self._record(row) if row is not None else None
+
+    def versions(self, creative_id: str) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT version, kind, created_at, size, length(payload) AS stored FROM creative_versions "
+                "WHERE creative_id = ? ORDER BY version",
+                (creative_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list(self, brand: Optional[str] = None, format: Optional[str] = None, min_score: Optional[int] = None,
+             limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[CreativeRecord], Optional[str]]:
+        """
+        Newest first. Returns a page of records and the cursor for the next page (None at the end).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if brand is not None:
+            clauses.append("brand = ?")
+            params.append(brand)
+        if format is not None:
+            clauses.append("format = ?")
+            params.append(format)
+        if min_score is not None:
+            clauses.append("compliance_score >= ?")
+            params.append(min_score)
+        if cursor:
+            created_at, creative_id = decode_cursor(cursor)
+            clauses.append("(created_at, id) < (?, ?)")
+            params += [created_at, creative_id]
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM creatives {where} ORDER BY created_at DESC, id DESC LIMIT ?", (*params, limit + 1)
+            ).fetchall()
+
+        records = [self._record(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(records[-1].created_at, records[-1].id) if len(rows) > limit else None
+        return records, next_cursor
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> CreativeRecord:
+        return CreativeRecord(row["id"], row["head_version"], row["brand"], row["format"], row["compliance_score"],
+                              row["created_at"], row["updated_at"])
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+        self._created = 0
+
+creative_store = CreativeStore()
@@ -0,0 +1,223 @@
+import asyncio
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, features
+
+from app.utils.metrics import timed
+
+DERIVATIVE_DIR = "data/derivatives"
+DEFAULT_MAX_BYTES = int(os.environ.get("DERIVATIVE_CACHE_BYTES", 512 * 1024 * 1024))
+MAX_DIMENSION = 4096
+
+FORMATS = {
+    # fmt -> (Pillow format, mime, extension)
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "jpg": ("JPEG", "image/jpeg", ".jpg"),
+    "png": ("PNG", "image/png", ".png"),
+    "avif": ("AVIF", "image/avif", ".avif"),
+}
+
+class DiskLRUCache:
+    """
+    Files on disk evicted least-recently-used first once their total size exceeds `max_bytes`.
+
+    An entry handed out by `acquire` is pinned until `release`:
+    a response may still be about to open or stream it, so eviction skips it and catches
+    up once it is released.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        # Rebuild recency order from access/modification times left by a previous run
+        if self._loaded:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        files = []
+        for name in os.listdir(self.root):
+            if name.endswith(".tmp"):
+                continue
+            st = os.stat(os.path.join(self.root, name))
+            files.append((max(st.st_atime, st.st_mtime), name, st.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._loaded = True
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def get(self, name: str) -> Optional[str]:
+        return self._lookup(name, pin=False)
+
+    def acquire(self, name: str, count: bool = True) -> Optional[str]:
+        """
+        Like get, but the file can't be evicted until `release(name)`. Pass count=False
+        for a repeat lookup that shouldn't show up in the hit rate.
+        """
+        return self._lookup(name, pin=True, count=count)
+
+    def _lookup(self, name: str, pin: bool, count: bool = True) -> Optional[str]:
+        with self._lock:
+            self._load()
+            if name not in self._entries:
+                self.misses += count
+                return None
+            self._entries.move_to_end(name)
+            self.hits += count
+            if pin:
+                self._pins[name] = self._pins.get(name, 0) + 1
+        return self.path(name)
+
+    def release(self, name: str):
+        with self._lock:
+            count = self._pins.pop(name, 0) - 1
+            if count > 0:
+                self._pins[name] = count
+            self._evict(keep=None)
+
+    def put(self, name: str, data: bytes) -> str:
+        final_path = self.path(name)
+        tmp_path = f"{final_path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            self._load()
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, final_path)
+
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict(keep=name)
+        return final_path
+
+    def _evict(self, keep: Optional[str]):
+        # Oldest first, leaving the entry just written and anything still being served
+        if self.total_bytes <= self.max_bytes:
+            return
+        for victim in list(self._entries):
+            if victim == keep or victim in self._pins:
+                continue
+            self.total_bytes -= self._entries.pop(victim)
+            try:
+                os.remove(self.path(victim))
+            except FileNotFoundError:
+                pass
+            if self.total_bytes <= self.max_bytes:
+                break
+
+def parse_derivative_params(w: Optional[int], h: Optional[int], fmt: str, q: int) -> Tuple[int, int, str, int]:
+    """
+    Clamps and validates query params; raises ValueError for unsupported formats.
+    """
+    fmt = fmt.lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(sorted(FORMATS))}")
+    if fmt in ("webp", "avif") and not features.check(fmt):
+        raise ValueError(f"Format '{fmt}' is not available on this server")
+    w = max(0, min(int(w or 0), MAX_DIMENSION))
+    h = max(0, min(int(h or 0), MAX_DIMENSION))
+    q = max(1, min(int(q), 100))
+    return w, h, "jpeg" if fmt == "jpg" else fmt, q
+
+def render_derivative(source_path: str, w: int, h: int, fmt: str, q: int) -> bytes:
+    """
+    Decodes at reduced size where the codec allows it (JPEG draft, integer reduce),
+    then resamples to fit inside w x h (0 = unconstrained) and encodes.
+    """
+    with Image.open(source_path) as image:
+        src_w, src_h = image.size
+        target_w = w or src_w
+        target_h = h or src_h
+        ratio = min(target_w / src_w, target_h / src_h, 1.0)
+        size = (max(1, round(src_w * ratio)), max(1, round(src_h * ratio)))
+
+        # JPEG can decode directly at 1/2, 1/4 or 1/8 scale
+        image.draft("RGB", size)
+        image.load()
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+
+        factor = min(image.width // size[0], image.height // size[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+        if image.size != size:
+            image = image.resize(size, Image.Resampling.LANCZOS)
+
+        pil_format = FORMATS[fmt][0]
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        buffer = io.BytesIO()
+        options = {"optimize": True} if pil_format == "PNG" else {"quality": q}
+        image.save(buffer, pil_format, **options)
+        return buffer.getvalue()
+
+class DerivativeService:
+    """
+    Produces resized/transcoded derivatives of stored assets, cached on disk.
+    Concurrent requests for the same derivative share a single render.
+    """
+
+    def __init__(self, cache: Optional[DiskLRUCache] = None):
+        self.cache = cache or DiskLRUCache(DERIVATIVE_DIR)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def cache_name(source_key: str, w: int, h: int, fmt: str, q: int) -> str:
+        return f"{source_key}_{w}x{h}_q{q}{FORMATS[fmt][2]}"
+
+    async def get(self, source_key: str, source_path: str, w: int, h: int, fmt: str, q: int) -> str:
+        """
+        Path of the cached derivative, pinned in the cache until `release(path)`.
+        """
+        name = self.cache_name(source_key, w, h, fmt, q)
+        first = True
+        while True:
+            path = self.cache.acquire(name, count=first)
+            if path is not None:
+                return path
+            first = False
+            pending = self._inflight.get(name)
+            if pending is not None:
+                # Rendered by another request; then pin it like a cache hit (or render again if it's gone already)
+                await asyncio.shield(pending)
+            else:
+                await self._render(name, source_path, w, h, fmt, q)
+
+    async def _render(self, name: str, source_path: str, w: int, h: int, fmt: str, q: int):
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[name] = future
+        try:
+            with timed("derive"):
+                data = await asyncio.to_thread(render_derivative, source_path, w, h, fmt, q)
+            future.set_result(await asyncio.to_thread(self.cache.put, name, data))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure isn't reported as "never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._inflight[name]
+
+    def release(self, path: str):
+        self.cache.release(os.path.basename(path))
+
+derivative_service = DerivativeService()
@@ -0,0 +1,193 @@
+import io
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.services.compositor import Compositor, compositor as default_compositor
+from app.utils.metrics import timed
+
+MAX_EXPORT_BYTES = 500 * 1024  # retail media upload limit
+MIN_QUALITY = 50
+MAX_QUALITY = 95
+MIN_SCALE = 0.25
+HIGH_QUALITY = 85  # 4:4:4 at or above this is kept without trying 4:2:0
+
+FORMATS = {
+    # fmt -> (Pillow format, mime, extension)
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "png": ("PNG", "image/png", ".png"),
+}
+
+# JPEG chroma subsampling, best first: 4:4:4 keeps sharp coloured text edges, 4:2:0 is smaller
+SUBSAMPLING = {"jpeg": [0, 2], "webp": [None]}
+
+@dataclass
+class ExportResult:
+    data: bytes
+    format: str
+    quality: Optional[int]
+    subsampling: Optional[int]
+    scale: float
+    width: int
+    height: int
+    attempts: int
+
+    @property
+    def mime(self) -> str:
+        return FORMATS[self.format][1]
+
+    @property
+    def extension(self) -> str:
+        return FORMATS[self.format][2]
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def subsampling_label(self) -> Optional[str]:
+        return {0: "4:4:4", 1: "4:2:2", 2: "4:2:0"}.get(self.subsampling)
+
+def encode(image: Image.Image, fmt: str, quality: Optional[int] = None, subsampling: Optional[int] = None) -> bytes:
+    """
+    Encodes into an in-memory buffer.
+    """
+    pil_format = FORMATS[fmt][0]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = _flatten(image)
+
+    options: Dict[str, Any] = {}
+    if pil_format == "PNG":
+        options["optimize"] = True
+    else:
+        options["quality"] = quality
+    if subsampling is not None:
+        options["subsampling"] = subsampling
+
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+def _flatten(image: Image.Image) -> Image.Image:
+    # JPEG has no alpha: composite onto white like the canvas export does
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        background.alpha_composite(image)
+        image = background
+    return image.convert("RGB")
+
+class BudgetEncoder:
+    """
+    Finds the highest-quality encoding of one composited image that fits in `max_bytes`.
+
+    Quality is binary-searched per subsampling mode (encoded size is monotonic in quality),
+    and the image is only scaled down once the lowest acceptable quality still doesn't fit.
+    """
+
+    def __init__(self, max_bytes: int = MAX_EXPORT_BYTES, min_quality: int = MIN_QUALITY,
+                 max_quality: int = MAX_QUALITY, min_scale: float = MIN_SCALE,
+                 encoder: Callable[..., bytes] = encode):
+        self.max_bytes = max_bytes
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.min_scale = min_scale
+        self.encoder = encoder
+        self.attempts = 0
+
+    def _encode(self, image: Image.Image, fmt: str, quality: Optional[int], subsampling: Optional[int]) -> bytes:
+        self.attempts += 1
+        return self.encoder(image, fmt, quality, subsampling)
+
+    def _search_quality(self, image: Image.Image, fmt: str, subsampling: Optional[int],
+                        low: int) -> Tuple[Optional[int], Optional[bytes], int]:
+        """
+        Highest quality in [low, max_quality] that fits, with its bytes; (None, None, size at `low`) if none does.
+        """
+        # Flat, graphic creatives often fit at full quality: one encode instead of a search
+        data = self._encode(image, fmt, self.max_quality, subsampling)
+        if len(data) <= self.max_bytes:
+            return self.max_quality, data, 0
+
+        best: Tuple[Optional[int], Optional[bytes]] = (None, None)
+        smallest = len(data)
+        lo, hi = low, self.max_quality - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            data = self._encode(image, fmt, mid, subsampling)
+            if len(data) <= self.max_bytes:
+                best = (mid, data)
+                lo = mid + 1
+            else:
+                smallest = len(data)
+                hi = mid - 1
+        return best[0], best[1], smallest
+
+    def _fit_lossy(self, image: Image.Image, fmt: str) -> Tuple[Optional[Tuple[int, Optional[int], bytes]], int]:
+        best = None
+        smallest_miss = 0
+        for subsampling in SUBSAMPLING[fmt]:
+            # A later (lower-fidelity) subsampling mode has to beat the quality already found
+            low = self.min_quality if best is None else best[0] + 1
+            if low > self.max_quality:
+                break
+            quality, data, miss = self._search_quality(image, fmt, subsampling, low)
+            if quality is not None:
+                best = (quality, subsampling, data)
+                if quality >= HIGH_QUALITY:
+                    break
+            elif best is None:
+                smallest_miss = miss
+        return best, smallest_miss
+
+    def fit(self, image: Image.Image, fmt: str = "jpeg") -> ExportResult:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(sorted(FORMATS))}")
+        self.attempts = 0
+        if fmt == "png":
+            data = self._encode(image, fmt, None, None)
+            if len(data) <= self.max_bytes:
+                return ExportResult(data, fmt, None, None, 1.0, image.width, image.height, self.attempts)
+            # Lossless doesn't fit; fall back to JPEG as the editor export always has
+            fmt = "jpeg"
+
+        scale = 1.0
+        current = image
+        while True:
+            found, miss = self._fit_lossy(current, fmt)
+
+            if found is not None:
+                quality, subsampling, data = found
+                return ExportResult(data, fmt, quality, subsampling, scale, current.width, current.height, self.attempts)
+
+            if scale <= self.min_scale:
+                raise ValueError(
+                    f"Cannot fit export into {self.max_bytes} bytes (smallest attempt was {miss} bytes)"
+                )
+            # Bytes scale roughly with pixel count; aim a little under the budget
+            ratio = (self.max_bytes / max(miss, 1)) ** 0.5 * 0.95
+            scale = max(self.min_scale, scale * min(ratio, 0.9))
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            current = image.resize(size, Image.Resampling.LANCZOS)
+
+class ExportService:
+    """
+    Server-side export: composites the creative once, then encodes it to fit a byte budget.
+    """
+
+    def __init__(self, compositor: Compositor = default_compositor):
+        self.compositor = compositor
+
+    def export(self, canvas_json: Dict[str, Any], fmt: str = "jpeg", max_bytes: int = MAX_EXPORT_BYTES,
+               multiplier: float = 1.0, width: Optional[int] = None, height: Optional[int] = None) -> ExportResult:
+        fmt = "jpeg" if fmt.lower() == "jpg" else fmt.lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(sorted(FORMATS))}")
+        with timed("render"):
+            image = self.compositor.render(canvas_json, width, height, scale=multiplier)
+        with timed("encode"):
+            return BudgetEncoder(max_bytes=max_bytes).fit(image, fmt)
+
+export_service = ExportService()
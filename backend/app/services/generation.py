@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from app.services.asset_store import AssetRecord, AssetStore, asset_store as default_asset_store
+from app.services.backends import backends, load_module
+from app.utils.metrics import metrics, timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.environ.get("FLUX_MODEL", "black-forest-labs/FLUX.1-dev")
+DEFAULT_PROVIDER = os.environ.get("FLUX_PROVIDER", "wavespeed")
+DEFAULT_SIZE = (1024, 1024)
+MIN_SIZE, MAX_SIZE = 256, 2048  # per side; what the FLUX providers accept
+CACHE_TTL_SECONDS = int(os.environ.get("GENERATION_CACHE_TTL", 24 * 3600))
+CACHE_MAX_BYTES = int(os.environ.get("GENERATION_CACHE_BYTES", 256 * 1024 * 1024))
+CLIENT_POOL_SIZE = int(os.environ.get("HF_CLIENT_POOL_SIZE", 4))
+
+# Imported on the first real generation (or by PRELOAD_BACKENDS), not when the app starts
+hf_backend = backends.register("huggingface_hub", load_module("huggingface_hub"),
+                               "Hugging Face InferenceClient for FLUX generation")
+upstream_errors = metrics.counter("upstream_errors_total", "Failed calls to upstream AI providers", ("generator",))
+
+@dataclass(frozen=True)
+class GenerationRequest:
+    prompt: str
+    model: str = DEFAULT_MODEL
+    provider: str = DEFAULT_PROVIDER
+    width: int = DEFAULT_SIZE[0]
+    height: int = DEFAULT_SIZE[1]
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        # Checked here so every entry point (form, job, preload) refuses sizes upstream would reject or choke on
+        for side in (self.width, self.height):
+            if isinstance(side, bool) or not isinstance(side, int) or not MIN_SIZE <= side <= MAX_SIZE:
+                raise ValueError(f"width and height must be integers between {MIN_SIZE} and {MAX_SIZE}")
+
+    @property
+    def normalized_prompt(self) -> str:
+        return re.sub(r"\s+", " ", self.prompt).strip().casefold()
+
+    @property
+    def cache_key(self) -> str:
+        raw = "\x1f".join([
+            self.normalized_prompt, self.model, self.provider, f"{self.width}x{self.height}", str(self.seed),
+        ])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+# --- Upstream generators ---
+
+class ImageGenerator:
+    """
+    Upstream text-to-image backend. Implementations are called from a worker thread.
+    """
+    name = "base"
+
+    def generate(self, request: GenerationRequest) -> Image.Image:
+        raise NotImplementedError
+
+class HuggingFaceGenerator(ImageGenerator):
+    """
+    FLUX via the Hugging Face InferenceClient, reusing clients from a fixed-size pool.
+    """
+    name = "huggingface"
+
+    def __init__(self, pool_size: int = CLIENT_POOL_SIZE):
+        self.pool_size = pool_size
+        self._pools: Dict[Tuple[str, str], "queue.Queue"] = {}
+        self._created: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, provider: str, token: str):
+        key = (provider, token)
+        hub = hf_backend.get()
+        with self._lock:
+            pool = self._pools.setdefault(key, queue.Queue())
+            if pool.empty() and self._created.get(key, 0) < self.pool_size:
+                self._created[key] = self._created.get(key, 0) + 1
+                return pool, hub.InferenceClient(provider=provider, api_key=token)
+        return pool, pool.get()
+
+    def generate(self, request: GenerationRequest) -> Image.Image:
+        hf_token = os.environ.get("HF_TOKEN")
+        if not hf_token:
+            raise ValueError("HF_TOKEN not found in environment variables")
+
+        pool, client = self._acquire(request.provider, hf_token)
+        try:
+            return client.text_to_image(
+                request.prompt, model=request.model, width=request.width, height=request.height, seed=request.seed,
+            )
+        finally:
+            pool.put(client)
+
+class StubGenerator(ImageGenerator):
+    """
+    Deterministic local stand-in for tests and benchmarks: a gradient derived from the prompt.
+    """
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, request: GenerationRequest) -> Image.Image:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.sha256(f"{request.normalized_prompt}:{request.seed}".encode()).digest()
+        top, bottom = digest[:3], digest[3:6]
+        image = Image.linear_gradient("L").resize((request.width, request.height))
+        image = Image.merge("RGB", [
+            image.point(lambda v, a=a, b=b: a + (b - a) * v // 255) for a, b in zip(top, bottom)
+        ])
+        ImageDraw.Draw(image).text((16, 16), request.prompt[:60], fill=(255, 255, 255))
+        return image
+
+def get_generator(name: Optional[str] = None) -> ImageGenerator:
+    name = (name or os.environ.get("IMAGE_GENERATOR", "huggingface")).lower()
+    if name == "stub":
+        return StubGenerator()
+    return HuggingFaceGenerator()
+
+# --- Cache & coalescing ---
+
+class GenerationCache:
+    """
+    Maps request keys to stored images, with a TTL and LRU eviction by total bytes.
+    Blobs live in the content-addressed asset store; eviction only forgets the mapping.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_bytes: int = CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[AssetRecord, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[AssetRecord]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, record: AssetRecord):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (record, time.monotonic())
+            self.total_bytes += record.size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        record, _ = self._entries.pop(key)
+        self.total_bytes -= record.size
+
+class GenerationService:
+    """
+    Front door for background generation: cached by normalised request, with identical
+    in-flight requests coalesced into a single upstream call.
+    """
+
+    def __init__(self, generator: Optional[ImageGenerator] = None, store: AssetStore = default_asset_store,
+                 cache: Optional[GenerationCache] = None):
+        self.generator = generator or get_generator()
+        self.store = store
+        self.cache = cache or GenerationCache()
+        self.upstream_calls = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def generate(self, request: GenerationRequest, use_cache: bool = True) -> AssetRecord:
+        key = request.cache_key
+        if use_cache:
+            record = self.cache.get(key)
+            if record is not None:
+                return record
+            pending = self._inflight.get(key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        if use_cache:
+            self._inflight[key] = future
+        try:
+            self.upstream_calls += 1
+            try:
+                with timed("generate"):
+                    image = await asyncio.to_thread(self.generator.generate, request)
+            except Exception as e:
+                upstream_errors.inc(self.generator.name)
+                logger.warning("%s generation failed (%s, %dx%d): %s", self.generator.name, request.model,
+                               request.width, request.height, e)
+                raise
+            record = await asyncio.to_thread(self._store_image, image, key)
+            self.cache.put(key, record)
+            future.set_result(record)
+            return record
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _store_image(self, image: Image.Image, key: str) -> AssetRecord:
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        return self.store.save_bytes(buffer.getvalue(), f"ai_gen_{key[:12]}.png", "image/png")
+
+generation_service = GenerationService()
@@ -0,0 +1,307 @@
+import heapq
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fabric's default line height, used when a text object carries no height
+LINE_HEIGHT = 1.16
+BACKGROUND_COVERAGE = 0.95
+
+@dataclass(frozen=True)
+class Zone:
+    rule_id: str
+    label: str
+    box: Tuple[float, float, float, float]  # x0, y0, x1, y1
+
+# Per-format keep-out zones in pixels; (top, bottom) bands reserved for platform UI
+ZONE_BANDS = {
+    "1080x1920": (200, 250),
+}
+# Formats at least this tall (height / width) without an entry get the story bands scaled
+STORY_ASPECT = 1.7
+
+@dataclass(slots=True)
+class Box:
+    """
+    An object's footprint: its four transformed corners and their axis-aligned bounds.
+    """
+    id: str
+    kind: str
+    corners: np.ndarray  # (4, 2)
+    bounds: Tuple[float, float, float, float]
+    rotated: bool
+
+    @property
+    def area(self) -> float:
+        return polygon_area(self.corners)
+
+@dataclass
+class Overlap:
+    a: str
+    b: str
+    area: float
+
+def transformed_corners(left: np.ndarray, top: np.ndarray, width: np.ndarray, height: np.ndarray,
+                        angle: np.ndarray, origin_x: np.ndarray, origin_y: np.ndarray) -> np.ndarray:
+    """
+    (n, 4, 2) canvas coordinates of n objects' corners (clockwise from top-left), given
+    their scaled sizes, origins as fractions of that size and rotation in degrees.
+    """
+    theta = np.radians(angle)
+    cos_t, sin_t = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    dx = np.array([0.0, 1.0, 1.0, 0.0]) * width[:, None] - (origin_x * width)[:, None]
+    dy = np.array([0.0, 0.0, 1.0, 1.0]) * height[:, None] - (origin_y * height)[:, None]
+    return np.stack([left[:, None] + dx * cos_t - dy * sin_t, top[:, None] + dx * sin_t + dy * cos_t], axis=2)
+
+def corner_boxes(ids: Sequence[str], kinds: Sequence[str], corners: np.ndarray, angle: np.ndarray) -> List[Box]:
+    """
+    Boxes for n objects from their (n, 4, 2) corners, with bounds computed in one pass.
+    """
+    lows, highs = corners.min(axis=1).tolist(), corners.max(axis=1).tolist()
+    rotated = (angle % 90 != 0).tolist()
+    return [Box(id, kind, corners[i], (low[0], low[1], high[0], high[1]), rotated[i])
+            for i, (id, kind, low, high) in enumerate(zip(ids, kinds, lows, highs))]
+
+# --- Polygon helpers (convex, clockwise or anticlockwise) ---
+
+def polygon_area(points: np.ndarray) -> float:
+    x, y = points[:, 0], points[:, 1]
+    return float(abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2)
+
+def _clip(subject: List[Tuple[float, float]], a: Tuple[float, float], b: Tuple[float, float],
+          sign: float) -> List[Tuple[float, float]]:
+    # One Sutherland-Hodgman step: keep the part of `subject` on the inner side of edge a->b
+    def side(p):
+        return sign * ((b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0]))
+
+    output = []
+    for i, current in enumerate(subject):
+        previous = subject[i - 1]
+        s_cur, s_prev = side(current), side(previous)
+        if s_cur >= 0:
+            if s_prev < 0:
+                output.append(_intersect(previous, current, s_prev, s_cur))
+            output.append(current)
+        elif s_prev >= 0:
+            output.append(_intersect(previous, current, s_prev, s_cur))
+    return output
+
+def _intersect(p, q, sp, sq):
+    t = sp / (sp - sq)
+    return p[0] + (q[0] - p[0]) * t, p[1] + (q[1] - p[1]) * t
+
+def intersection_area(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Area shared by two convex quadrilaterals.
+    """
+    x, y = a[:, 0], a[:, 1]
+    sign = 1.0 if np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)) >= 0 else -1.0
+    clipped = [tuple(p) for p in b.tolist()]
+    for i in range(len(a)):
+        if not clipped:
+            return 0.0
+        clipped = _clip(clipped, tuple(a[i]), tuple(a[(i + 1) % len(a)]), sign)
+    return polygon_area(np.array(clipped)) if len(clipped) >= 3 else 0.0
+
+def _bounds_area(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> float:
+    return max(0.0, min(a[2], b[2]) - max(a[0], b[0])) * max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+
+def box_overlap_area(a: Box, b: Box) -> float:
+    if not (a.rotated or b.rotated):
+        return _bounds_area(a.bounds, b.bounds)
+    return intersection_area(a.corners, b.corners)
+
+# --- Sweep line ---
+
+class _IntervalIndex:
+    """
+    Active y-intervals for the sweep, over coordinates known up front (ranks into `ys`).
+    A box overlaps a query [y0, y1) if it covers y0, or if it starts strictly inside
+    (y0, y1); these two cases are disjoint and cover every overlap, so each is answered
+    by its own segment tree and nothing is reported twice:
+
+    - covering: each interval [a, b) sits in the O(log n) canonical nodes of the range,
+      and a point query collects the sets on one leaf-to-root path;
+    - starting: each interval sits in the leaf of its start, with per-node counts so a
+      range report only descends into subtrees that hold something.
+
+    Insert, remove and a query reporting h intervals all cost O(log n + h log n).
+    """
+
+    def __init__(self, ys: Sequence[float]):
+        self.size = 1
+        while self.size < max(len(ys), 1):
+            self.size *= 2
+        self.covering: List[Optional[set]] = [None] * (2 * self.size)
+        self.starts: List[Optional[set]] = [None] * self.size
+        self.counts = [0] * (2 * self.size)
+
+    def _canonical(self, a: int, b: int):
+        lo, hi = a + self.size, b + self.size
+        while lo < hi:
+            if lo & 1:
+                yield lo
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                yield hi
+            lo >>= 1
+            hi >>= 1
+
+    def add(self, item: int, a: int, b: int):
+        for node in self._canonical(a, b):
+            if self.covering[node] is None:
+                self.covering[node] = set()
+            self.covering[node].add(item)
+        if self.starts[a] is None:
+            self.starts[a] = set()
+        self.starts[a].add(item)
+        node = a + self.size
+        while node:
+            self.counts[node] += 1
+            node >>= 1
+
+    def remove(self, item: int, a: int, b: int):
+        for node in self._canonical(a, b):
+            self.covering[node].discard(item)
+        self.starts[a].discard(item)
+        node = a + self.size
+        while node:
+            self.counts[node] -= 1
+            node >>= 1
+
+    def overlapping(self, a: int, b: int) -> List[int]:
+        found = []
+        node = a + self.size
+        while node:
+            if self.covering[node]:
+                found.extend(self.covering[node])
+            node >>= 1
+        stack = [node for node in self._canonical(a + 1, b) if self.counts[node]]
+        while stack:
+            node = stack.pop()
+            if node >= self.size:
+                found.extend(self.starts[node - self.size])
+            else:
+                stack += [child for child in (2 * node, 2 * node + 1) if self.counts[child]]
+        return found
+
+def candidate_pairs(bounds: Sequence[Tuple[float, float, float, float]]) -> List[Tuple[int, int]]:
+    """
+    Index pairs whose axis-aligned bounds intersect (touching edges don't count).
+
+    Sweeps left to right over x0; boxes whose x1 has passed leave the active set via a
+    heap, and the active set is an interval index over y, so each box only looks at the
+    active boxes overlapping it vertically. O((n + k) log n) for k reported pairs,
+    however the boxes are arranged.
+    """
+    ys = sorted({y for b in bounds for y in (b[1], b[3])})
+    rank = {y: r for r, y in enumerate(ys)}
+    spans = [(rank[b[1]], rank[b[3]]) for b in bounds]
+    order = sorted(range(len(bounds)), key=lambda i: bounds[i][0])
+    expiry: List[Tuple[float, int]] = []  # (x1, index)
+    active = _IntervalIndex(ys)
+    pairs = []
+    for i in order:
+        x0, y0, x1, y1 = bounds[i]
+        while expiry and expiry[0][0] <= x0:
+            _, gone = heapq.heappop(expiry)
+            active.remove(gone, *spans[gone])
+        for j in active.overlapping(*spans[i]):
+            # Exact test: the sweep and the index alone would also admit zero-width or
+            # zero-height boxes that only touch
+            bj = bounds[j]
+            if bj[1] < y1 and bj[3] > y0 and bj[0] < x1 and bj[2] > x0:
+                pairs.append((j, i) if j < i else (i, j))
+        heapq.heappush(expiry, (x1, i))
+        active.add(i, *spans[i])
+    return pairs
+
+def find_overlaps(boxes: Sequence[Box], min_area: float = 1.0,
+                  keep: Optional[Callable[[Box, Box], bool]] = None) -> List[Overlap]:
+    """
+    Every pair of boxes sharing at least `min_area` square pixels, using their real
+    (possibly rotated) outlines, in box order. `keep` filters candidate pairs before any
+    area is computed.
+    """
+    overlaps = []
+    # Canvas order (first element, then second) regardless of sweep order, as live sessions report them
+    for i, j in sorted(candidate_pairs([b.bounds for b in boxes])):
+        if keep is not None and not keep(boxes[i], boxes[j]):
+            continue
+        area = box_overlap_area(boxes[i], boxes[j])
+        if area >= min_area:
+            overlaps.append(Overlap(boxes[i].id, boxes[j].id, round(area, 1)))
+    return overlaps
+
+# --- Zones ---
+
+def format_zones(width: int, height: int) -> List[Zone]:
+    """
+    Keep-out zones for a canvas size: an exact ZONE_BANDS entry, or scaled story bands
+    for other tall formats. Square and landscape formats have none.
+    """
+    bands = ZONE_BANDS.get(f"{width}x{height}")
+    if bands is None and height / max(width, 1) >= STORY_ASPECT:
+        reference = ZONE_BANDS["1080x1920"]
+        bands = tuple(round(v * height / 1920) for v in reference)
+    if not bands:
+        return []
+    top, bottom = bands
+    return [
+        Zone("SAFE_ZONE_TOP", f"top safe zone ({top}px)", (0, 0, width, top)),
+        Zone("SAFE_ZONE_BOTTOM", f"bottom safe zone ({bottom}px)", (0, height - bottom, width, height)),
+    ]
+
+def safe_band(width: int, height: int) -> Tuple[int, int]:
+    """
+    (top, bottom) band heights for the format, (0, 0) when it has none.
+    """
+    zones = {z.rule_id: z for z in format_zones(width, height)}
+    if not zones:
+        return 0, 0
+    top = zones["SAFE_ZONE_TOP"].box
+    bottom = zones["SAFE_ZONE_BOTTOM"].box
+    return int(top[3] - top[1]), int(bottom[3] - bottom[1])
+
+def zone_intrusions(boxes: Sequence[Box], zones: Sequence[Zone]) -> List[Tuple[Box, Zone, float]]:
+    """
+    (box, zone, area) for every box reaching into a zone, from the same sweep as overlaps.
+    """
+    if not zones:
+        return []
+    bounds = [b.bounds for b in boxes] + [z.box for z in zones]
+    n = len(boxes)
+    hits = []
+    for i, j in candidate_pairs(bounds):
+        if i < n <= j:
+            box, zone = boxes[i], zones[j - n]
+            corners = np.array([[zone.box[0], zone.box[1]], [zone.box[2], zone.box[1]],
+                                [zone.box[2], zone.box[3]], [zone.box[0], zone.box[3]]])
+            area = intersection_area(box.corners, corners) if box.rotated else _bounds_area(box.bounds, zone.box)
+            if area > 0:
+                hits.append((i, j, box, zone, area))
+    # Report in object order, then zone order, regardless of sweep order
+    return [(box, zone, area) for _, _, box, zone, area in sorted(hits, key=lambda h: (h[0], h[1]))]
+
+def outside_area(box: Box, region: Tuple[float, float, float, float]) -> float:
+    """
+    How much of the box lies outside `region` (e.g. the margin-inset content area).
+    """
+    x0, y0, x1, y1 = region
+    inner = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+    inside = intersection_area(box.corners, inner) if box.rotated else _bounds_area(box.bounds, region)
+    return max(0.0, box.area - inside)
+
+def is_background(box: Box, width: float, height: float) -> bool:
+    x0, y0, x1, y1 = box.bounds
+    return (min(x1, width) - max(x0, 0)) >= width * BACKGROUND_COVERAGE and \
+        (min(y1, height) - max(y0, 0)) >= height * BACKGROUND_COVERAGE
+
+def rect_box(element_id: str, x: float, y: float, width: float, height: float, kind: str = "text") -> Box:
+    """
+    Box for an unrotated layer given as x/y/width/height (e.g. a TextLayer).
+    """
+    corners = np.array([[x, y], [x + width, y], [x + width, y + height], [x, y + height]], dtype=np.float64)
+    return Box(element_id, kind, corners, (x, y, x + width, y + height), False)
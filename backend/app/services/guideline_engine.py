@@ -1,109 +1,137 @@
-from app.models.creative import Creative, GuidelineViolation, GuidelineSeverity, ComplianceReport, AssetRole, CreativeFormat
-import re
+from typing import List, Optional
+
+from app.models.creative import (
+    Asset, Creative, GuidelineViolation, GuidelineSeverity, ComplianceReport, AssetRole, CreativeFormat, TextLayer,
+)
+from app.services.rule_engine import CopyRule, CopyRuleEngine
+from app.services.rule_packs import CompiledRulePack, RulePackRegistry, rule_pack_registry
+from app.services.geometry import format_zones, rect_box, zone_intrusions
+from app.services.resize_engine import format_size
 
 class GuidelineEngine:
-    def __init__(self):
-        self.forbidden_claims = [
-            r"survey", r"\*", r"guarantee", r"green", r"sustainable", r"eco-friendly", r"charity"
-        ]
-        self.allowed_tags = [
-            "Only at Tesco",
-            "Available at Tesco",
-            "Selected stores. While stocks last."
-        ]
-        self.alcohol_keywords = ["wine", "beer", "spirit", "vodka", "whisky", "gin", "alcohol"]
+    """
+    Retailer guideline checks driven by a rule pack (see rule_packs.py). The pack is
+    looked up per call, so edits to the pack file apply without a restart.
+    """
+
+    def __init__(self, rule_pack: Optional[str] = None, registry: RulePackRegistry = rule_pack_registry):
+        self.rule_pack = rule_pack
+        self.registry = registry
+
+    def rules(self, rule_pack: Optional[str] = None) -> CompiledRulePack:
+        return self.registry.get(rule_pack or self.rule_pack)
+
+    # Read-only views of the current pack
+    @property
+    def forbidden_claims(self) -> List[str]:
+        return self.rules().forbidden_claims
+
+    @property
+    def allowed_tags(self) -> List[str]:
+        return self.rules().allowed_tags
+
+    @property
+    def alcohol_keywords(self) -> List[str]:
+        return self.rules().alcohol_keywords
+
+    @property
+    def copy_engine(self) -> CopyRuleEngine:
+        return self.rules().copy_engine
+
+    def validate(self, creative: Creative, rule_pack: Optional[str] = None) -> ComplianceReport:
+        rules = self.rules(rule_pack)
 
-    def validate(self, creative: Creative) -> ComplianceReport:
-        violations = []
-        
         # 1. Alcohol Rules (Appendix B)
-        if self._is_alcohol_product(creative):
-            if not self._has_drinkaware(creative):
-                violations.append(GuidelineViolation(
-                    rule_id="ALCOHOL_DRINKAWARE",
-                    message="Alcohol products must include the Drinkaware lock-up.",
-                    severity=GuidelineSeverity.ERROR,
-                    suggestion="Add the Drinkaware asset to the creative."
-                ))
-
-        # 2. Copy Restrictions
+        violations = self.check_assets(creative.assets, rules)
+
+        # 2. Copy Restrictions & Price Callouts (single pass per layer)
         for layer in creative.text_layers:
-            for claim in self.forbidden_claims:
-                if re.search(claim, layer.text, re.IGNORECASE):
-                    violations.append(GuidelineViolation(
-                        rule_id="COPY_RESTRICTION",
-                        message=f"Forbidden claim detected: '{claim}'",
-                        severity=GuidelineSeverity.ERROR,
-                        element_id=layer.id,
-                        suggestion="Remove restricted claims (sustainability, guarantees, surveys)."
-                    ))
-            
-            # Price Callouts
-            if re.search(r"£|\d+p|%", layer.text):
-                 violations.append(GuidelineViolation(
-                    rule_id="PRICE_CALLOUT",
-                    message="Price callouts are not allowed in this format.",
-                    severity=GuidelineSeverity.ERROR,
-                    element_id=layer.id
-                ))
+            violations.extend(self.check_copy(layer, rules))
 
         # 3. Tesco Tag Rules (Appendix A)
         for layer in creative.text_layers:
-            if layer.role == "tag":
-                if layer.text not in self.allowed_tags:
-                     violations.append(GuidelineViolation(
-                        rule_id="TAG_TEXT",
-                        message=f"Invalid tag text: '{layer.text}'",
-                        severity=GuidelineSeverity.ERROR,
-                        element_id=layer.id,
-                        suggestion=f"Use one of: {', '.join(self.allowed_tags)}"
-                    ))
-
-        # 4. Safe Zones (Stories)
-        if creative.format == CreativeFormat.STORY:
-            violations.extend(self._check_safe_zones(creative))
-
-        score = max(0, 100 - (len(violations) * 20))
+            violations.extend(self.check_tag(layer, rules))
+
+        # 4. Safe Zones (per-format; only tall formats define any)
+        violations.extend(self._check_safe_zones(creative))
+
+        score = max(0, 100 - (len(violations) * rules.violation_penalty))
         return ComplianceReport(
             score=score,
             violations=violations,
             is_compliant=len([v for v in violations if v.severity == GuidelineSeverity.ERROR]) == 0
         )
 
-    def _is_alcohol_product(self, creative: Creative) -> bool:
-        # heuristic check based on asset names or metadata
-        for asset in creative.assets:
-            if asset.role == AssetRole.PACKSHOT:
-                for keyword in self.alcohol_keywords:
-                    if keyword in asset.name.lower():
-                        return True
-        return False
+    def check_assets(self, assets: List[Asset], rules: CompiledRulePack) -> List[GuidelineViolation]:
+        """
+        Rules over the creative's assets as a whole (alcohol packshots need the Drinkaware lock-up).
+        """
+        if self._is_alcohol_product(assets, rules) and not self._has_drinkaware(assets, rules):
+            return [GuidelineViolation(
+                rule_id="ALCOHOL_DRINKAWARE",
+                message="Alcohol products must include the Drinkaware lock-up.",
+                severity=GuidelineSeverity.ERROR,
+                suggestion="Add the Drinkaware asset to the creative."
+            )]
+        return []
+
+    def check_copy(self, layer: TextLayer, rules: CompiledRulePack) -> List[GuidelineViolation]:
+        return [self._copy_violation(hit.rule, layer.id, rules) for hit in rules.copy_engine.scan(layer.text)]
+
+    def check_tag(self, layer: TextLayer, rules: CompiledRulePack) -> List[GuidelineViolation]:
+        if layer.role == "tag" and layer.text not in rules.allowed_tag_set:
+            return [GuidelineViolation(
+                rule_id="TAG_TEXT",
+                message=f"Invalid tag text: '{layer.text}'",
+                severity=GuidelineSeverity.ERROR,
+                element_id=layer.id,
+                suggestion=f"Use one of: {', '.join(rules.allowed_tags)}"
+            )]
+        return []
+
+    def check_layer(self, layer: TextLayer, rules: CompiledRulePack) -> List[GuidelineViolation]:
+        """
+        The copy and tag rules for one text layer; these depend on nothing else in the creative.
+        """
+        return self.check_copy(layer, rules) + self.check_tag(layer, rules)
+
+    def _copy_violation(self, rule: CopyRule, element_id: str, rules: CompiledRulePack) -> GuidelineViolation:
+        if rule.rule_id == "PRICE_CALLOUT":
+            return GuidelineViolation(
+                rule_id="PRICE_CALLOUT",
+                message="Price callouts are not allowed in this format.",
+                severity=GuidelineSeverity.ERROR,
+                element_id=element_id
+            )
+        return GuidelineViolation(
+            rule_id="COPY_RESTRICTION",
+            message=f"Forbidden claim detected: '{rule.label}'",
+            severity=GuidelineSeverity.ERROR,
+            element_id=element_id,
+            suggestion=rules.forbidden_suggestion
+        )
 
-    def _has_drinkaware(self, creative: Creative) -> bool:
-        for asset in creative.assets:
-            if "drinkaware" in asset.name.lower():
+    def _is_alcohol_product(self, assets: List[Asset], rules: CompiledRulePack) -> bool:
+        # heuristic check based on asset names or metadata
+        for asset in assets:
+            if asset.role == AssetRole.PACKSHOT and rules.alcohol_matcher.search(asset.name):
                 return True
         return False
 
+    def _has_drinkaware(self, assets: List[Asset], rules: CompiledRulePack) -> bool:
+        return any(rules.required_asset_matcher.search(asset.name) for asset in assets)
+
     def _check_safe_zones(self, creative: Creative) -> list[GuidelineViolation]:
-        violations = []
-        safe_top = 200
-        safe_bottom = 1920 - 250
-        
-        for layer in creative.text_layers:
-            # Simple bounding box check
-            if layer.y < safe_top:
-                violations.append(GuidelineViolation(
-                    rule_id="SAFE_ZONE_TOP",
-                    message="Element overlaps with top safe zone (200px).",
-                    severity=GuidelineSeverity.ERROR,
-                    element_id=layer.id
-                ))
-            if layer.y + layer.height > safe_bottom:
-                 violations.append(GuidelineViolation(
-                    rule_id="SAFE_ZONE_BOTTOM",
-                    message="Element overlaps with bottom safe zone (250px).",
-                    severity=GuidelineSeverity.ERROR,
-                    element_id=layer.id
-                ))
-        return violations
+        width, height = format_size(creative.format)
+        boxes = [rect_box(layer.id, layer.x, layer.y, layer.width, layer.height) for layer in creative.text_layers]
+        return [
+            GuidelineViolation(
+                rule_id=zone.rule_id,
+                message=f"Element overlaps with {zone.label}.",
+                severity=GuidelineSeverity.ERROR,
+                element_id=box.id
+            )
+            for box, zone, _ in zone_intrusions(boxes, format_zones(width, height))
+        ]
+
+guideline_engine = GuidelineEngine()
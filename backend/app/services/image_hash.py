@@ -0,0 +1,226 @@
+import threading
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 = 64-bit hashes
+PHASH_SIZE = 32  # pHash takes the low frequencies of a 32x32 DCT
+SAMPLE_SIZE = 64  # everything is shrunk to this first, so hashing cost barely depends on the source size
+
+# Index lookup cost in rows of a full NumPy scan: a fixed part, plus this much per row a probe reads
+LOOKUP_OVERHEAD_ROWS = 32_000
+PROBED_ROW_COST = 40
+
+def _dct_matrix(n: int) -> np.ndarray:
+    # Orthonormal DCT-II basis: D @ x is the DCT of x, so D @ X @ D.T is the 2-D DCT
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+DCT = _dct_matrix(PHASH_SIZE)[:HASH_SIZE]  # only the rows for the kept frequencies
+BIT_WEIGHTS = 1 << np.arange(HASH_SIZE * HASH_SIZE - 1, -1, -1, dtype=np.uint64)
+
+def _to_int(bits: np.ndarray) -> np.ndarray:
+    # (..., 8, 8) booleans -> (...) uint64, first bit most significant
+    return (bits.reshape(*bits.shape[:-2], -1).astype(np.uint64) * BIT_WEIGHTS).sum(axis=-1, dtype=np.uint64)
+
+def sample(image: Image.Image) -> Image.Image:
+    """
+    The image as a SAMPLE_SIZE square in grayscale, transparent areas flattened onto
+    white (so a cut-out hashes like the same packshot on a white background).
+    """
+    # JPEGs decode straight to grayscale at 1/2..1/8 scale
+    image.draft("L", (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))
+    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.getbands() else "RGB")
+    # Pillow premultiplies alpha when resizing, so edges don't pick up the colour of transparent pixels
+    small = image.resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BOX, reducing_gap=2.0)
+    if small.mode in ("RGBA", "LA"):
+        white = Image.new("RGBA", small.size, (255, 255, 255, 255))
+        small = Image.alpha_composite(white, small.convert("RGBA"))
+    return small.convert("L")
+
+def phashes(samples: np.ndarray) -> np.ndarray:
+    """
+    pHash of (n, PHASH_SIZE, PHASH_SIZE) grayscale arrays: the 8x8 lowest DCT frequencies,
+    each bit set where the coefficient is above their median (DC term excluded).
+    """
+    low = DCT @ samples @ DCT.T
+    flat = low.reshape(len(low), -1)
+    median = np.median(flat[:, 1:], axis=1)
+    return _to_int(low > median[:, None, None])
+
+def dhashes(samples: np.ndarray) -> np.ndarray:
+    """
+    dHash of (n, HASH_SIZE, HASH_SIZE + 1) grayscale arrays: each bit is whether a pixel
+    is brighter than its left neighbour.
+    """
+    return _to_int(samples[:, :, 1:] > samples[:, :, :-1])
+
+def image_hashes(images: Iterable[Image.Image]) -> List[Tuple[int, int]]:
+    """
+    (pHash, dHash) for each image, computed together as one batch.
+    """
+    grays = [sample(image) for image in images]
+    if not grays:
+        return []
+    p = np.stack([np.asarray(g.resize((PHASH_SIZE, PHASH_SIZE), Image.BOX), dtype=np.float64) for g in grays])
+    d = np.stack([np.asarray(g.resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX), dtype=np.int16) for g in grays])
+    return [(int(a), int(b)) for a, b in zip(phashes(p), dhashes(d))]
+
+def hash_file(path: str) -> Optional[Tuple[str, str]]:
+    """
+    (pHash, dHash) of an image file as 16-digit hex strings, None if it can't be decoded.
+    """
+    try:
+        with Image.open(path) as image:
+            (p, d), = image_hashes([image])
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+        return None
+    return to_hex(p), to_hex(d)
+
+def to_hex(value: int) -> str:
+    return f"{value:016x}"
+
+def distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+if hasattr(np, "bitwise_count"):
+    popcount = np.bitwise_count
+else:  # NumPy < 2.0
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(values: np.ndarray) -> np.ndarray:
+        return _BYTE_BITS[values.view(np.uint8)].reshape(*values.shape, -1).sum(axis=-1)
+
+@lru_cache(maxsize=16)
+def _flip_masks(width: int, radius: int) -> np.ndarray:
+    # Every value within `radius` bits of 0 in a `width`-bit chunk
+    masks = [sum(1 << bit for bit in bits) for r in range(radius + 1) for bits in combinations(range(width), r)]
+    return np.array(masks, dtype=np.uint64)
+
+def _ranges(order: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    # order[lo[0]:hi[0]], order[lo[1]:hi[1]], ... concatenated, without a Python loop
+    lengths = hi - lo
+    keep = lengths > 0
+    lo, lengths = lo[keep], lengths[keep]
+    if not len(lengths):
+        return order[:0]
+    ends = np.cumsum(lengths)
+    offsets = np.arange(ends[-1]) - np.repeat(ends - lengths, lengths)
+    return order[np.repeat(lo, lengths) + offsets]
+
+class HammingIndex:
+    """
+    Multi-index hashing (Norouzi et al.) over 64-bit hashes, in NumPy. Each hash is
+    split into `chunks` substrings. Two hashes within distance r must agree to within
+    r // chunks bits on at least one substring (pigeonhole), so a query looks up every
+    substring value that close in one sorted array of (substring number, value) and
+    checks only the rows it finds. On uniform hashes each probe matches about
+    n / 2^16 rows, so a duplicate check reads a small slice of a library of hundreds
+    of thousands of images. Wide radii probe so many values that a plain scan of all
+    the hashes is cheaper; queries take whichever is expected to touch fewer rows.
+
+    New hashes go to a small unsorted tail that every query scans; it's merged into the
+    sorted array once it reaches `merge_every` rows. Removed rows are masked until a
+    merge finds them to be the majority.
+    """
+
+    def __init__(self, chunks: int = 4, bits: int = 64, merge_every: int = 4096):
+        self.chunks = chunks
+        self.width = bits // chunks
+        self.merge_every = merge_every
+        self._shifts = np.arange(chunks, dtype=np.uint64) * np.uint64(self.width)
+        self._mask = np.uint64((1 << self.width) - 1)
+        self._tags = np.arange(chunks, dtype=np.uint64)[:, None] << np.uint64(self.width)
+        self._rows: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = []
+        self._values = np.zeros(1024, dtype=np.uint64)
+        self._sorted = np.zeros(0, dtype=np.uint64)  # (substring number << width) | substring, ascending
+        self._order = np.zeros(0, dtype=np.int64)  # the row of each entry in _sorted
+        self._merged = 0  # rows [0, _merged) are in the sorted array
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _tagged_parts(self, values: np.ndarray) -> np.ndarray:
+        # (n,) hashes -> (chunks, n) substrings, each tagged with its substring number
+        return ((values[None, :] >> self._shifts[:, None]) & self._mask) | self._tags
+
+    def add(self, key: str, value: int):
+        self.add_many([(key, value)])
+
+    def add_many(self, items: Iterable[Tuple[str, int]]):
+        """
+        Adds or replaces (key, hash) pairs, sorting them in at most once.
+        """
+        with self._lock:
+            for key, value in items:
+                if key in self._rows:
+                    self._keys[self._rows[key]] = None
+                row = len(self._keys)
+                if row == len(self._values):
+                    self._values = np.concatenate([self._values, np.zeros(row, dtype=np.uint64)])
+                self._values[row] = value
+                self._keys.append(key)
+                self._rows[key] = row
+            if len(self._keys) - self._merged >= self.merge_every:
+                self._merge()
+
+    def remove(self, key: str):
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is not None:
+                self._keys[row] = None
+
+    def _merge(self):
+        if len(self._rows) < len(self._keys) // 2:
+            # Mostly removed or replaced rows: drop them while everything is being re-sorted anyway
+            live = np.array([row for row, key in enumerate(self._keys) if key is not None], dtype=np.int64)
+            self._keys = [self._keys[row] for row in live.tolist()]
+            self._values = np.concatenate([self._values[live], np.zeros(max(len(live), 1024), dtype=np.uint64)])
+            self._rows = {key: row for row, key in enumerate(self._keys)}
+        count = len(self._keys)
+        flat = self._tagged_parts(self._values[:count]).ravel()
+        order = np.argsort(flat, kind="stable")
+        self._sorted = flat[order]
+        self._order = order % count
+        self._merged = count
+
+    def get(self, key: str) -> Optional[int]:
+        row = self._rows.get(key)
+        return int(self._values[row]) if row is not None else None
+
+    def query(self, value: int, radius: int, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        (key, distance) of every hash within `radius` bits of `value`, nearest first.
+        """
+        flips = _flip_masks(self.width, radius // self.chunks)
+        target = np.uint64(value)
+        with self._lock:
+            count = len(self._keys)
+            probed_rows = len(flips) * self.chunks * (1 + self._merged / 2 ** self.width)
+            if LOOKUP_OVERHEAD_ROWS + probed_rows * PROBED_ROW_COST >= count:
+                distances = popcount(self._values[:count] ^ target)
+                rows = np.flatnonzero(distances <= radius)
+                distances = distances[rows]
+            else:
+                probed = np.sort((self._tagged_parts(np.array([target])) ^ flips).ravel())
+                found = _ranges(self._order, np.searchsorted(self._sorted, probed, "left"),
+                                np.searchsorted(self._sorted, probed, "right"))
+                rows = np.concatenate([found, np.arange(self._merged, count)])
+                distances = popcount(self._values[rows] ^ target)
+                close = distances <= radius
+                # A row found through several substrings is listed once per substring
+                rows, first = np.unique(rows[close], return_index=True)
+                distances = distances[close][first]
+            keys = self._keys
+            matches = [(keys[row], int(d)) for row, d in zip(rows.tolist(), distances.tolist())
+                       if keys[row] is not None]
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches[:limit] if limit is not None else matches
@@ -1,61 +1,39 @@
-from rembg import remove
-from PIL import Image
-import io
+import asyncio
 import os
+import shutil
+
+# Thin file-path wrappers over the shared services. Nothing heavy is imported here:
+# rembg runs in background_remover's worker pool and the generation SDK loads on first use
+# (see app/services/backends.py).
 
 async def remove_background(input_path: str, output_path: str):
+    # Goes through the shared background remover, so its warm sessions and cut-out cache are reused
+    from app.services.background_removal import background_remover
+
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
-        
+
     with open(input_path, 'rb') as i:
         input_data = i.read()
-        output_data = remove(input_data)
-        
+
+    record = await background_remover.remove(input_data, os.path.basename(input_path))
+
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    with open(output_path, 'wb') as o:
-        o.write(output_data)
 
-from google import generativeai as genai
-import requests
+    await asyncio.to_thread(shutil.copyfile, background_remover.store.path_for(record), output_path)
 
-from huggingface_hub import InferenceClient
+async def generate_background(prompt: str, output_path: str):
+    # Goes through the shared generation service, so repeat prompts hit its cache
+    from app.services.generation import GenerationRequest, generation_service
 
-import asyncio
+    record = await generation_service.generate(GenerationRequest(prompt=prompt))
 
-async def generate_background(prompt: str, output_path: str):
-    try:
-        hf_token = os.environ.get("HF_TOKEN")
-        if not hf_token:
-            raise ValueError("HF_TOKEN not found in environment variables")
-
-        client = InferenceClient(
-            provider="wavespeed",
-            api_key=hf_token,
-        )
-
-        # Run sync call in thread to avoid blocking event loop
-        image = await asyncio.to_thread(
-            client.text_to_image,
-            prompt,
-            model="black-forest-labs/FLUX.1-dev"
-        )
-        
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        image.save(output_path)
-            
-        return output_path
-
-    except Exception as e:
-        print(f"Flux generation failed: {e}")
-        raise e
-
-    except Exception as e:
-        print(f"Flux generation failed: {e}")
-        raise e
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    await asyncio.to_thread(shutil.copyfile, generation_service.store.path_for(record), output_path)
+    return output_path
 
 async def generate_creative():
     pass
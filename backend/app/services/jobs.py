@@ -0,0 +1,404 @@
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+JOB_DB = os.environ.get("JOB_DB", "data/jobs.db")
+JOB_STORE = os.environ.get("JOB_STORE", "sqlite")  # or "memory"
+HEARTBEAT_SECONDS = 15.0
+MAX_LIST = 100
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    priority: int = 0
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+# --- Stores ---
+
+class JobStore:
+    """
+    Where job state lives between restarts. Methods are blocking; the queue calls
+    them from a thread.
+    """
+
+    def save(self, job: Job):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = MAX_LIST) -> List[Job]:
+        raise NotImplementedError
+
+    def unfinished(self) -> List[Job]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemoryJobStore(JobStore):
+    """
+    In-process store for tests and single-run scripts; nothing survives a restart.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job.to_dict()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            data = self._jobs.get(job_id)
+        return Job(**data) if data else None
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = MAX_LIST) -> List[Job]:
+        with self._lock:
+            jobs = [Job(**d) for d in self._jobs.values()]
+        jobs = [j for j in jobs if (kind is None or j.kind == kind) and (status is None or j.status == status)]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)[:limit]
+
+    def unfinished(self) -> List[Job]:
+        with self._lock:
+            jobs = [Job(**d) for d in self._jobs.values()]
+        return sorted((j for j in jobs if not j.finished), key=lambda j: j.created_at)
+
+class SQLiteJobStore(JobStore):
+    """
+    One row per job, the full state as JSON next to the columns we filter on.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+    CREATE INDEX IF NOT EXISTS idx_jobs_kind ON jobs (kind, created_at DESC);
+    """
+
+    def __init__(self, path: str = JOB_DB):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def save(self, job: Job):
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO jobs (id, kind, status, created_at, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, data = excluded.data",
+                (job.id, job.kind, job.status, job.created_at, json.dumps(job.to_dict())),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = MAX_LIST) -> List[Job]:
+        clauses, args = [], []
+        if kind is not None:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if status is not None:
+            clauses.append("status = ?")
+            args.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT data FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*args, limit)
+            ).fetchall()
+        return [Job(**json.loads(r[0])) for r in rows]
+
+    def unfinished(self) -> List[Job]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT data FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [Job(**json.loads(r[0])) for r in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def get_job_store() -> JobStore:
+    return MemoryJobStore() if JOB_STORE == "memory" else SQLiteJobStore()
+
+# --- Queue ---
+
+Progress = Callable[[float, str], None]
+Handler = Callable[[Job, Progress], Awaitable[Dict[str, Any]]]
+
+class JobQueueFullError(Exception):
+    pass
+
+class UnknownJobKindError(ValueError):
+    pass
+
+@dataclass
+class JobKind:
+    name: str
+    handler: Handler
+    concurrency: int = 1
+    max_queued: int = 100
+    validate: Optional[Callable[[Dict[str, Any]], None]] = None
+
+class JobQueue:
+    """
+    Runs long operations in the background and reports on them.
+
+    Each kind of job has its own priority queue and a fixed number of worker tasks,
+    so a burst of one kind can't starve another and each kind's concurrency is
+    bounded; a kind whose queue is full refuses new work instead of piling it up.
+    Every state change is written to the store and pushed to anyone watching the
+    job. Jobs still queued or running at shutdown are queued again on the next start.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None):
+        self.store = store if store is not None else get_job_store()
+        self.kinds: Dict[str, JobKind] = {}
+        self._jobs: Dict[str, Job] = {}  # queued and running jobs
+        self._queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: set = set()
+        # The progress save in flight per running job; at most one at a time, so they can't land out of order
+        self._saving: Dict[str, asyncio.Future] = {}
+        self._watchers: Dict[str, List[asyncio.Queue]] = {}
+        self._order = itertools.count()
+        self._started = False
+
+    def register(self, name: str, handler: Handler, concurrency: int = 1, max_queued: int = 100,
+                 validate: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.kinds[name] = JobKind(name, handler, concurrency, max_queued, validate)
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        if self._started:
+            return
+        self._started = True
+        for kind in self.kinds.values():
+            self._queues[kind.name] = asyncio.PriorityQueue()
+            self._workers += [asyncio.create_task(self._worker(kind)) for _ in range(kind.concurrency)]
+
+        for job in await asyncio.to_thread(self.store.unfinished):
+            if job.kind not in self.kinds:
+                continue
+            # Work that was running when the process stopped starts over
+            job.status, job.progress, job.message, job.started_at = QUEUED, 0.0, "Requeued after restart", None
+            await self._persist(job)
+            self._enqueue(job)
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = {}
+        self._started = False
+        self.store.close()
+
+    # --- Submitting and inspecting ---
+
+    async def submit(self, kind: str, params: Dict[str, Any], priority: int = 0) -> Job:
+        """
+        Queues a job and returns it straight away. Higher priorities run first; equal
+        priorities run in submission order.
+        """
+        spec = self.kinds.get(kind)
+        if spec is None:
+            raise UnknownJobKindError(f"Unknown job kind '{kind}'")
+        if spec.validate is not None:
+            spec.validate(params)
+        await self.start()
+        queue = self._queues[kind]
+        if queue.qsize() >= spec.max_queued:
+            raise JobQueueFullError(f"Too many queued '{kind}' jobs, try again shortly")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params, priority=priority)
+        await self._persist(job)
+        self._enqueue(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = MAX_LIST) -> List[Job]:
+        return await asyncio.to_thread(self.store.list, kind, status, min(limit, MAX_LIST))
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = await self.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.status == QUEUED:
+            # Its queue entry is skipped when a worker reaches it
+            await self._finish(job, CANCELLED, message="Cancelled")
+        else:
+            self._cancel_requested.add(job_id)
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+        return job
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {
+                "queued": self._queues[name].qsize() if name in self._queues else 0,
+                "running": sum(1 for j in self._jobs.values() if j.kind == name and j.status == RUNNING),
+                "concurrency": kind.concurrency,
+            }
+            for name, kind in self.kinds.items()
+        }
+
+    async def watch(self, job_id: str, heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        The job's current state, then every change until it finishes. Yields None after
+        `heartbeat` seconds without news so streaming responses can keep the connection alive.
+        """
+        # Subscribe before taking the snapshot: a change published while the store is read
+        # (e.g. the final state of a job that just left _jobs) then lands in the inbox
+        inbox: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(job_id, []).append(inbox)
+        try:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if job is None:
+                    return
+            state = job.to_dict()
+            yield state
+            # Stop on what was yielded, not the live job, which may have finished since
+            while state["status"] not in FINISHED:
+                try:
+                    state = await asyncio.wait_for(inbox.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield state
+        finally:
+            watchers = self._watchers.get(job_id, [])
+            if inbox in watchers:
+                watchers.remove(inbox)
+            if not watchers:
+                self._watchers.pop(job_id, None)
+
+    # --- Internals ---
+
+    def _enqueue(self, job: Job):
+        self._jobs[job.id] = job
+        self._queues[job.kind].put_nowait((-job.priority, next(self._order), job.id))
+
+    def _publish(self, job: Job):
+        state = job.to_dict()
+        for inbox in self._watchers.get(job.id, []):
+            inbox.put_nowait(state)
+
+    async def _persist(self, job: Job):
+        await asyncio.to_thread(self.store.save, job)
+        self._publish(job)
+
+    async def _finish(self, job: Job, status: str, result: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None, message: str = ""):
+        job.status, job.result, job.error, job.message = status, result, error, message
+        job.finished_at = time.time()
+        if status == SUCCEEDED:
+            job.progress = 1.0
+        self._jobs.pop(job.id, None)
+        self._cancel_requested.discard(job.id)
+        saving = self._saving.pop(job.id, None)
+        if saving is not None:
+            # Let the last progress snapshot land first, or it could overwrite the final state
+            await asyncio.wait([saving])
+        await self._persist(job)
+
+    async def _worker(self, kind: JobKind):
+        queue = self._queues[kind.name]
+        while True:
+            _, _, job_id = await queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+            await self._run(kind, job)
+
+    async def _run(self, kind: JobKind, job: Job):
+        job.status, job.started_at, job.message = RUNNING, time.time(), "Started"
+        job.attempts += 1
+        await self._persist(job)
+
+        def progress(fraction: float, message: str = ""):
+            job.progress = max(0.0, min(1.0, float(fraction)))
+            job.message = message
+            self._publish(job)
+            # Progress is persisted best-effort and never awaited: while a save is in flight
+            # newer snapshots are skipped (the next one or the final state supersedes them)
+            saving = self._saving.get(job.id)
+            if job.id in self._jobs and (saving is None or saving.done()):
+                self._saving[job.id] = asyncio.get_running_loop().run_in_executor(
+                    None, self.store.save, Job(**job.to_dict()))
+
+        task = asyncio.create_task(kind.handler(job, progress))
+        self._running[job.id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if job.id not in self._cancel_requested:
+                raise  # the worker itself is stopping; the job is requeued on restart
+            await self._finish(job, CANCELLED, message="Cancelled")
+        except Exception as e:
+            await self._finish(job, FAILED, error=str(e) or type(e).__name__, message="Failed")
+        else:
+            await self._finish(job, SUCCEEDED, result=result, message="Done")
+        finally:
+            self._running.pop(job.id, None)
+            self._saving.pop(job.id, None)
+
+job_queue = JobQueue()
@@ -1,28 +1,121 @@
+from typing import Any, Dict, Tuple, Union
+
+import numpy as np
+
 from app.models.creative import Creative, CreativeFormat, AssetRole
-import copy
+from app.services.canvas import CanvasObject, Columns, ParsedCanvas, parse_canvas
+
+BASE_SIZE = 1080  # creatives are authored on a 1080x1080 canvas
+MAX_DIMENSION = 4096
+BACKGROUND_COVERAGE = 0.95  # objects covering this much of the canvas are treated as backgrounds
+
+# role -> top-left corner as a fraction of the target canvas
+ROLE_ANCHORS = {"headline": (0.1, 0.1), "cta": (0.1, 0.8)}
+
+def format_size(target_format: Union[CreativeFormat, str]) -> Tuple[int, int]:
+    """
+    (width, height) for a CreativeFormat or a custom "WIDTHxHEIGHT" string.
+    """
+    value = target_format.value if isinstance(target_format, CreativeFormat) else str(target_format)
+    try:
+        width, height = map(int, value.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid format '{value}', expected WIDTHxHEIGHT")
+    if not (0 < width <= MAX_DIMENSION and 0 < height <= MAX_DIMENSION):
+        raise ValueError(f"Format '{value}' must be between 1 and {MAX_DIMENSION} pixels per side")
+    return width, height
 
 class ResizeEngine:
     def resize(self, creative: Creative, target_format: CreativeFormat) -> Creative:
-        resized_creative = copy.deepcopy(creative)
-        resized_creative.format = target_format
-        
         # Target dimensions
-        width, height = map(int, target_format.value.split('x'))
-        
-        # Simple scaling logic (to be enhanced with AI)
-        scale_x = width / 1080  # Assuming base is 1080x1080
-        scale_y = height / 1080
-        
-        for layer in resized_creative.text_layers:
-            # Reposition based on role
-            if layer.role == "headline":
-                layer.x = width * 0.1
-                layer.y = height * 0.1
-            elif layer.role == "cta":
-                layer.x = width * 0.1
-                layer.y = height * 0.8
-            else:
-                layer.x *= scale_x
-                layer.y *= scale_y
-                
-        return resized_creative
+        width, height = format_size(target_format)
+
+        # Simple scaling logic (to be enhanced with AI), computed for all layers at once
+        layers = creative.text_layers
+        positions = np.array([(layer.x, layer.y) for layer in layers], dtype=np.float64).reshape(-1, 2)
+        positions *= (width / BASE_SIZE, height / BASE_SIZE)
+
+        # Reposition based on role
+        roles = np.array([layer.role for layer in layers], dtype=object)
+        for role, (fx, fy) in ROLE_ANCHORS.items():
+            positions[roles == role] = (width * fx, height * fy)
+
+        # Only the layers and the format change, so copy just those instead of deep-copying the model
+        text_layers = [layer.model_copy(update={"x": float(x), "y": float(y)})
+                       for layer, (x, y) in zip(layers, positions)]
+        return creative.model_copy(update={"format": target_format, "text_layers": text_layers})
+
+    def layer_transforms(self, columns: Columns, src_size: Tuple[int, int], dst_size: Tuple[int, int]) -> np.ndarray:
+        """
+        New (left, top, scaleX, scaleY) for each object of a parsed canvas, as an (n, 4) array.
+
+        Objects keep their aspect ratio and are scaled to fit; their centres move
+        proportionally and are then pulled back inside the canvas. Full-bleed
+        backgrounds are scaled to cover instead, and headline/CTA roles are anchored.
+        """
+        if len(columns.left) == 0:
+            return np.zeros((0, 4))
+        (src_w, src_h), (dst_w, dst_h) = src_size, dst_size
+
+        left, top, w, h = columns.left, columns.top, columns.width, columns.height
+        sx, sy, ox, oy, roles = columns.scale_x, columns.scale_y, columns.origin_x, columns.origin_y, columns.roles
+
+        box_w, box_h = w * sx, h * sy
+        centre_x = left + (0.5 - ox) * box_w
+        centre_y = top + (0.5 - oy) * box_h
+
+        fit = min(dst_w / src_w, dst_h / src_h)
+        cover = max(dst_w / src_w, dst_h / src_h)
+        is_background = (roles == AssetRole.BACKGROUND.value) | (
+            (box_w >= src_w * BACKGROUND_COVERAGE) & (box_h >= src_h * BACKGROUND_COVERAGE)
+        )
+        factor = np.where(is_background, cover, fit)
+        new_sx, new_sy = sx * factor, sy * factor
+        new_w, new_h = box_w * factor, box_h * factor
+
+        new_cx = centre_x * (dst_w / src_w)
+        new_cy = centre_y * (dst_h / src_h)
+        new_cx = np.where(is_background, dst_w / 2, new_cx)
+        new_cy = np.where(is_background, dst_h / 2, new_cy)
+
+        for role, (fx, fy) in ROLE_ANCHORS.items():
+            anchored = roles == role
+            new_cx = np.where(anchored, dst_w * fx + new_w / 2, new_cx)
+            new_cy = np.where(anchored, dst_h * fy + new_h / 2, new_cy)
+
+        # Keep foreground objects on the canvas when they fit
+        clamp_x = ~is_background & (new_w <= dst_w)
+        clamp_y = ~is_background & (new_h <= dst_h)
+        new_cx = np.where(clamp_x, np.clip(new_cx, new_w / 2, dst_w - new_w / 2), new_cx)
+        new_cy = np.where(clamp_y, np.clip(new_cy, new_h / 2, dst_h - new_h / 2), new_cy)
+
+        new_left = new_cx - (0.5 - ox) * new_w
+        new_top = new_cy - (0.5 - oy) * new_h
+        return np.stack([new_left, new_top, new_sx, new_sy], axis=1)
+
+    def resize_canvas(self, canvas_json: Union[ParsedCanvas, Dict[str, Any]],
+                      target_format: Union[CreativeFormat, str]) -> Dict[str, Any]:
+        """
+        Fabric canvas JSON laid out for `target_format`. Objects are shallow-copied with
+        only their transform replaced; the input is left untouched. Pass a ParsedCanvas
+        to resize one canvas to several formats without re-reading its objects.
+        """
+        width, height = format_size(target_format)
+        canvas = parse_canvas(canvas_json)
+        src_size = (int(canvas.width), int(canvas.height))
+        transforms = self.layer_transforms(canvas.columns, src_size, (width, height)).tolist()
+
+        resized = {**canvas.data, "width": width, "height": height}
+        resized["objects"] = [
+            {**obj, "left": l, "top": t, "scaleX": x, "scaleY": y}
+            for obj, (l, t, x, y) in zip(canvas.data.get("objects", []), transforms)
+        ]
+        background_image = canvas.data.get("backgroundImage")
+        if isinstance(background_image, dict):
+            background = CanvasObject.from_fabric({**background_image, "role": AssetRole.BACKGROUND.value}, 0)
+            (l, t, x, y), = self.layer_transforms(Columns.of([background]), src_size, (width, height))
+            resized["backgroundImage"] = {**background_image, "left": float(l), "top": float(t),
+                                          "scaleX": float(x), "scaleY": float(y)}
+        return resized
+
+resize_engine = ResizeEngine()
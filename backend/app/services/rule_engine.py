@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+import re
+
+_REGEX_METACHARS = set(".^$*+?{}[]|()")
+
+@dataclass(frozen=True)
+class CopyRule:
+    rule_id: str
+    pattern: str
+    label: str
+    ignore_case: bool = True
+
+@dataclass(frozen=True)
+class RuleMatch:
+    rule: CopyRule
+    start: int
+    end: int
+
+def _as_literal(pattern: str) -> Optional[str]:
+    """
+    Returns the plain string a pattern matches if it is a literal (escapes allowed), else None.
+    """
+    chars = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                return None
+            chars.append(pattern[i + 1])
+            i += 2
+            continue
+        if ch in _REGEX_METACHARS:
+            return None
+        chars.append(ch)
+        i += 1
+    return "".join(chars) or None
+
+class CopyRuleEngine:
+    """
+    Compiles a set of copy rules once and reports the first match of every rule,
+    including matches that overlap another rule's ("green" and "energy" in "greenergy").
+
+    Case-insensitive literal rules (the bulk of forbidden claims) are merged into one
+    keyword alternation matched against the lower-cased text; because every branch
+    starts with a literal, `re` can skip ahead on a first-character set instead of
+    trying each branch at every position. Each search resumes one character after the
+    last hit rather than after its end, and a hit also counts for every keyword that is
+    a prefix of it, so no keyword is hidden by another. Regex rules are searched one by
+    one: an alternation would hide all but one of the rules matching at a position.
+    Raises re.error for an invalid pattern.
+    """
+
+    def __init__(self, rules: Iterable[CopyRule]):
+        self.rules: List[CopyRule] = list(rules)
+
+        self._keyword_to_index: Dict[str, int] = {}
+        self._regexes: List[Tuple[int, Pattern[str]]] = []
+        for index, rule in enumerate(self.rules):
+            literal = _as_literal(rule.pattern) if rule.ignore_case else None
+            if literal is not None:
+                self._keyword_to_index.setdefault(literal.lower(), index)
+            else:
+                self._regexes.append((index, re.compile(rule.pattern, re.IGNORECASE if rule.ignore_case else 0)))
+
+        # Longest keywords first, so at each position the longest keyword matches...
+        keywords = sorted(self._keyword_to_index, key=len, reverse=True)
+        self._keyword_pattern = re.compile("|".join(re.escape(k) for k in keywords)) if keywords else None
+        # ...and the shorter keywords it starts with are credited from this table
+        self._keyword_hits: Dict[str, List[Tuple[int, int]]] = {
+            keyword: [(self._keyword_to_index[k], len(k)) for k in keywords if keyword.startswith(k)]
+            for keyword in keywords
+        }
+
+    def scan(self, text: str) -> List[RuleMatch]:
+        """
+        Returns the first match of each rule found in `text`, in rule order.
+        """
+        if not text:
+            return []
+
+        first_hits: Dict[int, RuleMatch] = {}
+        if self._keyword_pattern is not None:
+            lowered = text.lower()
+            search = self._keyword_pattern.search
+            match = search(lowered)
+            while match is not None:
+                start = match.start()
+                for index, length in self._keyword_hits[match.group()]:
+                    if index not in first_hits:
+                        first_hits[index] = RuleMatch(self.rules[index], start, start + length)
+                match = search(lowered, start + 1)
+        for index, pattern in self._regexes:
+            match = pattern.search(text)
+            if match is not None:
+                first_hits[index] = RuleMatch(self.rules[index], match.start(), match.end())
+        return [first_hits[i] for i in sorted(first_hits)]
+
+class KeywordSet:
+    """
+    Case-insensitive substring lookup for a fixed keyword list, compiled once.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = [k.lower() for k in keywords]
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(k) for k in ordered)) if ordered else None
+
+    def search(self, text: str) -> Optional[str]:
+        if self._pattern is None or not text:
+            return None
+        match = self._pattern.search(text.lower())
+        return match.group(0) if match else None
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.services.rule_engine import CopyRule, CopyRuleEngine, KeywordSet
+from app.utils.cache import LRUCache
+
+try:
+    import yaml
+except ImportError:  # optional: only JSON packs can be loaded without it
+    yaml = None
+
+RULE_PACK_DIR = os.environ.get("RULE_PACK_DIR", "rule_packs")
+DEFAULT_RULE_PACK = os.environ.get("DEFAULT_RULE_PACK", "tesco")
+RELOAD_CHECK_SECONDS = float(os.environ.get("RULE_PACK_RELOAD_SECONDS", 1.0))
+EXTENSIONS = (".yaml", ".yml", ".json")
+PACK_ID_RE = re.compile(r"^[\w-]+$")
+GEOMETRY_KEYS = {"margin_ratio", "min_font_size"}
+
+class RulePackError(ValueError):
+    pass
+
+@dataclass(frozen=True)
+class GeometryRules:
+    margin_ratio: Optional[float] = None
+    min_font_size: Optional[float] = None
+
+@dataclass
+class CompiledRulePack:
+    """
+    A rule pack with everything validation needs prebuilt: one copy-rule automaton,
+    keyword matchers, a tag set and geometry thresholds keyed by object kind.
+    """
+    id: str
+    version: int
+    name: str
+    digest: str
+    copy_engine: CopyRuleEngine
+    forbidden_claims: List[str]
+    forbidden_suggestion: str
+    allowed_tags: List[str]
+    allowed_tag_set: frozenset
+    alcohol_keywords: List[str]
+    alcohol_matcher: KeywordSet
+    required_asset_matcher: KeywordSet
+    geometry: Dict[str, GeometryRules] = field(default_factory=dict)
+    violation_penalty: int = 20
+
+    def geometry_for(self, kind: str) -> GeometryRules:
+        return self.geometry.get(kind, NO_GEOMETRY)
+
+    def info(self) -> Dict[str, Any]:
+        return {"id": self.id, "version": self.version, "name": self.name}
+
+NO_GEOMETRY = GeometryRules()
+
+def _strings(value: Any, where: str) -> List[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise RulePackError(f"{where} must be a list of strings")
+    return value
+
+def _number(value: Any, where: str) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise RulePackError(f"{where} must be a non-negative number")
+    return float(value)
+
+def _section(data: Dict[str, Any], name: str) -> Dict[str, Any]:
+    value = data.get(name)
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise RulePackError(f"{name} must be a mapping")
+    return value
+
+def compile_rule_pack(data: Dict[str, Any], digest: str = "") -> CompiledRulePack:
+    """
+    Validates a parsed pack and builds its evaluator. Raises RulePackError with the
+    offending key so a broken edit is easy to find.
+    """
+    if not isinstance(data, dict):
+        raise RulePackError("A rule pack must be a mapping")
+    pack_id = data.get("id")
+    if not isinstance(pack_id, str) or not PACK_ID_RE.match(pack_id):
+        raise RulePackError("id must be a name made of letters, digits, '_' or '-'")
+    version = data.get("version")
+    if isinstance(version, bool) or not isinstance(version, int):
+        raise RulePackError("version must be an integer")
+
+    copy = _section(data, "copy")
+    claims = _strings(copy.get("forbidden_claims"), "copy.forbidden_claims")
+    rules = [CopyRule("COPY_RESTRICTION", claim, claim) for claim in claims]
+    price = copy.get("price_callout")
+    if price:
+        if isinstance(price, str):
+            price = {"pattern": price}
+        if not isinstance(price, dict) or not isinstance(price.get("pattern"), str):
+            raise RulePackError("copy.price_callout must be a pattern or {pattern, ignore_case}")
+        rules.append(CopyRule("PRICE_CALLOUT", price["pattern"], "price", ignore_case=bool(price.get("ignore_case", False))))
+    for rule in rules:
+        try:
+            re.compile(rule.pattern)
+        except re.error as e:
+            raise RulePackError(f"Invalid pattern {rule.pattern!r} in copy rules: {e}")
+    try:
+        copy_engine = CopyRuleEngine(rules)
+    except re.error as e:
+        raise RulePackError(f"Copy rules don't compile together: {e}")
+
+    tags = _strings(_section(data, "tags").get("allowed"), "tags.allowed")
+    alcohol = _section(data, "alcohol")
+    alcohol_keywords = _strings(alcohol.get("keywords"), "alcohol.keywords")
+    required_assets = _strings(alcohol.get("required_assets"), "alcohol.required_assets")
+
+    geometry = {}
+    for kind, thresholds in _section(data, "geometry").items():
+        if not isinstance(thresholds, dict) or set(thresholds) - GEOMETRY_KEYS:
+            raise RulePackError(f"geometry.{kind} may only set {', '.join(sorted(GEOMETRY_KEYS))}")
+        geometry[str(kind).lower()] = GeometryRules(
+            margin_ratio=_number(thresholds.get("margin_ratio"), f"geometry.{kind}.margin_ratio"),
+            min_font_size=_number(thresholds.get("min_font_size"), f"geometry.{kind}.min_font_size"),
+        )
+
+    penalty = _section(data, "scoring").get("violation_penalty", 20)
+    return CompiledRulePack(
+        id=pack_id,
+        version=version,
+        name=str(data.get("name") or pack_id),
+        digest=digest,
+        copy_engine=copy_engine,
+        forbidden_claims=claims,
+        forbidden_suggestion=str(copy.get("forbidden_suggestion") or "Remove restricted claims."),
+        allowed_tags=tags,
+        allowed_tag_set=frozenset(tags),
+        alcohol_keywords=alcohol_keywords,
+        alcohol_matcher=KeywordSet(alcohol_keywords),
+        required_asset_matcher=KeywordSet(required_assets),
+        geometry=geometry,
+        violation_penalty=int(_number(penalty, "scoring.violation_penalty")),
+    )
+
+def parse_rule_pack(raw: bytes, path: str) -> Dict[str, Any]:
+    name = os.path.basename(path)
+    if path.endswith(".json"):
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            raise RulePackError(f"Could not parse {name}: {e}")
+    if yaml is None:
+        raise RulePackError(f"PyYAML is required to load {name}")
+    try:
+        return yaml.safe_load(raw)
+    except yaml.YAMLError as e:
+        raise RulePackError(f"Could not parse {name}: {e}")
+
+@dataclass
+class _Entry:
+    path: str
+    mtime_ns: int
+    size: int
+    checked_at: float
+    pack: CompiledRulePack
+
+class RulePackRegistry:
+    """
+    Loads rule packs from RULE_PACK_DIR by id (`<id>.yaml`, `.yml` or `.json`).
+
+    A request only pays for a dict lookup: the pack file is stat()ed at most once per
+    `check_interval` and re-read only when its mtime or size changed. Compiled packs
+    are cached by (id, version, content digest), so touching a file or flipping back
+    to an earlier version doesn't recompile. If an edited pack fails to compile, the
+    last good version keeps serving and the error is kept in `errors`.
+    """
+
+    def __init__(self, directory: str = RULE_PACK_DIR, default: str = DEFAULT_RULE_PACK,
+                 check_interval: float = RELOAD_CHECK_SECONDS):
+        self.directory = directory
+        self.default = default
+        self.check_interval = check_interval
+        self.errors: Dict[str, str] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._compiled = LRUCache(maxsize=32)
+        self._lock = threading.Lock()
+
+    def _path(self, pack_id: str) -> Optional[str]:
+        for ext in EXTENSIONS:
+            path = os.path.join(self.directory, pack_id + ext)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def get(self, pack_id: Optional[str] = None) -> CompiledRulePack:
+        pack_id = pack_id or self.default
+        entry = self._entries.get(pack_id)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry.pack
+        with self._lock:
+            return self._refresh(pack_id, self._entries.get(pack_id), now)
+
+    def _refresh(self, pack_id: str, entry: Optional[_Entry], now: float) -> CompiledRulePack:
+        if not PACK_ID_RE.match(pack_id):
+            raise RulePackError(f"Invalid rule pack id '{pack_id}'")
+        path = self._path(pack_id)
+        if path is None:
+            if entry is not None:
+                # Deleted or mid-rename: keep serving what we had
+                entry.checked_at = now
+                return entry.pack
+            raise RulePackError(f"Unknown rule pack '{pack_id}'")
+
+        stat = os.stat(path)
+        if entry is not None and entry.path == path and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            entry.checked_at = now
+            return entry.pack
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            data = parse_rule_pack(raw, path)
+            key = (pack_id, data.get("version") if isinstance(data, dict) else None, digest)
+            pack = self._compiled.get(key)
+            if pack is None:
+                try:
+                    pack = compile_rule_pack(data, digest)
+                except RulePackError as e:
+                    raise RulePackError(f"{os.path.basename(path)}: {e}")
+                if pack.id != pack_id:
+                    raise RulePackError(f"{os.path.basename(path)} declares id '{pack.id}'")
+                self._compiled.put(key, pack)
+        except (OSError, RulePackError) as e:
+            self.errors[pack_id] = str(e)
+            if entry is None:
+                raise RulePackError(str(e))
+            entry.checked_at = now
+            return entry.pack
+
+        self.errors.pop(pack_id, None)
+        self._entries[pack_id] = _Entry(path, stat.st_mtime_ns, stat.st_size, now, pack)
+        return pack
+
+    def available(self) -> List[Dict[str, Any]]:
+        """
+        Every loadable pack in the directory, with its current version.
+        """
+        ids = sorted({
+            os.path.splitext(name)[0] for name in os.listdir(self.directory)
+            if name.endswith(EXTENSIONS)
+        }) if os.path.isdir(self.directory) else []
+        packs = []
+        for pack_id in ids:
+            try:
+                packs.append({**self.get(pack_id).info(), "default": pack_id == self.default,
+                              "error": self.errors.get(pack_id)})
+            except RulePackError as e:
+                packs.append({"id": pack_id, "error": str(e)})
+        return packs
+
+rule_pack_registry = RulePackRegistry()
@@ -0,0 +1,81 @@
+from typing import Iterable, Optional, Tuple
+
+from app.services import brand_kit, rule_packs
+from app.services.ai_jobs import job_queue
+from app.services.asset_store import asset_store
+from app.services.background_removal import background_remover
+from app.services.backends import backends
+from app.services.batch_validation import batch_validator
+from app.services.bulk_resize import bulk_resizer
+from app.services.compositor import compositor
+from app.services.contrast import contrast_analyzer
+from app.services.creative_store import creative_store
+from app.services.derivatives import derivative_service
+from app.services.generation import generation_service
+from app.services.validation_session import validation_sessions
+from app.utils import static_files
+from app.utils.metrics import metrics
+
+# Scrape-time gauges for the service singletons. Nothing here runs on the request path:
+# values are read from the services' own counters when /metrics is rendered.
+
+# Every cache exposes hits/misses; entries via len() or its entry map
+CACHES = {
+    "generation": generation_service.cache,
+    "derivatives": derivative_service.cache,
+    "compositor_source": compositor.source_cache,
+    "compositor_layer": compositor.layer_cache,
+    "compositor_text": compositor.text_cache,
+    "contrast_luminance": contrast_analyzer.luminance_cache,
+    "brand_kit": brand_kit._index_cache,
+    "rule_packs": rule_packs.rule_pack_registry._compiled,
+    "creative_rebuild": creative_store._rebuilt,
+    "static_etag": static_files._etag_cache,
+}
+
+def _cache_entries(cache) -> int:
+    entries = getattr(cache, "_entries", None)
+    return len(entries) if entries is not None else len(cache)
+
+def _hit_ratio(cache):
+    total = cache.hits + cache.misses
+    return cache.hits / total if total else None
+
+def _pools() -> Iterable[Tuple[Tuple[str], Optional[int], Optional[int]]]:
+    # (pool, waiting, running); None where a pool can't tell
+    remover_running = min(background_remover.pending, background_remover.max_workers)
+    yield ("rembg",), background_remover.pending - remover_running, remover_running
+    workers = max(batch_validator.max_workers, 1)
+    batch_running = min(batch_validator.pending, workers)
+    yield ("batch_validation",), batch_validator.pending - batch_running, batch_running
+    resize_pool = bulk_resizer._pool
+    yield ("resize",), resize_pool._work_queue.qsize() if resize_pool is not None else 0, None
+    yield ("generation",), 0, len(generation_service._inflight)
+    yield ("derivatives",), 0, len(derivative_service._inflight)
+    idle = creative_store._pool.qsize()
+    yield ("creative_store",), None, creative_store._created - idle
+    for kind, stats in job_queue.stats().items():
+        yield (f"jobs:{kind}",), stats["queued"], stats["running"]
+
+metrics.collector("cache_hits_total", "Cache hits", ("cache",),
+                  lambda: [((name,), cache.hits) for name, cache in CACHES.items()], type="counter")
+metrics.collector("cache_misses_total", "Cache misses", ("cache",),
+                  lambda: [((name,), cache.misses) for name, cache in CACHES.items()], type="counter")
+metrics.collector("cache_hit_ratio", "Hits / lookups since start", ("cache",),
+                  lambda: [((name,), _hit_ratio(cache)) for name, cache in CACHES.items()])
+metrics.collector("cache_entries", "Entries currently cached", ("cache",),
+                  lambda: [((name,), _cache_entries(cache)) for name, cache in CACHES.items()])
+metrics.collector("worker_queue_depth", "Work waiting for a worker", ("pool",),
+                  lambda: [(labels, waiting) for labels, waiting, _ in _pools()])
+metrics.collector("worker_in_flight", "Work currently running (or connections checked out)", ("pool",),
+                  lambda: [(labels, running) for labels, _, running in _pools()])
+metrics.collector("generation_upstream_calls_total", "Uncached generations sent upstream", (),
+                  lambda: [((), generation_service.upstream_calls)], type="counter")
+metrics.collector("validation_sessions", "Live validation sessions held in memory", (),
+                  lambda: [((), len(validation_sessions._sessions))])
+metrics.collector("backend_ready", "1 once a lazily loaded backend is loaded", ("backend",),
+                  lambda: [((name,), int(backends.backend(name).ready)) for name in backends.names()])
+metrics.collector("backend_load_seconds", "How long the backend's last load took", ("backend",),
+                  lambda: [((name,), backends.backend(name).load_seconds) for name in backends.names()])
+metrics.collector("assets_hashed", "Stored images in the perceptual-hash index", (),
+                  lambda: [((), len(asset_store.hashes))])
@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import os
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+from starlette.requests import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+from app.services.asset_store import AssetRecord, AssetStore, asset_store
+from app.utils.metrics import stage_seconds, timed
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 25 * 1024 * 1024))  # per file
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", 20))
+UPLOAD_MAX_PIXELS = int(os.getenv("UPLOAD_MAX_PIXELS", 50_000_000))
+SNIFF_BYTES = 12
+
+# Leading bytes of the image formats the editor accepts
+MAGIC = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+class UploadRejected(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Mime type from a file's first SNIFF_BYTES bytes, None if it isn't a supported image.
+    """
+    for signature, mime in MAGIC:
+        if head.startswith(signature):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def probe_image(path: str, max_pixels: int = UPLOAD_MAX_PIXELS) -> Tuple[int, int, str]:
+    """
+    (width, height, mime) from the image header. Image.open only parses the header, so
+    an oversized image is rejected before a single pixel is decoded.
+    """
+    with warnings.catch_warnings():
+        # Pillow only warns between MAX_IMAGE_PIXELS and twice that; treat both as bombs
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        try:
+            with Image.open(path) as image:
+                width, height = image.size
+                mime = Image.MIME.get(image.format)
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+            raise UploadRejected("Image dimensions exceed the decompression limit", 422)
+        except (OSError, ValueError, SyntaxError):
+            raise UploadRejected("File is not a readable image", 415)
+    if width * height > max_pixels:
+        raise UploadRejected(f"Image is {width}x{height}; at most {max_pixels} pixels are allowed", 422)
+    return width, height, mime
+
+@dataclass
+class UploadResult:
+    field_name: str
+    filename: str
+    record: Optional[AssetRecord] = None
+    error: Optional[UploadRejected] = None
+
+    def to_dict(self) -> Dict:
+        if self.error is not None:
+            return {"filename": self.filename, "error": str(self.error), "status": self.error.status_code}
+        return {**self.record.to_dict(), "filename": self.filename}
+
+@dataclass
+class _Part:
+    field_name: str = ""
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size: int = 0
+    head: bytes = b""
+    mime: Optional[str] = None
+    tmp_path: Optional[str] = None
+    file: Optional[object] = None
+    error: Optional[UploadRejected] = None
+    hasher: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+
+class _UploadSession:
+    """
+    State for one multipart request. Parser callbacks only queue events; the session
+    applies them between network reads so all blocking file I/O happens in one thread
+    hop per chunk.
+    """
+
+    def __init__(self, pipeline: "UploadPipeline"):
+        self.pipeline = pipeline
+        self.parts: List[_Part] = []
+        self.tasks: List[Tuple[_Part, asyncio.Task]] = []
+        self.events: List[Tuple[str, _Part, bytes]] = []
+        self._current: Optional[_Part] = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+
+    # --- Parser callbacks ---
+
+    def on_part_begin(self):
+        self._current = _Part()
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        part = self._current
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        part.field_name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" in options:
+            part.filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+            part.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+            self.parts.append(part)
+            if len(self.parts) > self.pipeline.max_files:
+                raise UploadRejected(f"At most {self.pipeline.max_files} files per request", 413)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._current.filename is not None:
+            self.events.append(("data", self._current, data[start:end]))
+
+    def on_part_end(self):
+        if self._current.filename is not None:
+            self.events.append(("end", self._current, b""))
+
+    # --- Event handling ---
+
+    def _accept(self, part: _Part, chunk: bytes) -> bool:
+        # Runs on the loop: cheap checks only, so a rejected file never touches the disk again
+        if part.error is not None:
+            return False
+        part.size += len(chunk)
+        if part.size > self.pipeline.max_bytes:
+            part.error = UploadRejected(f"File exceeds the {self.pipeline.max_bytes} byte limit", 413)
+            return False
+        if part.mime is None and len(part.head) < SNIFF_BYTES:
+            part.head += chunk[:SNIFF_BYTES - len(part.head)]
+            if len(part.head) >= SNIFF_BYTES and not self._sniff(part):
+                return False
+        part.hasher.update(chunk)
+        return True
+
+    def _sniff(self, part: _Part) -> bool:
+        part.mime = sniff_image_type(part.head)
+        if part.mime is None:
+            part.error = UploadRejected("Unsupported file type; expected PNG, JPEG, GIF or WebP", 415)
+        return part.mime is not None
+
+    def _write(self, writes: List[Tuple[_Part, bytes]], ended: List[_Part]):
+        for part, chunk in writes:
+            if part.error is not None:
+                continue
+            if part.file is None:
+                fd, part.tmp_path = self.pipeline.store.temp_file()
+                part.file = os.fdopen(fd, "wb")
+            part.file.write(chunk)
+        for part in ended:
+            _discard(part, keep=part.error is None)
+
+    async def flush(self):
+        writes, ended = [], []
+        for kind, part, chunk in self.events:
+            if kind == "data":
+                if self._accept(part, chunk):
+                    writes.append((part, chunk))
+            else:
+                if part.error is None and part.mime is None:
+                    self._sniff(part)  # files shorter than SNIFF_BYTES
+                ended.append(part)
+        self.events = []
+        if writes or ended:
+            await asyncio.to_thread(self._write, writes, ended)
+        for part in ended:
+            if part.error is None:
+                # Probe and commit while the rest of the request is still streaming in
+                self.tasks.append((part, asyncio.create_task(asyncio.to_thread(self.pipeline.finish, part))))
+
+    async def results(self) -> List[UploadResult]:
+        committed = dict(zip([id(p) for p, _ in self.tasks],
+                             await asyncio.gather(*(t for _, t in self.tasks), return_exceptions=True)))
+        results = []
+        for part in self.parts:
+            outcome = committed.get(id(part), part.error)
+            if isinstance(outcome, UploadRejected):
+                results.append(UploadResult(part.field_name, part.filename, error=outcome))
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results.append(UploadResult(part.field_name, part.filename, record=outcome))
+        return results
+
+    def abort(self):
+        # Parts already handed to a worker clean up after themselves in finish()
+        handed_off = {id(p) for p, _ in self.tasks}
+        for part, task in self.tasks:
+            task.cancel()
+        for part in self.parts:
+            if id(part) not in handed_off:
+                _discard(part)
+
+def _discard(part: _Part, keep: bool = False):
+    if part.file is not None:
+        part.file.close()
+        part.file = None
+    if not keep and part.tmp_path and os.path.exists(part.tmp_path):
+        os.remove(part.tmp_path)
+
+class UploadPipeline:
+    """
+    Streams multipart uploads straight into the asset store.
+
+    Each file is hashed and written to a staging file as its chunks arrive, with a hard
+    per-file byte cap and a magic-byte check on the first bytes, so oversized or
+    non-image parts stop costing disk I/O immediately. When a file's last chunk arrives
+    its header is probed in a thread (no pixel decode, decompression bombs rejected) and
+    the staging file is renamed into place, concurrently with the rest of the request.
+    """
+
+    def __init__(self, store: AssetStore = asset_store, max_bytes: int = UPLOAD_MAX_BYTES,
+                 max_files: int = UPLOAD_MAX_FILES, max_pixels: int = UPLOAD_MAX_PIXELS):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_pixels = max_pixels
+
+    def finish(self, part: _Part) -> AssetRecord:
+        try:
+            with timed("probe"):
+                width, height, mime = probe_image(part.tmp_path, self.max_pixels)
+            if mime != part.mime:
+                raise UploadRejected(f"File content is {mime}, not the {part.mime} its header claims", 415)
+            return self.store.commit(part.tmp_path, part.hasher.hexdigest(), part.size, part.filename,
+                                     mime, probe=(width, height, mime))
+        finally:
+            _discard(part)
+
+    async def receive(self, request: Request, max_files: Optional[int] = None) -> List[UploadResult]:
+        """
+        One result per file part, in request order. Per-file problems are reported in the
+        result; malformed or oversized requests raise UploadRejected.
+        """
+        pipeline = self if max_files is None else UploadPipeline(self.store, self.max_bytes, max_files, self.max_pixels)
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadRejected("Expected a multipart/form-data body", 400)
+        length = request.headers.get("content-length")
+        # Leave room for part headers on top of the file payloads
+        limit = (pipeline.max_bytes + 64 * 1024) * pipeline.max_files
+        if length and length.isdigit() and int(length) > limit:
+            raise UploadRejected(f"Request body exceeds {limit} bytes", 413)
+
+        session = _UploadSession(pipeline)
+        callbacks = {
+            "on_part_begin": session.on_part_begin,
+            "on_part_data": session.on_part_data,
+            "on_part_end": session.on_part_end,
+            "on_header_field": session.on_header_field,
+            "on_header_value": session.on_header_value,
+            "on_header_end": session.on_header_end,
+            "on_headers_finished": session.on_headers_finished,
+        }
+        parser = multipart.MultipartParser(params[b"boundary"], callbacks)
+        received = 0
+        parse_seconds = 0.0
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > limit:
+                    raise UploadRejected(f"Request body exceeds {limit} bytes", 413)
+                started = time.perf_counter()
+                parser.write(chunk)
+                parse_seconds += time.perf_counter() - started
+                await session.flush()
+            parser.finalize()
+            await session.flush()
+            # Parser time only, summed over the body; network waits and disk writes are excluded
+            stage_seconds.observe(parse_seconds, "upload_parse")
+            return await session.results()
+        except multipart.exceptions.MultipartParseError as e:
+            session.abort()
+            raise UploadRejected(f"Malformed multipart body: {e}", 400)
+        except BaseException:
+            session.abort()
+            raise
+
+upload_pipeline = UploadPipeline()
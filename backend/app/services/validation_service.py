@@ -1,75 +1,191 @@
-import json
-from typing import List, Dict, Any
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+from app.models.creative import GuidelineSeverity, GuidelineViolation
+from app.services.brand_kit import BrandKitIndex, get_brand_kit_index
+from app.services.canvas import CanvasObject, ParsedCanvas, parse_canvas
+from app.services.contrast import ContrastResult, contrast_analyzer
+from app.services.geometry import (
+    Box, Overlap, Zone, find_overlaps, format_zones, is_background, outside_area, zone_intrusions,
+)
+from app.services.guideline_engine import GuidelineEngine, guideline_engine
+from app.services.rule_packs import CompiledRulePack, rule_pack_registry
+from app.utils.metrics import timed
+
+@dataclass
+class ObjectResult:
+    """
+    The checks that depend on one object alone, with its penalty and messages.
+    """
+    box: Box
+    kind: str
+    label: str
+    foreground: bool
+    fill: Optional[str] = None
+    font: Optional[str] = None
+    penalty: int = 0
+    warnings: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    zones: List[Dict[str, Any]] = field(default_factory=list)
+    violations: List[GuidelineViolation] = field(default_factory=list)
+
+def counts_as_overlap(kind_a: str, kind_b: str) -> bool:
+    # Text colliding with other text or with images; text on shapes is usually intended
+    return 'text' in (kind_a, kind_b) and {kind_a, kind_b} <= {'text', 'image'}
 
 class ValidationService:
-    def validate_creative(self, creative_data: Dict[str, Any], brand_kit: Dict[str, Any] = None) -> Dict[str, Any]:
+    def __init__(self, guidelines: GuidelineEngine = guideline_engine):
+        self.guidelines = guidelines
+
+    def prepare_brand_kit(self, brand_kit: Dict[str, Any]) -> BrandKitIndex:
+        """
+        Returns the normalised (and cached) index for a brand kit so it can be reused across many creatives.
+        """
+        return get_brand_kit_index(brand_kit)
+
+    @timed("validate")
+    def validate_creative(self, creative_data: Union[ParsedCanvas, Dict[str, Any]], brand_kit: Dict[str, Any] = None,
+                          prepared_kit: Optional[BrandKitIndex] = None, rule_pack: Optional[str] = None) -> Dict[str, Any]:
         """
         Validates the creative against brand and retailer guidelines.
+        Pass `prepared_kit` (from prepare_brand_kit) to skip re-normalising the brand kit,
+        and `rule_pack` to use a retailer rule pack other than the default. Fabric JSON is
+        parsed into a ParsedCanvas first; pass one to share it with other stages.
         """
-        score = 100
-        warnings = []
-        errors = []
-        
-        objects = creative_data.get('objects', [])
-        width = creative_data.get('width', 1080)
-        height = creative_data.get('height', 1080)
-        
+        if prepared_kit is None and brand_kit:
+            prepared_kit = self.prepare_brand_kit(brand_kit)
+        rules = rule_pack_registry.get(rule_pack)
+
+        canvas = parse_canvas(creative_data)
+        zones = format_zones(int(canvas.width), int(canvas.height))
+
         # 1. Brand Guidelines Check
-        if brand_kit:
-            brand_colors = [c.lower() for c in brand_kit.get('colors', [])]
-            brand_fonts = [f.lower() for f in brand_kit.get('fonts', [])]
-            
-            # Check Colors
-            used_colors = self._extract_colors(objects)
-            non_brand_colors = [c for c in used_colors if c.lower() not in brand_colors and c.lower() != '#ffffff' and c.lower() != '#000000']
-            
-            if non_brand_colors:
-                score -= 10
-                warnings.append(f"Non-brand colors used: {', '.join(non_brand_colors[:3])}...")
-
-            # Check Fonts
-            used_fonts = self._extract_fonts(objects)
-            non_brand_fonts = [f for f in used_fonts if f.lower() not in brand_fonts]
-            
-            if non_brand_fonts:
-                score -= 10
-                warnings.append(f"Non-brand fonts used: {', '.join(non_brand_fonts[:3])}...")
-                
-            # Check Logo
-            has_logo = any(obj.get('type') == 'image' and 'logo' in obj.get('src', '').lower() for obj in objects)
-            # Also check if any object is named 'logo' or has 'logo' in its custom attributes if we had them
-            # For now, simplistic check
-            # if not has_logo:
-            #     score -= 15
-            #     errors.append("Brand logo is missing")
-
-        # 2. Retailer Guidelines Check
-        
-        # Safe Margins (assuming 10% margin)
-        margin_x = width * 0.05
-        margin_y = height * 0.05
-        
-        for obj in objects:
-            if obj.get('type') == 'text' or obj.get('type') == 'i-text':
-                left = obj.get('left', 0)
-                top = obj.get('top', 0)
-                # Simple point check, ideally check bounding box
-                if left < margin_x or left > (width - margin_x) or top < margin_y or top > (height - margin_y):
-                    score -= 5
-                    warnings.append(f"Text element '{obj.get('text', '')[:10]}...' is outside safe margins")
-
-                # Text Size
-                font_size = obj.get('fontSize', 16) * obj.get('scaleY', 1)
-                if font_size < 12:
-                    score -= 5
-                    warnings.append("Text size is too small (below 12px)")
+        brand_penalty, brand_warnings = self.check_brand(canvas.objects, prepared_kit)
+
+        # 2. Retailer Guidelines Check: per-object rules, the creative's assets, then pairwise overlaps
+        results = [self.check_object(obj, rules, canvas.width, canvas.height, zones) for obj in canvas.objects]
+        violations = self.check_assets(canvas.objects, rules)
+        overlaps = find_overlaps([r.box for r in results if r.foreground],
+                                 keep=lambda a, b: counts_as_overlap(a.kind, b.kind))
 
         # 3. Accessibility Check (Contrast)
-        # This is hard to do accurately on backend without rendering, 
-        # but we can check if text is pure white on pure white bg (if we knew bg)
-        # For now, we'll rely on frontend for detailed contrast checks, 
-        # but we can add a placeholder here.
-        
+        # Worst-case WCAG contrast of each text element against the rendered background
+        contrast = contrast_analyzer.check(canvas)
+
+        return self.build_report(brand_penalty, brand_warnings, results, overlaps, contrast, rules, violations)
+
+    def check_brand(self, objects: List[CanvasObject],
+                    prepared_kit: Optional[BrandKitIndex]) -> Tuple[int, List[str]]:
+        return self.check_brand_usage(self._extract_colors(objects), self._extract_fonts(objects), prepared_kit)
+
+    def check_brand_usage(self, used_colors: List[str], used_fonts: List[str],
+                          prepared_kit: Optional[BrandKitIndex]) -> Tuple[int, List[str]]:
+        """
+        (penalty, warnings) for off-palette colours and non-brand fonts.
+        """
+        penalty = 0
+        warnings = []
+        if prepared_kit is None:
+            return penalty, warnings
+
+        # Check Colors
+        non_brand_colors = prepared_kit.off_palette_colors(used_colors)
+        if non_brand_colors:
+            penalty += 10
+            warnings.append(f"Non-brand colors used: {', '.join(non_brand_colors[:3])}...")
+
+        # Check Fonts
+        non_brand_fonts = [f for f in used_fonts if not prepared_kit.is_brand_font(f)]
+        if non_brand_fonts:
+            penalty += 10
+            warnings.append(f"Non-brand fonts used: {', '.join(non_brand_fonts[:3])}...")
+
+        # Check Logo
+        # A logo check (an image whose src mentions 'logo') is not enforced yet
+        return penalty, warnings
+
+    def check_object(self, obj: CanvasObject, rules: CompiledRulePack, width: float, height: float,
+                     zones: List[Zone]) -> ObjectResult:
+        """
+        Everything that depends on a single object: the rule pack's copy and tag rules for
+        text, safe margins and minimum text size (per object type) and format safe-zone
+        intrusions.
+        """
+        box = obj.box
+        result = ObjectResult(
+            box=box, kind=box.kind, label=obj.label,
+            foreground=not is_background(box, width, height),
+            fill=obj.fill, font=obj.font_family,
+        )
+        if box.kind == 'text':
+            for violation in self.guidelines.check_layer(obj.text_layer(), rules):
+                self._add_violation(result, violation, rules)
+        if not result.foreground:
+            return result
+
+        # Safe margins, checked against the element's transformed outline
+        geometry = rules.geometry_for(box.kind)
+        if geometry.margin_ratio is not None:
+            ratio = geometry.margin_ratio
+            content_area = (width * ratio, height * ratio, width * (1 - ratio), height * (1 - ratio))
+            if outside_area(box, content_area) > 1.0:
+                result.penalty += 5
+                if box.kind == 'text':
+                    result.warnings.append(f"Text element '{obj.text[:10]}...' is outside safe margins")
+                else:
+                    result.warnings.append(f"{result.label} is outside safe margins")
+
+        # Text Size
+        if geometry.min_font_size is not None and box.kind == 'text':
+            font_size = obj.font_size * obj.scale_y
+            if font_size < geometry.min_font_size:
+                result.penalty += 5
+                result.warnings.append(f"Text size is too small (below {geometry.min_font_size:g}px)")
+
+        # Format safe zones (e.g. the top/bottom bands of a story)
+        for _, zone, area in zone_intrusions([box], zones):
+            result.penalty += 10
+            result.errors.append(f"{result.label} overlaps the {zone.label}")
+            result.zones.append({"id": box.id, "zone": zone.rule_id, "area": round(area, 1)})
+        return result
+
+    def check_assets(self, objects: Sequence[CanvasObject], rules: CompiledRulePack) -> List[GuidelineViolation]:
+        """
+        Guideline rules over the canvas's image assets as a whole (e.g. alcohol packshots).
+        """
+        return self.guidelines.check_assets([obj.asset() for obj in objects if obj.kind == 'image'], rules)
+
+    def _add_violation(self, result: ObjectResult, violation: GuidelineViolation, rules: CompiledRulePack):
+        result.penalty += rules.violation_penalty
+        message = f"{result.label}: {violation.message}"
+        (result.errors if violation.severity == GuidelineSeverity.ERROR else result.warnings).append(message)
+        result.violations.append(violation)
+
+    def build_report(self, brand_penalty: int, brand_warnings: List[str], results: List[ObjectResult],
+                     overlaps: List[Overlap], contrast: List[ContrastResult], rules: CompiledRulePack,
+                     violations: Sequence[GuidelineViolation] = ()) -> Dict[str, Any]:
+        score = 100 - brand_penalty
+        warnings = list(brand_warnings)
+        errors = []
+        labels = {}
+        for v in violations:
+            score -= rules.violation_penalty
+            (errors if v.severity == GuidelineSeverity.ERROR else warnings).append(v.message)
+        for r in results:
+            score -= r.penalty
+            warnings += r.warnings
+            errors += r.errors
+            if r.foreground:
+                labels[r.box.id] = r.label
+
+        for o in overlaps:
+            score -= 5
+            warnings.append(f"{labels[o.a]} overlaps {labels[o.b]}")
+
+        for result in contrast:
+            if not result.passed:
+                score -= 5
+                warnings.append(f"Low contrast ({result.ratio}:1, needs {result.required}:1) on text '{result.text[:10]}...'")
+
         # Final Score Normalization
         score = max(0, min(100, score))
         
@@ -77,22 +193,21 @@ class ValidationService:
             "score": score,
             "warnings": list(set(warnings)),
             "errors": list(set(errors)),
-            "passed": score >= 80 and len(errors) == 0
+            "passed": score >= 80 and len(errors) == 0,
+            "rulePack": rules.info(),
+            "overlaps": [{"a": o.a, "b": o.b, "area": o.area} for o in overlaps],
+            "zones": [zone for r in results for zone in r.zones],
+            "violations": [v.model_dump(mode="json") for v in [*violations, *(v for r in results for v in r.violations)]],
+            "contrast": [
+                {"id": r.element_id, "text": r.text, "ratio": r.ratio, "required": r.required, "passed": r.passed}
+                for r in contrast
+            ]
         }
 
-    def _extract_colors(self, objects: List[Dict[str, Any]]) -> List[str]:
-        colors = []
-        for obj in objects:
-            fill = obj.get('fill')
-            if isinstance(fill, str) and fill.startswith('#'):
-                colors.append(fill)
-        return list(set(colors))
-
-    def _extract_fonts(self, objects: List[Dict[str, Any]]) -> List[str]:
-        fonts = []
-        for obj in objects:
-            if 'fontFamily' in obj:
-                fonts.append(obj['fontFamily'])
-        return list(set(fonts))
+    def _extract_colors(self, objects: List[CanvasObject]) -> List[str]:
+        return list({obj.fill for obj in objects if obj.fill})
+
+    def _extract_fonts(self, objects: List[CanvasObject]) -> List[str]:
+        return list({obj.font_family for obj in objects if 'fontFamily' in obj.data})
 
 validation_service = ValidationService()
@@ -0,0 +1,228 @@
+import hashlib
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from app.models.creative import GuidelineViolation
+from app.services.brand_kit import BrandKitIndex
+from app.services.canvas import CanvasObject, ParsedCanvas, attach_boxes, canonical_json
+from app.services.contrast import ContrastResult, contrast_analyzer, is_checked_text
+from app.services.geometry import Overlap, box_overlap_area, format_zones
+from app.services.rule_packs import CompiledRulePack
+from app.services.validation_service import ObjectResult, ValidationService, counts_as_overlap, validation_service
+from app.utils.cache import LRUCache
+from app.utils.metrics import timed
+
+MAX_SESSIONS = 256
+MIN_OVERLAP_AREA = 1.0
+# Canvas properties that feed the contrast background besides the non-text objects
+BACKGROUND_KEYS = ("background", "backgroundImage")
+
+def object_hash(obj: Dict[str, Any]) -> str:
+    return hashlib.sha1(canonical_json(obj)).hexdigest()
+
+def object_keys(objects: List[Dict[str, Any]]) -> List[str]:
+    """
+    Stable per-object keys: the Fabric id when present (else the index, as in
+    CanvasObject.id), made unique if ids repeat.
+    """
+    keys, seen = [], set()
+    for i, obj in enumerate(objects):
+        key = str(obj.get("id") or i)
+        if key in seen:
+            key = f"{key}#{i}"
+        seen.add(key)
+        keys.append(key)
+    return keys
+
+class ValidationSession:
+    """
+    Remembers one editor canvas between validations so only what changed is re-checked.
+
+    Per-object results (margins, text size, safe zones, copy rules) are kept by object
+    key with the hash of the object's JSON, along with the parsed CanvasObject. On each
+    update only changed and new objects are parsed and re-checked, and overlaps are recomputed only for pairs involving them. A changed
+    object's neighbours are found with one vectorised bounds test against every
+    foreground box. Text contrast is re-measured for changed text unless a background
+    layer changed, in which case every text is measured against the new background.
+    The report is then rebuilt from the cached pieces. Anything that invalidates
+    everything (canvas size, rule pack version) starts the session afresh.
+    """
+
+    def __init__(self, session_id: str, service: ValidationService = validation_service):
+        self.id = session_id
+        self.service = service
+        self.revision = 0
+        self.canvas: Optional[Dict[str, Any]] = None
+        self.lock = threading.Lock()
+        self._context: Optional[Tuple] = None
+        self._entries: Dict[str, Tuple[str, ObjectResult, CanvasObject]] = {}
+        self._overlaps: Dict[Tuple[str, str], Overlap] = {}  # (key, key) sorted -> overlap
+        self._contrast: Dict[str, Optional[ContrastResult]] = {}
+        self._background: Optional[Tuple[np.ndarray, float]] = None
+        self._background_props: Optional[Tuple] = None
+        self._asset_violations: Optional[List[GuidelineViolation]] = None
+
+    def _reset(self, context: Tuple):
+        self._context = context
+        self._entries = {}
+        self._overlaps = {}
+        self._contrast = {}
+        self._background = None
+        self._background_props = None
+        self._asset_violations = None
+
+    @timed("validate_session")
+    def validate(self, canvas_json: Union[ParsedCanvas, Dict[str, Any]], rules: CompiledRulePack,
+                 prepared_kit: Optional[BrandKitIndex] = None) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        (report, stats) for the canvas; the report matches ValidationService.validate_creative.
+        """
+        canvas = canvas_json.data if isinstance(canvas_json, ParsedCanvas) else canvas_json
+        width = float(canvas.get("width", 1080))
+        height = float(canvas.get("height", 1080))
+        context = (width, height, rules.id, rules.version, rules.digest)
+        if context != self._context:
+            self._reset(context)
+        zones = format_zones(int(width), int(height))
+
+        # Per-object checks, reusing results (and parsed objects) for unchanged objects
+        raw = canvas.get("objects", [])
+        keys = object_keys(raw)
+        entries: Dict[str, Tuple[str, ObjectResult, CanvasObject]] = {}
+        stale: List[Tuple[str, str, CanvasObject]] = []
+        for i, (key, obj) in enumerate(zip(keys, raw)):
+            digest = object_hash(obj)
+            previous = self._entries.get(key)
+            if previous is not None and previous[0] == digest:
+                entries[key] = previous
+            else:
+                stale.append((key, digest, CanvasObject.from_fabric(obj, i)))
+        attach_boxes([parsed for _, _, parsed in stale])
+
+        changed: Set[str] = set()
+        background_changed = False
+        for key, digest, parsed in stale:
+            previous = self._entries.get(key)
+            result = self.service.check_object(parsed, rules, width, height, zones)
+            entries[key] = (digest, result, parsed)
+            changed.add(key)
+            if result.kind != "text" or (previous is not None and previous[1].kind != "text"):
+                background_changed = True
+        removed = set(self._entries) - set(entries)
+        if any(self._entries[key][1].kind != "text" for key in removed):
+            background_changed = True
+        # Object order matters to the background render too
+        order = [key for key in keys if entries[key][1].kind != "text"]
+        background_props = (tuple(order), *(canonical_json(canvas.get(k)) for k in BACKGROUND_KEYS))
+        if background_props != self._background_props:
+            background_changed = True
+        self._entries = entries
+        self._background_props = background_props
+
+        results = [entries[key][1] for key in keys]
+        objects = [entries[key][2] for key in keys]
+        overlaps, pairs_checked = self._update_overlaps(keys, results, changed | removed)
+
+        # Contrast: only changed text, unless the background it sits on changed
+        if background_changed or self._background is None:
+            self._background = contrast_analyzer.background_luminance(canvas)
+            recheck = set(keys)
+        else:
+            recheck = changed
+        luminance, scale = self._background
+        contrast_checked = 0
+        contrast = {}
+        for key, obj in zip(keys, objects):
+            if not is_checked_text(obj):
+                continue
+            if key in recheck or key not in self._contrast:
+                self._contrast[key] = contrast_analyzer.check_text(obj, luminance, scale)
+                contrast_checked += 1
+            contrast[key] = self._contrast[key]
+        self._contrast = contrast
+
+        used_colors = list({r.fill for r in results if r.fill})
+        used_fonts = list({obj.font_family for obj in objects if "fontFamily" in obj.data})
+        brand_penalty, brand_warnings = self.service.check_brand_usage(used_colors, used_fonts, prepared_kit)
+
+        # Asset rules only look at images, which count as background layers
+        if background_changed or self._asset_violations is None:
+            self._asset_violations = self.service.check_assets(objects, rules)
+
+        report = self.service.build_report(
+            brand_penalty, brand_warnings, results, overlaps, [c for c in contrast.values() if c is not None], rules,
+            self._asset_violations,
+        )
+        self.canvas = canvas
+        self.revision += 1
+        stats = {
+            "objects": len(keys),
+            "checked": len(changed),
+            "reused": len(keys) - len(changed),
+            "pairsChecked": pairs_checked,
+            "contrastChecked": contrast_checked,
+        }
+        return report, stats
+
+    def _update_overlaps(self, keys: List[str], results: List[ObjectResult],
+                         dirty: Set[str]) -> Tuple[List[Overlap], int]:
+        # Pairs between two untouched objects keep their cached result
+        self._overlaps = {pair: o for pair, o in self._overlaps.items() if pair[0] not in dirty and pair[1] not in dirty}
+
+        foreground = [(key, r) for key, r in zip(keys, results) if r.foreground]
+        position = {key: i for i, (key, _) in enumerate(foreground)}
+        pairs_checked = 0
+        changed = [key for key, _ in foreground if key in dirty]
+        if changed:
+            bounds = np.array([r.box.bounds for _, r in foreground], dtype=np.float64)
+            for key in changed:
+                i = position[key]
+                x0, y0, x1, y1 = bounds[i]
+                # Same strict test as the sweep: touching edges don't count
+                near = (bounds[:, 0] < x1) & (bounds[:, 2] > x0) & (bounds[:, 1] < y1) & (bounds[:, 3] > y0)
+                near[i] = False
+                for j in np.flatnonzero(near):
+                    other, other_result = foreground[j]
+                    pair = (key, other) if key < other else (other, key)
+                    if pair in self._overlaps or (other in dirty and j < i):
+                        continue  # already done from the other side
+                    result = foreground[i][1]
+                    if not counts_as_overlap(result.kind, other_result.kind):
+                        continue
+                    pairs_checked += 1
+                    a, b = (result, other_result) if i < j else (other_result, result)
+                    area = box_overlap_area(a.box, b.box)
+                    if area >= MIN_OVERLAP_AREA:
+                        self._overlaps[pair] = Overlap(a.box.id, b.box.id, round(area, 1))
+
+        # Report pairs in canvas order, first element then second
+        by_key = dict(foreground)
+        overlaps = []
+        for pair in sorted(self._overlaps, key=lambda p: sorted((position[p[0]], position[p[1]]))):
+            first, second = sorted(pair, key=position.get)
+            overlaps.append(Overlap(by_key[first].box.id, by_key[second].box.id, self._overlaps[pair].area))
+        return overlaps, pairs_checked
+
+class ValidationSessionStore:
+    """
+    Live validation sessions, least recently used evicted first.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self._sessions = LRUCache(maxsize=max_sessions)
+
+    def create(self) -> ValidationSession:
+        session = ValidationSession(uuid.uuid4().hex)
+        self._sessions.put(session.id, session)
+        return session
+
+    def get(self, session_id: str) -> Optional[ValidationSession]:
+        return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id) is not None
+
+validation_sessions = ValidationSessionStore()
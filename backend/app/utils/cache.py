@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+class LRUCache:
+    """
+    Small thread-safe LRU cache with hit/miss counters.
+
+    With `maxweight`, entries are also evicted once the sum of `weigh(value)`
+    goes over it (e.g. bytes of decoded images); a value heavier than the
+    whole budget is not kept at all.
+    """
+
+    def __init__(self, maxsize: int = 128, maxweight: Optional[int] = None,
+                 weigh: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._discard(key)
+            self._data[key] = value
+            if self.weigh is not None:
+                self._weights[key] = self.weigh(value)
+                self.weight += self._weights[key]
+            while self._data and (len(self._data) > self.maxsize or
+                                  (self.maxweight is not None and self.weight > self.maxweight)):
+                self._discard(next(iter(self._data)))
+
+    def _discard(self, key: Hashable) -> Any:
+        self.weight -= self._weights.pop(key, 0)
+        return self._data.pop(key, None)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._discard(key)
+
+    def values(self) -> List[Any]:
+        with self._lock:
+            return list(self._data.values())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
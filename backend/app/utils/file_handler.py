@@ -1,12 +1,45 @@
-import shutil
+import base64
 import os
+from typing import Optional
+from urllib.parse import urlparse
+
 from fastapi import UploadFile
+from app.services.asset_store import asset_store
 
-UPLOAD_DIR = "static/uploads"
+STATIC_DIR = "static"
 
 async def save_upload_file(upload_file: UploadFile) -> str:
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(UPLOAD_DIR, upload_file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    return file_path
+    """
+    Saves an upload into the content-addressed asset store and returns its path on disk.
+    """
+    record = await asset_store.save_upload(upload_file)
+    return asset_store.path_for(record)
+
+def resolve_static_path(url: str, static_dir: str = STATIC_DIR) -> Optional[str]:
+    """
+    Maps a /static URL (absolute or relative) to a file under `static_dir`, or None if
+    it points elsewhere, escapes the directory or doesn't exist.
+    """
+    path = urlparse(url).path
+    if not path.startswith("/static/"):
+        return None
+    relative = os.path.normpath(path[len("/static/"):])
+    if relative.startswith("..") or os.path.isabs(relative):
+        return None
+    full_path = os.path.join(static_dir, relative)
+    return full_path if os.path.isfile(full_path) else None
+
+def read_image_source(src: str, static_dir: str = STATIC_DIR) -> Optional[bytes]:
+    """
+    Reads the bytes behind an image `src`: a data URL or one of our own /static URLs.
+    Remote URLs are not fetched.
+    """
+    if src.startswith("data:"):
+        header, _, payload = src.partition(",")
+        return base64.b64decode(payload) if header.endswith(";base64") else payload.encode()
+
+    full_path = resolve_static_path(src, static_dir)
+    if full_path is None:
+        return None
+    with open(full_path, "rb") as f:
+        return f.read()
@@ -0,0 +1,135 @@
+import copy
+from typing import Any, Dict, List, Tuple
+
+class JsonPatchError(ValueError):
+    pass
+
+def parse_pointer(pointer: Any) -> List[str]:
+    """
+    RFC 6901 pointer -> unescaped reference tokens ("" is the whole document).
+    """
+    if not isinstance(pointer, str):
+        raise JsonPatchError(f"A JSON pointer must be a string, not {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer '{pointer}'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def _index(container: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise JsonPatchError(f"Invalid array index '{token}'")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index {index} out of range")
+    return index
+
+def _resolve(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise JsonPatchError(f"Path segment '{token}' not found")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Cannot descend into scalar at '{token}'")
+    return doc
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, key, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to scalar at '{key}'")
+    return doc
+
+def _remove(doc: Any, tokens: List[str]) -> Tuple[Any, Any]:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"Path segment '{key}' not found")
+        return doc, parent.pop(key)
+    if isinstance(parent, list):
+        return doc, parent.pop(_index(parent, key, allow_end=False))
+    raise JsonPatchError(f"Cannot remove from scalar at '{key}'")
+
+def apply_patch(doc: Any, patch: List[Dict[str, Any]], in_place: bool = False) -> Any:
+    """
+    Applies an RFC 6902 patch and returns the result. The input is deep-copied first
+    unless `in_place` is set; either way a failing patch raises JsonPatchError.
+    """
+    if not isinstance(patch, list):
+        raise JsonPatchError("A JSON Patch must be a list of operations")
+    if not in_place:
+        doc = copy.deepcopy(doc)
+
+    for op in patch:
+        if not isinstance(op, dict) or not isinstance(op.get("op"), str) or "path" not in op:
+            raise JsonPatchError(f"Malformed operation: {op!r}")
+        name, tokens = op["op"], parse_pointer(op["path"])
+        if name in ("add", "replace", "test") and "value" not in op:
+            raise JsonPatchError(f"'{name}' requires a value")
+
+        if name == "add":
+            doc = _add(doc, tokens, copy.deepcopy(op["value"]))
+        elif name == "remove":
+            doc, _ = _remove(doc, tokens)
+        elif name == "replace":
+            if tokens:
+                doc, _ = _remove(doc, tokens)
+            doc = _add(doc, tokens, copy.deepcopy(op["value"]))
+        elif name in ("move", "copy"):
+            if "from" not in op:
+                raise JsonPatchError(f"'{name}' requires 'from'")
+            source = parse_pointer(op["from"])
+            if name == "move":
+                if tokens[:len(source)] == source and len(tokens) > len(source):
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                doc, value = _remove(doc, source)
+            else:
+                value = copy.deepcopy(_resolve(doc, source))
+            doc = _add(doc, tokens, value)
+        elif name == "test":
+            if _resolve(doc, tokens) != op["value"]:
+                raise JsonPatchError(f"Test failed at '{op['path']}'")
+        else:
+            raise JsonPatchError(f"Unknown operation '{name}'")
+    return doc
+
+def compact_patch(patch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drops operations that a later one in the same patch makes redundant: `test` ops
+    (already checked when the patch was applied) and add/replace values overwritten by a
+    later replace of the same path. Only done when the patch has no array-shifting or
+    moving operations, where paths stay stable.
+    """
+    ops = [op for op in patch if op.get("op") != "test"]
+    if any(op.get("op") in ("move", "copy", "remove") or op.get("path", "").endswith("/-")
+           or (op.get("op") == "add" and op.get("path", "").rsplit("/", 1)[-1].isdigit()) for op in ops):
+        return ops
+
+    last_write: Dict[str, int] = {}
+    for i, op in enumerate(ops):
+        # A write to a parent supersedes earlier writes beneath it
+        for earlier in [p for p in last_write if p.startswith(op["path"] + "/")]:
+            del last_write[earlier]
+        last_write[op["path"]] = i
+    keep = set(last_write.values())
+    compacted = []
+    for i, op in enumerate(ops):
+        if i in keep:
+            # The first write to a key that didn't exist must stay an add
+            first = next(o for o in ops if o["path"] == op["path"])
+            compacted.append({**op, "op": first["op"]} if first["op"] == "add" else op)
+    return compacted
@@ -0,0 +1,286 @@
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond validation up to slow upstream generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[Tuple[str, ...], float]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """
+    One metric family. Label values are passed positionally in `labelnames` order.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(v) for v in labels)
+
+    def lines(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self.lines()]
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in values]
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+    def __call__(self, func):
+        # Used as a decorator: a fresh timer per call, awaited through for coroutines
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed_coroutine(*args, **kwargs):
+                with _Timer(self.histogram, self.labels):
+                    return await func(*args, **kwargs)
+            return timed_coroutine
+
+        @functools.wraps(func)
+        def timed_function(*args, **kwargs):
+            with _Timer(self.histogram, self.labels):
+                return func(*args, **kwargs)
+        return timed_function
+
+class Histogram(Metric):
+    """
+    Cumulative-bucket histogram. `observe` is a bisect and three additions under a lock,
+    cheap enough for per-request and per-stage use.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels: str) -> _Timer:
+        """
+        Context manager that observes the elapsed wall time of its block.
+        """
+        return _Timer(self, self._key(labels))
+
+    def snapshot(self, *labels: str) -> Optional[Tuple[List[int], float, int]]:
+        """
+        (cumulative bucket counts, sum, count) for one series, or None if never observed.
+        """
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return None
+            counts, total, count = list(series[0]), series[1], series[2]
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, list(v[0]), v[1], v[2]) for k, v in self._series.items())
+        names = self.labelnames + ("le",)
+        lines = []
+        for key, counts, total, count in series:
+            running = 0
+            for bound, c in zip((*self.buckets, math.inf), counts):
+                running += c
+                lines.append(f"{self.name}_bucket{_format_labels(names, (*key, _format_value(bound)))} {running}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class CallbackMetric(Metric):
+    """
+    A gauge or counter whose values live elsewhere (cache counters, queue sizes) and are
+    read only when /metrics is scraped, so the hot path pays nothing for them.
+    """
+
+    def __init__(self, name: str, help: str, type: str, labelnames: Sequence[str],
+                 collect: Callable[[], Iterable[Sample]]):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.collect = collect
+
+    def lines(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, tuple(str(v) for v in labels))} {_format_value(value)}"
+            for labels, value in self.collect() if value is not None
+        ]
+
+class MetricsRegistry:
+    """
+    Named metric families rendered in the Prometheus text exposition format.
+    Registering a name twice returns the existing family.
+    """
+
+    def __init__(self, prefix: str = "creativepilot_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help, labelnames, buckets))
+
+    def collector(self, name: str, help: str, labelnames: Sequence[str], collect: Callable[[], Iterable[Sample]],
+                  type: str = "gauge") -> CallbackMetric:
+        return self._register(CallbackMetric(self.prefix + name, help, type, labelnames, collect))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(self.prefix + name)
+
+    def render(self) -> str:
+        with self._lock:
+            families = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in families:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A broken collector shouldn't take the whole scrape down
+                lines.append(f"# {metric.name} failed: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    "stage_duration_seconds", "Wall time spent in each pipeline stage", ("stage",),
+)
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"),
+)
+_http_in_flight = 0
+
+def timed(stage: str) -> _Timer:
+    """
+    `with timed("validate"): ...` (or `@timed("validate")`) records the block under
+    creativepilot_stage_duration_seconds.
+    """
+    return _Timer(stage_seconds, (stage,))
+
+def _route_template(scope) -> str:
+    # Routing fills scope["route"] in place; label by template so ids don't explode cardinality
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path, regex = scope["path"], getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        # Routers included with a prefix may match only the tail: put the (static) prefix back
+        for i, ch in enumerate(path):
+            if ch == "/" and i and regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request until its last body byte is sent
+    (streamed responses included), labelled by method, route template and status.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _http_in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        _http_in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _http_in_flight -= 1
+            request_seconds.observe(time.perf_counter() - start, scope["method"], _route_template(scope), str(status))
+
+metrics.collector("http_requests_in_flight", "HTTP requests currently being served", (),
+                  lambda: [((), _http_in_flight)])
@@ -0,0 +1,168 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.cache import LRUCache
+
+# Off unless asked for: profiling costs a sampler thread and reveals code paths
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 20))
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "profile=1"
+# Leaf frames of threads that are parked, not working: event loop select, idle pool workers, lock waits
+IDLE_LEAVES = {
+    ("selectors.py", "select"), ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"), ("queue.py", "get"), ("connection.py", "_recv_bytes"),
+}
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    interval: float
+    started_at: float
+    duration: float = 0.0
+    samples: int = 0
+    idle_samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    def folded(self) -> str:
+        """
+        Brendan Gregg's folded format (`thread;outer;...;leaf count`), ready for flamegraph.pl or speedscope.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 25) -> List[Dict[str, Any]]:
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [
+            {"function": name, "self": own[name], "total": count,
+             "selfMs": round(own[name] * self.interval * 1000, 1), "totalMs": round(count * self.interval * 1000, 1)}
+            for name, count in sorted(total.items(), key=lambda item: (own[item[0]], item[1]), reverse=True)[:limit]
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "method": self.method, "path": self.path, "startedAt": self.started_at,
+            "durationMs": round(self.duration * 1000, 1), "intervalMs": self.interval * 1000,
+            "samples": self.samples, "idleSamples": self.idle_samples,
+        }
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one request at a time. A daemon thread snapshots every
+    thread's Python stack (sys._current_frames) each `interval`, so time spent in the
+    event loop, to_thread helpers and thread pools all shows up; parked threads are
+    counted as idle and left out of the stacks. Process-pool workers (rembg, batch
+    validation) are outside this process and appear only as the wait for their result.
+
+    While a request is being profiled, other requests keep running and are sampled too,
+    so profile on a quiet instance. A second profile request while one is active is
+    served unprofiled.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, keep: int = PROFILE_KEEP):
+        self.interval = interval
+        self.profiles = LRUCache(maxsize=keep)
+        self._busy = threading.Lock()
+
+    def start(self, method: str = "", path: str = "") -> Optional[Tuple[Profile, threading.Event, threading.Thread]]:
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = Profile(uuid.uuid4().hex[:12], method, path, self.interval, time.time())
+        stop = threading.Event()
+        thread = threading.Thread(target=self._sample, args=(profile, stop), name="profiler", daemon=True)
+        thread.start()
+        return profile, stop, thread
+
+    def stop(self, handle: Tuple[Profile, threading.Event, threading.Thread]) -> Profile:
+        profile, stop, thread = handle
+        stop.set()
+        thread.join()
+        self.profiles.put(profile.id, profile)
+        self._busy.release()
+        return profile
+
+    def _sample(self, profile: Profile, stop: threading.Event):
+        own = threading.get_ident()
+        names = {}
+        start = time.perf_counter()
+        while not stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    profile.idle_samples += 1
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_frame_label(frame))
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                profile.stacks[";".join(reversed(frames))] += 1
+                profile.samples += 1
+        profile.duration = time.perf_counter() - start
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self.profiles.get(profile_id)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        return sorted((p.summary() for p in self.profiles.values()), key=lambda s: s["startedAt"], reverse=True)
+
+profiler = SamplingProfiler()
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent with an `X-Profile: 1` header (or `?profile=1`, for EventSource
+    and plain links) when PROFILING_ENABLED is set. The response carries `X-Profile-Id`;
+    fetch the result from /metrics/profiles/{id}.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler = profiler):
+        self.app = app
+        self.profiler = profiler
+
+    @staticmethod
+    def wants_profile(scope) -> bool:
+        if PROFILE_QUERY in scope.get("query_string", b"").decode("latin-1"):
+            return True
+        return any(name == PROFILE_HEADER and value.strip() in (b"1", b"true") for name, value in scope["headers"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        handle = self.profiler.start(scope["method"], scope["path"])
+        if handle is None:
+            await self.app(scope, receive, send)
+            return
+        profile_id = handle[0].id
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.profiler.stop(handle)
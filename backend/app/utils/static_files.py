@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+import anyio
+from PIL import Image, features
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.utils.cache import LRUCache
+
+VARIANT_DIR = "data/asset_variants"
+CHUNK_SIZE = 64 * 1024
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Content-addressed blobs and uniquely-named AI generations never change once written
+IMMUTABLE_PATTERNS = [
+    re.compile(r"^assets/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})\.\w+$"),
+    re.compile(r"^ai_gen_[0-9a-f-]{36}\.\w+$"),
+    re.compile(r"^generated/gen_[0-9a-f]+\.\w+$"),
+]
+
+TRANSCODABLE_TYPES = {"image/png", "image/jpeg"}
+VARIANT_FORMATS = [
+    # (mime, Pillow format, extension, save options) in order of preference
+    ("image/avif", "AVIF", ".avif", {"quality": 70}),
+    ("image/webp", "WEBP", ".webp", {"quality": 85, "method": 4}),
+]
+
+_etag_cache = LRUCache(maxsize=4096)
+# One transcode per variant at a time: concurrent first requests wait for it and reuse the file
+_transcode_locks: "dict[str, threading.Lock]" = {}
+_transcode_locks_guard = threading.Lock()
+
+def _file_etag(path: str, stat_result: os.stat_result, relative_path: str) -> str:
+    for pattern in IMMUTABLE_PATTERNS:
+        match = pattern.match(relative_path)
+        if match and match.groupdict().get("digest"):
+            return f'"{match.group("digest")[:32]}"'
+
+    key = (path, stat_result.st_mtime_ns, stat_result.st_size)
+    etag = _etag_cache.get(key)
+    if etag is None:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        etag = f'"{hasher.hexdigest()[:32]}"'
+        _etag_cache.put(key, etag)
+    return etag
+
+def _accepted(accept: str, mime: str) -> bool:
+    for part in accept.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        if fields[0] == mime:
+            return not any(f.replace(" ", "") in ("q=0", "q=0.0") for f in fields[1:])
+    return False
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip() for t in header.split(",")]
+    return any(t == etag or t == f"W/{etag}" for t in tags)
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single 'bytes=' range into an inclusive (start, end).
+    Returns None when the header should be ignored (malformed or multiple ranges)
+    and raises ValueError when the range can't be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    if not (start_s.isdigit() or not start_s) or not (end_s.isdigit() or not end_s) or not (start_s or end_s):
+        return None
+
+    if not start_s:
+        # Suffix range: the last N bytes
+        length = int(end_s)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(start_s)
+    end = min(int(end_s), size - 1) if end_s else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+class AssetFileResponse(Response):
+    """
+    Serves one static file with strong ETags, conditional 304s, single byte ranges and
+    WebP/AVIF variants negotiated from the Accept header.
+    """
+
+    def __init__(self, path: str, stat_result: os.stat_result, relative_path: str, variant_dir: str = VARIANT_DIR):
+        super().__init__(content=None)
+        self.path = path
+        self.stat_result = stat_result
+        self.relative_path = relative_path
+        self.variant_dir = variant_dir
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        request_headers = Headers(scope=scope)
+        immutable = any(p.match(self.relative_path) for p in IMMUTABLE_PATTERNS)
+        etag = await asyncio.to_thread(_file_etag, self.path, self.stat_result, self.relative_path)
+
+        path, size, media_type = self.path, self.stat_result.st_size, self._guess_type(self.path)
+        vary = False
+        if media_type in TRANSCODABLE_TYPES:
+            vary = True
+            variant = await asyncio.to_thread(self._negotiate_variant, request_headers.get("accept", ""), etag)
+            if variant is not None:
+                path, media_type, suffix = variant
+                size = os.path.getsize(path)
+                etag = f'{etag[:-1]}-{suffix}"'
+
+        headers = {
+            "etag": etag,
+            "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "accept-ranges": "bytes",
+        }
+        if vary:
+            headers["vary"] = "Accept"
+
+        if _etag_matches(request_headers.get("if-none-match"), etag):
+            await self._send_head(send, 304, headers)
+            return
+
+        start, end, status = 0, size - 1, 200
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                await self._send_head(send, 416, {**headers, "content-range": f"bytes */{size}", "content-length": "0"})
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = 206
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        headers["content-type"] = media_type
+        headers["content-length"] = str(end - start + 1)
+        await self._send_head(send, status, headers)
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = end - start + 1
+        async with await anyio.open_file(path, mode="rb") as f:
+            await f.seek(start)
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_head(self, send: Send, status: int, headers: dict):
+        raw = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        if status in (304, 416):
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _negotiate_variant(self, accept: str, etag: str) -> Optional[Tuple[str, str, str]]:
+        for mime, pil_format, ext, options in VARIANT_FORMATS:
+            if not _accepted(accept, mime) or not features.check(pil_format.lower()):
+                continue
+            variant_path = os.path.join(self.variant_dir, etag.strip('"') + ext)
+            skip_marker = variant_path + ".skip"
+            if os.path.exists(skip_marker):
+                continue
+            if not os.path.exists(variant_path) and not self._transcode(variant_path, skip_marker, pil_format, options):
+                continue
+            return variant_path, mime, ext[1:]
+        return None
+
+    def _transcode(self, variant_path: str, skip_marker: str, pil_format: str, options: dict) -> bool:
+        with _transcode_locks_guard:
+            lock = _transcode_locks.setdefault(variant_path, threading.Lock())
+        try:
+            with lock:
+                # Another request may have finished (or given up on) this variant while we waited
+                if os.path.exists(variant_path):
+                    return True
+                if os.path.exists(skip_marker):
+                    return False
+                return self._write_variant(variant_path, skip_marker, pil_format, options)
+        finally:
+            with _transcode_locks_guard:
+                if not lock.locked():
+                    _transcode_locks.pop(variant_path, None)
+
+    def _write_variant(self, variant_path: str, skip_marker: str, pil_format: str, options: dict) -> bool:
+        os.makedirs(self.variant_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.variant_dir, suffix=".tmp")
+        try:
+            try:
+                with os.fdopen(fd, "wb") as tmp, Image.open(self.path) as image:
+                    image.save(tmp, pil_format, **options)
+            except (OSError, ValueError):
+                open(skip_marker, "w").close()
+                return False
+            if os.path.getsize(tmp_path) >= self.stat_result.st_size:
+                # Only keep variants that actually save bytes
+                open(skip_marker, "w").close()
+                return False
+            os.replace(tmp_path, variant_path)
+            return True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _guess_type(path: str) -> str:
+        return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+class AssetStaticFiles(StaticFiles):
+    """
+    StaticFiles with long-lived caching for content-addressed and generated assets.
+    """
+
+    def __init__(self, *args, variant_dir: str = VARIANT_DIR, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.variant_dir = variant_dir
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        relative_path = self.get_path(scope).replace(os.sep, "/")
+        return AssetFileResponse(str(full_path), stat_result, relative_path, variant_dir=self.variant_dir)
@@ -0,0 +1,85 @@
+"""
+Bytes transferred for a typical editor session: open the editor, load the asset
+library and canvas images, then reload the canvas several times.
+
+Compares the plain StaticFiles mount with AssetStaticFiles (immutable caching,
+ETags/304s and WebP/AVIF variants). A tiny browser-cache model decides whether a
+request is skipped (fresh immutable entry), revalidated (If-None-Match) or sent cold.
+
+Run from backend/:  python -m benchmarks.bench_asset_serving
+"""
+import glob
+import os
+import shutil
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+from app.utils.static_files import AssetStaticFiles
+
+ACCEPT = "image/avif,image/webp,image/apng,image/*,*/*;q=0.8"
+
+class BrowserCache:
+    def __init__(self, client: TestClient, revalidate: bool = True):
+        self.client = client
+        self.revalidate = revalidate
+        self.entries = {}
+        self.requests = 0
+        self.bytes = 0
+
+    def fetch(self, url: str):
+        entry = self.entries.get(url)
+        if entry and "immutable" in entry.get("cache-control", ""):
+            return
+        headers = {"accept": ACCEPT}
+        if entry and self.revalidate and entry.get("etag"):
+            headers["if-none-match"] = entry["etag"]
+        response = self.client.get(url, headers=headers)
+        self.requests += 1
+        self.bytes += len(response.content) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        if response.status_code == 200:
+            self.entries[url] = dict(response.headers)
+
+def session(app: FastAPI, urls, reloads: int, revalidate: bool = True) -> BrowserCache:
+    browser = BrowserCache(TestClient(app), revalidate=revalidate)
+    for _ in range(reloads + 1):
+        for url in urls:
+            browser.fetch(url)
+    return browser
+
+def main(reloads: int = 10):
+    source_dir = os.path.join(os.path.dirname(__file__), "..", "static")
+    images = sorted(glob.glob(os.path.join(source_dir, "ai_gen_*.png")))[:5] + \
+        sorted(glob.glob(os.path.join(source_dir, "generated", "gen_*.png")))[:5]
+    if not images:
+        print("No sample images found under static/")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        static_dir = os.path.join(tmp, "static")
+        os.makedirs(os.path.join(static_dir, "generated"))
+        urls = []
+        for path in images:
+            relative = os.path.relpath(path, source_dir)
+            shutil.copy(path, os.path.join(static_dir, relative))
+            urls.append(f"/static/{relative}")
+
+        baseline = FastAPI()
+        baseline.mount("/static", StaticFiles(directory=static_dir))
+        cached = FastAPI()
+        cached.mount("/static", AssetStaticFiles(directory=static_dir, variant_dir=os.path.join(tmp, "variants")))
+
+        rows = [
+            ("StaticFiles, no revalidation", session(baseline, urls, reloads, revalidate=False)),
+            ("StaticFiles, If-None-Match", session(baseline, urls, reloads)),
+            ("AssetStaticFiles", session(cached, urls, reloads)),
+        ]
+
+    print(f"{len(urls)} assets, 1 initial load + {reloads} canvas reloads")
+    for label, result in rows:
+        print(f"{label:30s} requests {result.requests:4d}   bytes {result.bytes / 1024:10.1f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Background-removal latency: cold start (worker spawn + U²-Net session load +
+first inference), warm inference on a new image, and a cached repeat of a
+packshot that was already cut out. Also times the old path, which called
+rembg.remove() without a session and so reloaded the model every call.
+
+Needs rembg and the model weights (downloaded to ~/.u2net on first use).
+Run from backend/:  python -m benchmarks.bench_background_removal
+"""
+import asyncio
+import io
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from app.services.asset_store import AssetStore
+from app.services.background_removal import BackgroundRemover, REMBG_MODEL
+
+def make_packshot(seed: int, size: int = 512) -> bytes:
+    image = Image.new("RGB", (size, size), (240, 240 - seed * 10, 230))
+    draw = ImageDraw.Draw(image)
+    draw.rounded_rectangle((size * 0.3, size * 0.15, size * 0.7, size * 0.9), radius=30, fill=(180, 30 + seed * 20, 40))
+    draw.ellipse((size * 0.38, size * 0.05, size * 0.62, size * 0.25), fill=(90, 90, 90))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+async def timed(coro):
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+async def run(warm_samples: int = 3):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AssetStore(root=os.path.join(tmp, "assets"), index_path=os.path.join(tmp, "index.jsonl"))
+        remover = BackgroundRemover(store=store, max_workers=1, index_path=os.path.join(tmp, "cutouts.jsonl"))
+        images = [make_packshot(i) for i in range(warm_samples + 1)]
+        try:
+            cold = await timed(remover.remove(images[0]))
+            warm = [await timed(remover.remove(data)) for data in images[1:]]
+            cached = [await timed(remover.remove(data)) for data in images]
+        finally:
+            remover.shutdown()
+
+    from rembg import remove
+    start = time.perf_counter()
+    remove(images[0])
+    sessionless = time.perf_counter() - start
+
+    print(f"model: {REMBG_MODEL}")
+    print(f"cold start (spawn + load + infer): {cold * 1000:9.1f} ms")
+    print(f"warm inference (median of {len(warm)}):  {sorted(warm)[len(warm) // 2] * 1000:9.1f} ms")
+    print(f"cached repeat (median):            {sorted(cached)[len(cached) // 2] * 1000:9.3f} ms")
+    print(f"old path, rembg.remove() no session: {sessionless * 1000:7.1f} ms per call")
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,70 @@
+"""
+N creatives x M formats: a sequential loop (deep copy + scale each creative, render
+with a cold compositor, encode) against BulkResizer (vectorised layer transforms,
+sources decoded once, render + encode on a thread pool).
+
+Run from backend/:  python -m benchmarks.bench_bulk_resize
+"""
+import asyncio
+import copy
+import glob
+import os
+import time
+
+from app.services.bulk_resize import BulkResizer
+from app.services.compositor import Compositor
+from app.services.export import encode
+from app.services.resize_engine import format_size
+
+FORMATS = ["1080x1080", "1080x1920", "1200x628", "300x250", "728x90"]
+
+def make_creative(i: int, image_src: str):
+    return {
+        "name": f"creative_{i}", "width": 1080, "height": 1080, "background": "#ffffff",
+        "objects": [
+            {"type": "image", "src": image_src, "left": 0, "top": 0, "width": 1024, "height": 1024,
+             "scaleX": 1.0547, "scaleY": 1.0547},
+            {"type": "rect", "left": 80, "top": 820, "width": 400, "height": 120, "fill": "#00539f"},
+            {"type": "textbox", "text": f"Offer {i}: 2 for £5", "left": 80, "top": 80, "width": 700,
+             "fontSize": 72, "fill": "#ffffff", "role": "headline"},
+            {"type": "textbox", "text": "Shop now", "left": 110, "top": 850, "width": 340,
+             "fontSize": 48, "fill": "#ffffff", "role": "cta"},
+        ],
+    }
+
+def sequential(creatives, formats):
+    for creative in creatives:
+        for fmt in formats:
+            width, height = format_size(fmt)
+            resized = copy.deepcopy(creative)
+            sx, sy = width / 1080, height / 1080
+            for obj in resized["objects"]:
+                obj["left"] *= sx
+                obj["top"] *= sy
+            resized["width"], resized["height"] = width, height
+            encode(Compositor().render(resized), "jpeg", 90)
+
+def main(n: int = 8):
+    images = sorted(glob.glob(os.path.join("static", "ai_gen_*.png")))
+    if not images:
+        print("No sample images found under static/")
+        return
+    creatives = [make_creative(i, "/" + images[i % len(images)]) for i in range(n)]
+    jobs = n * len(FORMATS)
+
+    start = time.perf_counter()
+    sequential(creatives, FORMATS)
+    before = time.perf_counter() - start
+
+    resizer = BulkResizer(compositor=Compositor())
+    start = time.perf_counter()
+    asyncio.run(resizer.render_zip(creatives, FORMATS, "jpeg"))
+    after = time.perf_counter() - start
+    resizer.shutdown()
+
+    print(f"{n} creatives x {len(FORMATS)} formats = {jobs} renders, {resizer.max_workers} workers")
+    print(f"sequential, deepcopy + cold decode: {before:6.2f} s  ({jobs / before:5.1f} renders/s)")
+    print(f"BulkResizer:                        {after:6.2f} s  ({jobs / after:5.1f} renders/s)")
+
+if __name__ == "__main__":
+    main()
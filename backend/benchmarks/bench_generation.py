@@ -0,0 +1,48 @@
+"""
+/generate-bg under a burst of requests from a campaign team reusing a handful of
+prompts. Uses the stub generator with a fixed upstream latency, so the numbers
+show how many upstream calls the cache and request coalescing save.
+
+Run from backend/:  python -m benchmarks.bench_generation
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from app.services.asset_store import AssetStore
+from app.services.generation import GenerationCache, GenerationRequest, GenerationService, StubGenerator
+
+PROMPTS = [
+    "Autumn harvest table with pumpkins",
+    "autumn harvest  table with pumpkins",
+    "Minimal white studio backdrop",
+    "Festive christmas lights, bokeh",
+    "Fresh vegetables on a rustic wooden board",
+]
+
+async def burst(service: GenerationService, requests, use_cache: bool) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[service.generate(r, use_cache=use_cache) for r in requests])
+    return time.perf_counter() - start
+
+async def run(total: int = 200, latency: float = 0.25):
+    random.seed(0)
+    requests = [GenerationRequest(prompt=random.choice(PROMPTS), width=256, height=256) for _ in range(total)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AssetStore(root=os.path.join(tmp, "assets"), index_path=os.path.join(tmp, "index.jsonl"))
+        rows = []
+        for label, use_cache in (("no cache / no coalescing", False), ("cache + coalescing", True)):
+            generator = StubGenerator(latency=latency)
+            service = GenerationService(generator=generator, store=store, cache=GenerationCache())
+            elapsed = await burst(service, requests, use_cache)
+            rows.append((label, generator.calls, elapsed))
+
+    print(f"{total} requests over {len(PROMPTS)} prompts, upstream latency {latency * 1000:.0f} ms")
+    for label, calls, elapsed in rows:
+        print(f"{label:26s} upstream calls {calls:4d}   wall {elapsed:6.2f} s")
+
+if __name__ == "__main__":
+    asyncio.run(run())
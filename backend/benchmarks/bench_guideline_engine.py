@@ -0,0 +1,103 @@
+"""
+Per-creative cost of GuidelineEngine.validate copy checks: the compiled
+single-pass rule engine against the original per-claim re.search loop.
+
+Run from backend/:  python -m benchmarks.bench_guideline_engine
+"""
+import random
+import re
+import time
+
+from app.models.creative import Creative, TextLayer, CreativeFormat
+from app.services.guideline_engine import GuidelineEngine
+from app.services.rule_engine import CopyRule, CopyRuleEngine
+
+WORDS = [
+    "fresh", "tasty", "summer", "deal", "family", "bundle", "crunchy", "new", "range",
+    "bakery", "green", "guarantee", "£2", "50%", "survey", "only", "today", "value",
+]
+
+def make_creative(seed: int, layers: int = 8) -> Creative:
+    rng = random.Random(seed)
+    text_layers = []
+    for i in range(layers):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        text_layers.append(TextLayer(
+            id=f"t{i}", text=text, role="headline", font_family="Inter", font_size=32,
+            color="#000000", x=100, y=100 + i * 80, width=800, height=60, z_index=i
+        ))
+    return Creative(id=f"c{seed}", name="bench", format=CreativeFormat.SQUARE, assets=[], text_layers=text_layers)
+
+def legacy_copy_check(engine: GuidelineEngine, creative: Creative) -> list:
+    hits = []
+    for layer in creative.text_layers:
+        for claim in engine.forbidden_claims:
+            if re.search(claim, layer.text, re.IGNORECASE):
+                hits.append((layer.id, claim))
+        if re.search(r"£|\d+p|%", layer.text):
+            hits.append((layer.id, "price"))
+    return hits
+
+def compiled_copy_check(engine: GuidelineEngine, creative: Creative) -> list:
+    hits = []
+    for layer in creative.text_layers:
+        for hit in engine.copy_engine.scan(layer.text):
+            hits.append((layer.id, hit.rule.label))
+    return hits
+
+def scaling(creatives, n_rules: int, repeat: int):
+    # A campaign rule pack is usually much larger than the built-in claim list
+    claims = [f"claim{i:03d}" for i in range(n_rules)]
+    engine = CopyRuleEngine(CopyRule("COPY_RESTRICTION", c, c) for c in claims)
+    texts = [layer.text for creative in creatives for layer in creative.text_layers]
+
+    def legacy():
+        for text in texts:
+            for claim in claims:
+                re.search(claim, text, re.IGNORECASE)
+
+    def compiled():
+        for text in texts:
+            engine.scan(text)
+
+    results = []
+    for fn in (legacy, compiled):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        results.append(best / len(creatives))
+    return results
+
+def timed(fn, engine, creatives, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for creative in creatives:
+            fn(engine, creative)
+        best = min(best, time.perf_counter() - start)
+    return best / len(creatives)
+
+def main(n_creatives: int = 2000, repeat: int = 5):
+    engine = GuidelineEngine()
+    creatives = [make_creative(seed) for seed in range(n_creatives)]
+
+    for creative in creatives:
+        assert legacy_copy_check(engine, creative) == compiled_copy_check(engine, creative), creative.id
+
+    legacy = timed(legacy_copy_check, engine, creatives, repeat)
+    compiled = timed(compiled_copy_check, engine, creatives, repeat)
+    full = timed(lambda e, c: e.validate(c), engine, creatives, repeat)
+
+    print(f"creatives: {n_creatives}, text layers each: {len(creatives[0].text_layers)}")
+    print(f"legacy copy loop:      {legacy * 1e6:8.1f} us/creative")
+    print(f"compiled rule engine:  {compiled * 1e6:8.1f} us/creative ({legacy / compiled:.1f}x)")
+    print(f"full validate():       {full * 1e6:8.1f} us/creative")
+
+    for n_rules in (25, 100):
+        legacy, compiled = scaling(creatives[:500], n_rules, repeat)
+        print(f"{n_rules:3d} literal rules: legacy {legacy * 1e6:8.1f} us, compiled {compiled * 1e6:8.1f} us ({legacy / compiled:.1f}x)")
+
+if __name__ == "__main__":
+    main()
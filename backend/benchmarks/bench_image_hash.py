@@ -0,0 +1,60 @@
+"""
+Perceptual hashing and Hamming lookups for the asset library: hashing cost per image
+at ingest, and HammingIndex (multi-index hashing) against a NumPy scan of every stored
+hash, for duplicate (<= 7 bits) and similar (<= 11, 16 bits) queries as the library grows.
+
+Run from backend/:  python -m benchmarks.bench_image_hash
+"""
+import io
+import random
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_hash import HammingIndex, image_hashes
+from benchmarks.synthetic import image_bytes
+
+QUERIES = 200
+
+def bench_hashing():
+    for size, fmt in ((512, "PNG"), (2048, "PNG"), (2048, "JPEG")):
+        data = image_bytes(0, size, fmt)
+        start = time.perf_counter()
+        for _ in range(20):
+            image_hashes([Image.open(io.BytesIO(data))])
+        per_image = (time.perf_counter() - start) / 20
+        print(f"hash {size}px {fmt:4s}  {per_image * 1000:7.2f} ms per image (decode included)")
+
+def numpy_scan(table: np.ndarray, value: int, radius: int):
+    distances = np.bitwise_count(table ^ np.uint64(value))
+    hits = np.flatnonzero(distances <= radius)
+    return hits[np.argsort(distances[hits], kind="stable")]
+
+def bench_lookup():
+    rng = random.Random(0)
+    for n in (10_000, 100_000, 300_000):
+        values = [rng.getrandbits(64) for _ in range(n)]
+        index = HammingIndex()
+        start = time.perf_counter()
+        index.add_many((str(i), value) for i, value in enumerate(values))
+        print(f"{n:7d} hashes indexed in {(time.perf_counter() - start) * 1000:.0f} ms")
+        table = np.array(values, dtype=np.uint64)
+        # Queries are near-copies of stored hashes, as a re-upload would be
+        queries = [values[rng.randrange(n)] ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for _ in range(QUERIES)]
+        for radius in (7, 11, 16):
+            start = time.perf_counter()
+            found = [index.query(q, radius) for q in queries]
+            indexed = (time.perf_counter() - start) / QUERIES
+            start = time.perf_counter()
+            scanned = [numpy_scan(table, q, radius) for q in queries]
+            scan = (time.perf_counter() - start) / QUERIES
+            assert [len(f) for f in found] == [len(s) for s in scanned]
+            print(f"{n:7d} hashes, radius {radius:2d}: index {indexed * 1e6:8.1f} us   numpy scan {scan * 1e6:8.1f} us")
+
+def main():
+    bench_hashing()
+    bench_lookup()
+
+if __name__ == "__main__":
+    main()
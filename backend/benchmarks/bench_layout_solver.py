@@ -0,0 +1,34 @@
+"""
+Layouts scored per second by the vectorised LayoutSolver, per format and batch size,
+for a typical creative (packshot, logo, value tile, headline, subhead, CTA).
+
+Run from backend/:  python -m benchmarks.bench_layout_solver
+"""
+import time
+
+from app.ai.layout_solver import LayoutElement, LayoutSolver
+from app.models.creative import CreativeFormat
+
+ELEMENTS = [
+    LayoutElement("packshot", "packshot", 480, 480),
+    LayoutElement("logo", "logo", 160, 80),
+    LayoutElement("tile", "value_tile", 220, 220),
+    LayoutElement("headline", "headline", 700, 60),
+    LayoutElement("subhead", "subhead", 500, 40),
+    LayoutElement("cta", "cta", 220, 64),
+]
+
+def main(batches: int = 20):
+    print(f"{len(ELEMENTS)} elements, {batches} batches per run")
+    for creative_format in CreativeFormat:
+        width, height = map(int, creative_format.value.split("x"))
+        solver = LayoutSolver(width, height)
+        for batch_size in (256, 2048, 8192):
+            start = time.perf_counter()
+            layouts, scored = solver.solve(ELEMENTS, k=3, time_budget=60, batch_size=batch_size, max_batches=batches)
+            elapsed = time.perf_counter() - start
+            print(f"{creative_format.value:>10s} batch {batch_size:5d}: {scored / elapsed:10,.0f} layouts/s   "
+                  f"best cost {layouts[0].score:7.3f}")
+
+if __name__ == "__main__":
+    main()
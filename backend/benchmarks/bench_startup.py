@@ -0,0 +1,58 @@
+"""
+Cold-start cost: how long `import main` takes in a fresh interpreter and which heavy
+ML modules it pulls in, against importing those modules eagerly (as image_processing
+used to at import time), and each backend's load through the registry.
+
+Run from backend/:  python -m benchmarks.bench_startup
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY = ["rembg", "onnxruntime", "numba", "huggingface_hub", "google.generativeai"]
+ROUNDS = 5
+
+def run(code: str) -> str:
+    env = {**os.environ, "PRELOAD_BACKENDS": ""}
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+
+def timed_import(module: str) -> str:
+    return (f"import sys, time\nstart = time.perf_counter()\n"
+            f"try:\n    import {module}\nexcept Exception as e:\n    print('error', type(e).__name__); raise SystemExit\n"
+            f"print(time.perf_counter() - start)\n"
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+
+def measure(module: str):
+    times, loaded = [], ""
+    for _ in range(ROUNDS):
+        out = run(timed_import(module)).splitlines()
+        if not out or out[0].startswith("error"):
+            return None, out[0] if out else "no output"
+        times.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ""
+    return statistics.median(times), loaded
+
+def main():
+    for module in ["main", "app.services.image_processing", *HEAVY]:
+        seconds, loaded = measure(module)
+        if seconds is None:
+            print(f"import {module:32s} unavailable ({loaded})")
+        else:
+            print(f"import {module:32s} {seconds * 1000:8.0f} ms   heavy modules loaded: {loaded or 'none'}")
+
+    # Each backend loaded through the registry, as the preload or a first request would
+    code = ("import main\nfrom app.services.backends import backends\n"
+            "for name in backends.names():\n"
+            "    try:\n        backends.get(name)\n    except Exception:\n        pass\n"
+            "    s = backends.backend(name).status()\n"
+            "    print(name, s['state'], s['loadSeconds'], (s['error'] or '').splitlines()[0][:80] if s['error'] else '')\n")
+    code = "if __name__ == '__main__':\n" + "".join(f"    {line}\n" for line in code.splitlines())
+    for line in run(code).splitlines():
+        name, state, seconds, *error = line.split(" ", 3)
+        load = f"{float(seconds) * 1000:8.0f} ms" if seconds != "None" else "       - "
+        print(f"backend {name:31s} {load}   {state} {' '.join(error)}")
+
+if __name__ == "__main__":
+    main()
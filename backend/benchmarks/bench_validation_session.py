@@ -0,0 +1,66 @@
+"""
+Live revalidation while dragging: a full validate_creative on every move against an
+incremental ValidationSession that only re-checks the moved object. Reports are
+compared on every step.
+
+Run from backend/:  python -m benchmarks.bench_validation_session
+"""
+import random
+import time
+
+from app.services.rule_packs import rule_pack_registry
+from app.services.validation_service import validation_service
+from app.services.validation_session import ValidationSession
+
+KIT = {"colors": ["#00539F", "#FFFFFF", "#EE1C2E"], "fonts": ["Inter"]}
+
+def make_creative(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    objects = [{"type": "rect", "id": "bg", "left": 0, "top": 0, "width": 1080, "height": 1920, "fill": "#f4f4f4"}]
+    for i in range(n):
+        kind = rng.choice(["textbox", "image", "rect"])
+        obj = {
+            "type": kind, "id": f"o{i}", "left": rng.uniform(0, 1000), "top": rng.uniform(0, 1850),
+            "width": rng.uniform(40, 260), "height": rng.uniform(30, 160), "angle": rng.choice([0, 0, 0, 15]),
+            "fill": rng.choice(["#000000", "#FFFFFF", "#00539F", "#ff9900"]),
+        }
+        if kind == "textbox":
+            obj.update(text="Fresh deals this week", fontSize=rng.choice([10, 18, 32]), fontFamily="Inter")
+        objects.append(obj)
+    return {"width": 1080, "height": 1920, "objects": objects}
+
+def comparable(report):
+    return (report["score"], sorted(report["warnings"]), sorted(report["errors"]),
+            sorted((tuple(sorted((o["a"], o["b"]))), o["area"]) for o in report["overlaps"]), report["zones"])
+
+def drag(creative, index: int, steps: int, session: ValidationSession, kit, rules):
+    full = incremental = 0.0
+    obj = creative["objects"][index]
+    for step in range(steps):
+        obj["left"] += 7
+        obj["top"] += 3
+        start = time.perf_counter()
+        expected = validation_service.validate_creative(creative, prepared_kit=kit)
+        full += time.perf_counter() - start
+        start = time.perf_counter()
+        report, _ = session.validate(creative, rules, kit)
+        incremental += time.perf_counter() - start
+        assert comparable(report) == comparable(expected), step
+    return full / steps, incremental / steps
+
+def main(steps: int = 30):
+    kit = validation_service.prepare_brand_kit(KIT)
+    rules = rule_pack_registry.get()
+    for n in (50, 200, 500):
+        creative = make_creative(n)
+        text = next(i for i, o in enumerate(creative["objects"]) if o["type"] == "textbox")
+        shape = next(i for i, o in enumerate(creative["objects"]) if o["type"] == "rect" and o["id"] != "bg")
+        for label, index in (("text", text), ("shape", shape)):
+            session = ValidationSession("bench")
+            session.validate(creative, rules, kit)
+            full, incremental = drag(creative, index, steps, session, kit, rules)
+            print(f"{n:4d} objects, dragging {label:5s}: full {full * 1e3:7.2f} ms, "
+                  f"incremental {incremental * 1e3:7.2f} ms ({full / incremental:5.1f}x)")
+
+if __name__ == "__main__":
+    main()
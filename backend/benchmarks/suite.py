@@ -0,0 +1,386 @@
+"""
+Regression benchmarks for the backend hot paths, compared against stored baselines.
+
+    python -m benchmarks.suite                  run every case, compare with baselines.json
+    python -m benchmarks.suite -k validate      only cases whose name contains "validate"
+    python -m benchmarks.suite --save           record this run as the baseline
+    python -m benchmarks.suite --quick          fewer, shorter rounds (smoke run)
+
+Inputs come from benchmarks.synthetic with fixed seeds, AI generation uses the stub
+generator, and stores live in a temp dir, so a run never touches the network or the
+app's data. Each case is timed like timeit: calls are batched into rounds of at least
+`--min-round` seconds with the GC off. The fastest per-call time of `--rounds` rounds
+(`--stat min`, the figure least disturbed by other load; `--stat median` is available)
+is compared with the baseline. A case slower than its threshold (25% by default, more
+for disk-bound cases) fails the run with exit code 1.
+
+Baselines are only comparable on the machine that recorded them: re-record with --save
+on your reference machine before relying on the thresholds.
+Run from backend/.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("IMAGE_GENERATOR", "stub")
+
+from starlette.requests import Request
+
+from app.models.creative import CreativeFormat
+from app.services.asset_store import AssetStore
+from app.services.canvas import canonical_json, parse_canvas
+from app.services.contrast import contrast_analyzer
+from app.services.creative_store import CreativeStore
+from app.services.generation import GenerationCache, GenerationRequest, GenerationService, StubGenerator
+from app.services.guideline_engine import GuidelineEngine
+from app.services.resize_engine import resize_engine
+from app.services.rule_packs import rule_pack_registry
+from app.services.uploads import UploadPipeline
+from app.services.validation_service import validation_service
+from app.services.validation_session import ValidationSession
+from benchmarks.synthetic import FORMATS, creative_model, fabric_canvas, image_bytes
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 0.25
+DISK_THRESHOLD = 0.5  # fsync/page-cache noise on shared runners
+KIT = {"colors": ["#00539F", "#FFFFFF", "#EE1C2E"], "fonts": ["Inter", "Tesco Modern"]}
+# Distinct inputs per case, cycled so a run isn't one cache-hot canvas
+POOL = 8
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[str], Callable[[], Any]]  # workdir -> the operation to time
+    threshold: float = DEFAULT_THRESHOLD
+    bytes_per_call: int = 0
+    items_per_call: int = 1
+
+CASES: List[Case] = []
+
+def case(name: str, threshold: float = DEFAULT_THRESHOLD, bytes_per_call: int = 0, items_per_call: int = 1):
+    def register(setup):
+        CASES.append(Case(name, setup, threshold, bytes_per_call, items_per_call))
+        return setup
+    return register
+
+def cycle(items: List[Any]) -> Callable[[], Any]:
+    state = {"i": -1}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+    return next_item
+
+def slug(fmt: CreativeFormat) -> str:
+    return fmt.name.lower()
+
+# --- Validation ---
+
+def _validate_case(fmt: CreativeFormat, objects: int, text_layers: int, cold: bool = False):
+    def setup(workdir):
+        kit = validation_service.prepare_brand_kit(KIT)
+        canvases = cycle([fabric_canvas(seed, objects, text_layers, fmt) for seed in range(POOL)])
+
+        def op():
+            if cold:
+                # Every call re-renders the contrast background, as for a canvas seen for the first time
+                contrast_analyzer.luminance_cache.clear()
+            return validation_service.validate_creative(canvases(), prepared_kit=kit)
+        return op
+    return setup
+
+for fmt in FORMATS:
+    case(f"validate_creative[{slug(fmt)}-40obj]")(_validate_case(fmt, 40, 8))
+case("validate_creative[square-200obj]")(_validate_case(CreativeFormat.SQUARE, 200, 40))
+case("validate_creative[square-40obj-cold]")(_validate_case(CreativeFormat.SQUARE, 40, 8, cold=True))
+
+@case("validate_creative[square-40obj-from-json]")
+def _validate_json(workdir):
+    # As /validate receives it: JSON bytes parsed straight into a ParsedCanvas
+    kit = validation_service.prepare_brand_kit(KIT)
+    bodies = cycle([canonical_json(fabric_canvas(seed, 40, 8)) for seed in range(POOL)])
+    return lambda: validation_service.validate_creative(parse_canvas(bodies()), prepared_kit=kit)
+
+@case("validation_session[story-200obj-drag]")
+def _session_drag(workdir):
+    canvas = fabric_canvas(0, 200, 40, CreativeFormat.STORY)
+    session, rules = ValidationSession("bench"), rule_pack_registry.get()
+    kit = validation_service.prepare_brand_kit(KIT)
+    session.validate(canvas, rules, kit)
+    moved = next(obj for obj in canvas["objects"] if obj["type"] == "textbox")
+
+    def op():
+        moved["left"] = (moved["left"] + 7) % canvas["width"]
+        return session.validate(canvas, rules, kit)
+    return op
+
+def _guideline_case(fmt: CreativeFormat, text_layers: int, alcohol: bool = False):
+    def setup(workdir):
+        engine = GuidelineEngine()
+        creatives = cycle([creative_model(seed, text_layers, fmt, alcohol) for seed in range(POOL)])
+        return lambda: engine.validate(creatives())
+    return setup
+
+for fmt in FORMATS:
+    case(f"guideline_engine[{slug(fmt)}-8layers]")(_guideline_case(fmt, 8))
+case("guideline_engine[square-64layers]")(_guideline_case(CreativeFormat.SQUARE, 64))
+case("guideline_engine[square-8layers-alcohol]")(_guideline_case(CreativeFormat.SQUARE, 8, alcohol=True))
+
+# --- Resizing ---
+
+def _resize_case(target: CreativeFormat):
+    def setup(workdir):
+        creatives = cycle([creative_model(seed, 16, CreativeFormat.SQUARE) for seed in range(POOL)])
+        return lambda: resize_engine.resize(creatives(), target)
+    return setup
+
+for fmt in FORMATS:
+    case(f"resize_engine.resize[square->{slug(fmt)}-16layers]")(_resize_case(fmt))
+
+@case("resize_engine.resize_canvas[square->story-40obj]")
+def _resize_canvas(workdir):
+    canvases = cycle([fabric_canvas(seed, 40, 8) for seed in range(POOL)])
+    return lambda: resize_engine.resize_canvas(canvases(), CreativeFormat.STORY)
+
+@case("resize_engine.resize_canvas[square->all-40obj-parsed]", items_per_call=len(FORMATS))
+def _resize_canvas_parsed(workdir):
+    # One parse shared by every target format, as in bulk resizing
+    canvases = cycle([fabric_canvas(seed, 40, 8) for seed in range(POOL)])
+
+    def op():
+        canvas = parse_canvas(canvases())
+        return [resize_engine.resize_canvas(canvas, fmt) for fmt in FORMATS]
+    return op
+
+# --- Share & load ---
+
+def _creative_store(workdir: str) -> CreativeStore:
+    return CreativeStore(path=os.path.join(tempfile.mkdtemp(dir=workdir), "creatives.db"), legacy_dir=None)
+
+@case("share.save[40obj]", threshold=DISK_THRESHOLD)
+def _share_save(workdir):
+    store = _creative_store(workdir)
+    canvases = cycle([fabric_canvas(seed, 40, 8) for seed in range(POOL)])
+    return lambda: store.save(canvases())
+
+@case("share.save_patch[40obj]", threshold=DISK_THRESHOLD)
+def _share_patch(workdir):
+    store = _creative_store(workdir)
+    creative = store.save(fabric_canvas(0, 40, 8))
+    state = {"version": creative.version}
+
+    def op():
+        patch = [{"op": "replace", "path": "/objects/1/left", "value": state["version"] % 500}]
+        record, _ = store.save_patch(creative.id, state["version"], patch)
+        state["version"] = record.version
+    return op
+
+@case("share.load[40obj]")
+def _share_load(workdir):
+    store = _creative_store(workdir)
+    ids = cycle([store.save(fabric_canvas(seed, 40, 8)).id for seed in range(POOL)])
+    return lambda: store.load(ids())
+
+@case("share.load[40obj-after-20-patches-uncached]", threshold=DISK_THRESHOLD)
+def _share_load_uncached(workdir):
+    store = _creative_store(workdir)
+    record = store.save(fabric_canvas(0, 40, 8))
+    for version in range(1, 21):
+        record, _ = store.save_patch(record.id, version, [{"op": "replace", "path": "/objects/1/left", "value": version}])
+
+    def op():
+        store._rebuilt.clear()  # force the rebuild from the last snapshot plus deltas
+        return store.load(record.id)
+    return op
+
+# --- Uploads ---
+
+BOUNDARY = "benchboundary7MA4YWxkTrZu0gW"
+
+def multipart_body(files: List[bytes]) -> bytes:
+    parts = []
+    for i, data in enumerate(files):
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="files"; filename="packshot_{i}.png"\r\n'
+            f"Content-Type: image/png\r\n\r\n".encode() + data + b"\r\n"
+        )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+def upload_request(body: bytes, chunk_size: int = 64 * 1024) -> Request:
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        if chunks:
+            return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/upload/batch", "query_string": b"",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()),
+                    (b"content-length", str(len(body)).encode())],
+    }
+    return Request(scope, receive)
+
+def _upload_case(files: List[bytes]):
+    body = multipart_body(files)
+
+    def setup(workdir):
+        root = tempfile.mkdtemp(dir=workdir)
+        store = AssetStore(root=os.path.join(root, "assets"), index_path=os.path.join(root, "index.jsonl"))
+        pipeline = UploadPipeline(store=store)
+        loop = asyncio.new_event_loop()
+
+        def op():
+            # Forget stored digests so every upload takes the full write + probe + commit path
+            store._records.clear()
+            results = loop.run_until_complete(pipeline.receive(upload_request(body)))
+            assert all(r.error is None for r in results), results
+            return results
+        return op
+    return setup, len(body)
+
+for label, files in (("1x1024px", [image_bytes(0, 1024)]), ("8x256px", [image_bytes(i, 256) for i in range(8)])):
+    setup, size = _upload_case(files)
+    case(f"upload[{label}]", threshold=DISK_THRESHOLD, bytes_per_call=size, items_per_call=len(files))(setup)
+
+# --- Generation (stub backend) ---
+
+def _generation_case(use_cache: bool):
+    def setup(workdir):
+        root = tempfile.mkdtemp(dir=workdir)
+        store = AssetStore(root=os.path.join(root, "assets"), index_path=os.path.join(root, "index.jsonl"))
+        service = GenerationService(generator=StubGenerator(), store=store, cache=GenerationCache())
+        requests = cycle([GenerationRequest(prompt=f"Summer picnic scene {i}", width=256, height=256)
+                          for i in range(POOL)])
+        loop = asyncio.new_event_loop()
+        op = lambda: loop.run_until_complete(service.generate(requests(), use_cache=use_cache))
+        if use_cache:
+            for _ in range(POOL):
+                op()  # fill the cache so every timed call is a hit
+        return op
+    return setup
+
+case("generate[stub-256px-cached]")(_generation_case(True))
+case("generate[stub-256px-uncached]", threshold=DISK_THRESHOLD)(_generation_case(False))
+
+# --- Runner ---
+
+def _round(op: Callable[[], Any], number: int) -> float:
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def measure(op: Callable[[], Any], rounds: int, min_round: float) -> Dict[str, Any]:
+    op()  # warm-up: imports, caches, lazy pools
+    # As timeit.autorange: 1, 2, 5, 10, 20, 50, ... calls until a round is long enough
+    for number in (m * 10 ** e for e in range(9) for m in (1, 2, 5)):
+        elapsed = _round(op, number)
+        if elapsed >= min_round:
+            break
+    times = [elapsed / number] + [_round(op, number) / number for _ in range(rounds - 1)]
+    return {"median": statistics.median(times), "min": min(times), "rounds": rounds, "number": number}
+
+def machine() -> Dict[str, Any]:
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"machine": None, "cases": {}}
+    with open(path) as f:
+        return json.load(f)
+
+def compare(result: Dict[str, Any], baseline: Optional[Dict[str, Any]], threshold: float, stat: str = "min") -> str:
+    if baseline is None:
+        return "new"
+    ratio = result[stat] / baseline[stat]
+    if ratio > 1 + threshold:
+        return "REGRESSED"
+    if ratio < 1 / (1 + threshold):
+        return "improved"
+    return "ok"
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} us"
+    return f"{seconds * 1e3:8.2f} ms"
+
+def run(pattern: Optional[str] = None, rounds: int = 7, min_round: float = 0.05,
+        baseline_path: str = BASELINE_PATH, save: bool = False, output: Optional[str] = None,
+        stat: str = "min") -> int:
+    baselines = load_baselines(baseline_path)
+    if baselines.get("machine") and baselines["machine"] != machine() and not save:
+        print(f"warning: baselines were recorded on {baselines['machine']}, this is {machine()}", file=sys.stderr)
+
+    selected = [c for c in CASES if not pattern or pattern in c.name]
+    results, regressions = {}, []
+    print(f"{'case':52s} {'median':>11s} {'min':>11s} {'throughput':>14s} {'baseline':>11s} {'change':>8s}  status")
+    with tempfile.TemporaryDirectory() as workdir:
+        for c in selected:
+            result = measure(c.setup(workdir), rounds, min_round)
+            results[c.name] = result
+            baseline = baselines["cases"].get(c.name)
+            status = compare(result, baseline, c.threshold, stat)
+            if status == "REGRESSED":
+                regressions.append(c.name)
+            per_second = c.items_per_call / result["median"]
+            throughput = (f"{c.bytes_per_call / result['median'] / 1e6:9.1f} MB/s" if c.bytes_per_call
+                          else f"{per_second:10.0f} /s")
+            change = f"{(result[stat] / baseline[stat] - 1) * 100:+7.1f}%" if baseline else ""
+            previous = _format_time(baseline[stat]) if baseline else ""
+            print(f"{c.name:52s} {_format_time(result['median'])} {_format_time(result['min'])} {throughput:>14s} "
+                  f"{previous:>11s} {change:>8s}  {status}", flush=True)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"machine": machine(), "cases": results}, f, indent=2)
+    if save:
+        baselines["machine"] = machine()
+        baselines["cases"].update({name: {"median": r["median"], "min": r["min"]} for name, r in results.items()})
+        with open(baseline_path, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"saved {len(results)} baselines to {baseline_path}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backend hot-path benchmarks with stored baselines")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file (default: benchmarks/baselines.json)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-round", type=float, default=0.05, help="minimum seconds per timed round")
+    parser.add_argument("--quick", action="store_true", help="3 rounds of at least 10 ms")
+    parser.add_argument("--stat", choices=["min", "median"], default="min", help="statistic compared with the baseline")
+    parser.add_argument("--json", dest="output", help="also write the results to this file")
+    parser.add_argument("--list", action="store_true", help="list case names and exit")
+    args = parser.parse_args(argv)
+    if args.list:
+        for c in CASES:
+            print(c.name)
+        return 0
+    rounds, min_round = (3, 0.01) if args.quick else (args.rounds, args.min_round)
+    return run(args.pattern, rounds, min_round, args.baseline, args.save, args.output, args.stat)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Seeded synthetic inputs for the benchmark suite: Fabric canvases and Creative models in
+every CreativeFormat, and image files for uploads. The same seed always gives the same
+input, so runs on different commits measure the same work.
+"""
+import io
+import random
+from typing import Any, Dict, List
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.models.creative import Asset, AssetRole, AssetType, Creative, CreativeFormat, TextLayer
+from app.services.resize_engine import format_size
+
+FORMATS = list(CreativeFormat)
+WORDS = [
+    "fresh", "tasty", "summer", "deal", "family", "bundle", "crunchy", "new", "range", "bakery",
+    "value", "today", "only", "share", "bigger", "pack", "favourite", "£2", "50%", "guarantee",
+]
+TAGS = ["Only at Tesco", "Available at Tesco", "Selected stores. While stocks last.", "Exclusive"]
+ROLES = ["headline", "subhead", "cta", "tag"]
+FILLS = ["#000000", "#FFFFFF", "#00539F", "#EE1C2E", "#ff9900", "rgb(20, 20, 20)"]
+FONTS = ["Inter", "Arial", "Tesco Modern"]
+# Fabric object types for the non-text layers, weighted towards images as in real creatives
+SHAPES = ["image", "image", "rect", "circle"]
+
+def _copy(rng: random.Random, role: str) -> str:
+    if role == "tag":
+        return rng.choice(TAGS)
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 9)))
+
+def fabric_canvas(seed: int, objects: int = 40, text_layers: int = 8,
+                  fmt: CreativeFormat = CreativeFormat.SQUARE) -> Dict[str, Any]:
+    """
+    A Fabric canvas with a full-bleed background, `text_layers` text objects and
+    `objects - text_layers` images and shapes, all inside the format's bounds.
+    """
+    rng = random.Random(seed)
+    width, height = format_size(fmt)
+    background = {"type": "rect", "id": "background", "left": 0, "top": 0, "width": width, "height": height,
+                  "fill": rng.choice(["#f4f4f4", "#00539F", "#ffffff"])}
+    items: List[Dict[str, Any]] = []
+    for i in range(max(objects, text_layers)):
+        obj = {
+            "id": f"o{i}", "left": rng.uniform(0, width * 0.9), "top": rng.uniform(0, height * 0.9),
+            "width": rng.uniform(width * 0.05, width * 0.4), "height": rng.uniform(height * 0.03, height * 0.2),
+            "angle": rng.choice([0, 0, 0, 0, 15]), "scaleX": rng.choice([1, 1, 0.5, 1.5]),
+            "scaleY": rng.choice([1, 1, 0.5, 1.5]), "fill": rng.choice(FILLS),
+        }
+        if i < text_layers:
+            role = ROLES[i % len(ROLES)]
+            obj.update(type="textbox", text=_copy(rng, role), role=role, fontFamily=rng.choice(FONTS),
+                       fontSize=rng.choice([10, 14, 24, 36, 64]))
+        else:
+            obj["type"] = rng.choice(SHAPES)
+            if obj["type"] == "image":
+                # Not on disk: composited as empty, so timings don't depend on local sample files
+                obj["src"] = f"/static/bench/packshot_{i}.png"
+        items.append(obj)
+    rng.shuffle(items)
+    return {"version": "5.3.0", "width": width, "height": height, "background": "#ffffff",
+            "objects": [background, *items]}
+
+def creative_model(seed: int, text_layers: int = 8, fmt: CreativeFormat = CreativeFormat.SQUARE,
+                   alcohol: bool = False) -> Creative:
+    """
+    A Creative with packshot/logo assets and text layers cycling through every role.
+    """
+    rng = random.Random(seed)
+    width, height = format_size(fmt)
+    layers = []
+    for i in range(text_layers):
+        role = ROLES[i % len(ROLES)]
+        layers.append(TextLayer(
+            id=f"t{i}", text=_copy(rng, role), role=role, font_family=rng.choice(FONTS),
+            font_size=rng.choice([14, 24, 36, 64]), color=rng.choice(FILLS),
+            x=rng.uniform(0, width * 0.8), y=rng.uniform(0, height * 0.8),
+            width=rng.uniform(width * 0.1, width * 0.6), height=rng.uniform(40, 160), z_index=i,
+        ))
+    assets = [
+        Asset(id="packshot", url="/static/bench/packshot.png", type=AssetType.IMAGE, role=AssetRole.PACKSHOT,
+              name="red wine bottle" if alcohol else "crisps multipack"),
+        Asset(id="logo", url="/static/bench/logo.png", type=AssetType.IMAGE, role=AssetRole.LOGO, name="brand logo"),
+    ]
+    return Creative(id=f"c{seed}", name=f"bench {seed}", format=fmt, assets=assets, text_layers=layers,
+                    background_color="#ffffff")
+
+def image_bytes(seed: int, size: int = 512, fmt: str = "PNG") -> bytes:
+    """
+    A packshot-like image encoded as `fmt`: flat rectangles over a photo-like grain, so
+    it compresses about as badly as a real product shot.
+    """
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed).normal(128, 24, (size, size, 3))
+    grain = Image.fromarray(noise.clip(0, 255).astype(np.uint8), "RGB")
+    image = Image.blend(Image.new("RGB", (size, size), tuple(rng.randrange(256) for _ in range(3))), grain, 0.3)
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x0, y0 = rng.randrange(size), rng.randrange(size)
+        draw.rectangle((x0, y0, x0 + rng.randrange(size // 2), y0 + rng.randrange(size // 2)),
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
@@ -1,11 +1,25 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
-from app.routers import creative
+import asyncio
+
 from dotenv import load_dotenv
 
+# Before the app imports: several modules read their settings from the environment at import time
 load_dotenv()
 
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from app.routers import creative
+from app.services.batch_validation import batch_validator
+from app.services.background_removal import background_remover
+from app.services.bulk_resize import bulk_resizer
+from app.services.creative_store import creative_store
+from app.services.ai_jobs import job_queue
+from app.services.asset_store import asset_store
+from app.services.backends import backends
+from app.services import telemetry  # registers the cache and worker pool gauges
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiler import PROFILING_ENABLED, ProfilingMiddleware
+from app.utils.static_files import AssetStaticFiles
+
 app = FastAPI(title="CreativePilot AI API")
 
 # CORS
@@ -15,14 +29,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Content-Disposition", "X-Export-Attempts", "X-Export-Quality", "X-Export-Subsampling",
+                    "X-Export-Scale", "X-Export-Size", "X-Profile-Id"],
 )
+# Request latency by route template for /metrics; opt-in per-request sampling profiles
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
-# Static files for serving generated images
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Static files for serving generated images and uploaded assets
+# (strong ETags, immutable caching for hashed/generated files, ranges, WebP/AVIF variants)
+app.mount("/static", AssetStaticFiles(directory="static"), name="static")
 
 # Routers
-from app.routers import creative
+from app.routers import creative, assets, jobs, metrics
 app.include_router(creative.router, prefix="/api/creative", tags=["creative"])
+app.include_router(assets.router, prefix="/api/assets", tags=["assets"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(metrics.router, tags=["metrics"])
+
+@app.on_event("startup")
+async def start_job_queue():
+    # Picks up jobs left queued or running by the previous process
+    await job_queue.start()
+
+@app.on_event("startup")
+async def preload_backends():
+    # Loads PRELOAD_BACKENDS in the background; the server accepts requests meanwhile (see /ready)
+    backends.start_preload()
+
+@app.on_event("startup")
+async def backfill_asset_hashes():
+    # Assets stored before perceptual hashing get hashed in the background, off the startup path
+    asyncio.get_running_loop().run_in_executor(None, asset_store.backfill_hashes)
+
+@app.on_event("shutdown")
+async def shutdown_worker_pools():
+    backends.stop_preload()
+    await job_queue.stop()
+    batch_validator.shutdown()
+    background_remover.shutdown()
+    bulk_resizer.shutdown()
+    creative_store.close()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,23 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import creative
+from app.services.brand_kit import BrandKitIndex
+
+@pytest.mark.parametrize("tolerance", ["abc", [1], {"a": 1}, "nan", float("inf"), -3])
+def test_malformed_color_tolerance_falls_back_to_exact_matching(tolerance):
+    index = BrandKitIndex.from_brand_kit({"colors": ["#ff0000"], "colorTolerance": tolerance})
+    assert index.color_tolerance == 0.0
+    assert index.off_palette_colors(["#fe0000", "#ff0000"]) == ["#fe0000"]
+
+def test_numeric_string_tolerance_is_used():
+    index = BrandKitIndex.from_brand_kit({"colors": ["#ff0000"], "colorTolerance": "5"})
+    assert index.off_palette_colors(["#fe0000"]) == []
+
+def test_validate_with_malformed_color_tolerance():
+    app = FastAPI()
+    app.include_router(creative.router, prefix="/api/creative")
+    body = {"creative": {"objects": [{"type": "rect", "fill": "#fe0000", "width": 10, "height": 10}]},
+            "brandKit": {"colors": ["#ff0000"], "colorTolerance": "abc"}}
+    assert TestClient(app).post("/api/creative/validate", json=body).status_code == 200
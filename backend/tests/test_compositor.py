@@ -0,0 +1,38 @@
+import base64
+import io
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.routers import creative
+from app.services.compositor import _image_bytes
+from app.utils.cache import LRUCache
+
+def _data_url(size):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (255, 0, 0)).save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+def test_lru_cache_evicts_by_weight():
+    cache = LRUCache(maxsize=100, maxweight=2 * 100 * 100 * 4, weigh=_image_bytes)
+    for key in "abc":
+        cache.put(key, Image.new("RGBA", (100, 100)))
+    assert "a" not in cache and "b" in cache and "c" in cache
+    assert cache.weight == 2 * 100 * 100 * 4
+
+    cache.put("huge", Image.new("RGBA", (300, 300)))
+    assert len(cache) == 0 and cache.weight == 0
+
+    cache.put("d", Image.new("L", (100, 100)))
+    assert cache.pop("d") is not None and cache.weight == 0
+
+def test_decompression_bomb_source_is_rejected(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+    app = FastAPI()
+    app.include_router(creative.router, prefix="/api/creative")
+    body = {"creative": {"width": 100, "height": 100,
+                         "objects": [{"type": "image", "src": _data_url((50, 50)), "left": 0, "top": 0}]}}
+    response = TestClient(app).post("/api/creative/export", json=body)
+    assert response.status_code == 422
+    assert "decompression" in response.json()["detail"]
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+from app.services.jobs import RUNNING, SUCCEEDED, Job, JobQueue, MemoryJobStore
+
+async def _collect(stream, limit: float = 2.0):
+    states = []
+    async def run():
+        async for state in stream:
+            if state is not None:
+                states.append(state["status"])
+    await asyncio.wait_for(run(), limit)
+    return states
+
+def test_watch_yields_final_state_when_job_finishes_after_first_yield():
+    async def main():
+        queue = JobQueue(MemoryJobStore())
+        release = asyncio.Event()
+
+        async def handler(job, progress):
+            await release.wait()
+            return {"ok": True}
+
+        queue.register("slow", handler)
+        job = await queue.submit("slow", {})
+        while job.status != RUNNING:
+            await asyncio.sleep(0.01)
+
+        stream = queue.watch(job.id)
+        first = await stream.__anext__()
+        # The job finishes while the watcher is suspended at its first yield
+        release.set()
+        while not job.finished:
+            await asyncio.sleep(0.01)
+        rest = await _collect(stream)
+        await queue.stop()
+        return [first["status"]] + rest
+
+    assert asyncio.run(main()) == [RUNNING, SUCCEEDED]
+
+class _StaleStore(MemoryJobStore):
+    """Reads return the row as it was before the final save, slowly."""
+
+    def __init__(self):
+        super().__init__()
+        self.stale = None
+
+    def get(self, job_id):
+        time.sleep(0.2)
+        return Job(**self.stale.to_dict())
+
+def test_watch_subscribes_before_reading_the_store():
+    async def main():
+        store = _StaleStore()
+        queue = JobQueue(store)
+        job = Job(id="j1", kind="slow", params={}, status=RUNNING)
+        store.stale = Job(**job.to_dict())
+        store.save(job)
+
+        watcher = asyncio.create_task(_collect(queue.watch(job.id)))
+        await asyncio.sleep(0.05)  # the watcher is reading the stale row
+        # _finish has already dropped the job from _jobs; its final state is saved and published now
+        job.status, job.finished_at = SUCCEEDED, time.time()
+        await queue._persist(job)
+        return await watcher
+
+    assert asyncio.run(main()) == [RUNNING, SUCCEEDED]
@@ -0,0 +1,25 @@
+import pytest
+
+from app.utils.json_patch import JsonPatchError, apply_patch, parse_pointer
+
+@pytest.mark.parametrize("pointer", [None, 5, [], {"a": 1}])
+def test_parse_pointer_rejects_non_strings(pointer):
+    with pytest.raises(JsonPatchError):
+        parse_pointer(pointer)
+
+@pytest.mark.parametrize("op", [
+    "add",
+    {"path": "/a"},
+    {"op": None, "path": "/a"},
+    {"op": "add", "value": 1},
+    {"op": "add", "path": 1, "value": 1},
+    {"op": "copy", "path": "/b"},
+    {"op": "move", "from": 3, "path": "/b"},
+])
+def test_apply_patch_rejects_malformed_ops(op):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": 1}, [op])
+
+def test_apply_patch_move_and_copy():
+    doc = apply_patch({"a": 1}, [{"op": "copy", "from": "/a", "path": "/b"}, {"op": "move", "from": "/a", "path": "/c"}])
+    assert doc == {"b": 1, "c": 1}
@@ -0,0 +1,18 @@
+import json
+
+import pytest
+
+from app.services.rule_packs import RulePackError, RulePackRegistry, compile_rule_pack
+
+@pytest.mark.parametrize("section", ["copy", "tags", "alcohol", "geometry", "scoring"])
+@pytest.mark.parametrize("value", [["a"], "text", 3])
+def test_non_mapping_sections_are_rejected(section, value):
+    with pytest.raises(RulePackError, match=f"{section} must be a mapping"):
+        compile_rule_pack({"id": "demo", "version": 1, section: value})
+
+def test_registry_error_names_the_pack_file(tmp_path):
+    (tmp_path / "demo.json").write_text(json.dumps({"id": "demo", "version": 1, "copy": ["no claims"]}))
+    registry = RulePackRegistry(str(tmp_path), default="demo")
+    with pytest.raises(RulePackError, match="^demo.json: copy must be a mapping$"):
+        registry.get("demo")
+    assert registry.available() == [{"id": "demo", "error": "demo.json: copy must be a mapping"}]
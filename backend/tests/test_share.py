@@ -0,0 +1,45 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import creative
+from app.services.creative_store import CreativeStore
+
+MALFORMED = [
+    {"objects": "notalist"},
+    {"objects": [1, 2]},
+    {"width": "abc", "objects": []},
+    {"objects": [{"type": "text", "text": "x", "fontSize": "big"}]},
+]
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(creative, "creative_store", CreativeStore(str(tmp_path / "creatives.db"), legacy_dir=None))
+    app = FastAPI()
+    app.include_router(creative.router, prefix="/api/creative")
+    return TestClient(app)
+
+@pytest.mark.parametrize("body", MALFORMED)
+def test_malformed_canvases_are_shared_unscored(client, body):
+    created = client.post("/api/creative/share", json=body)
+    assert created.status_code == 200
+    share_id = created.json()["id"]
+    assert client.put(f"/api/creative/share/{share_id}", json=body).status_code == 200
+    patched = client.patch(f"/api/creative/share/{share_id}",
+                           json={"baseVersion": 2, "patch": [{"op": "add", "path": "/name", "value": "x"}]})
+    assert patched.status_code == 200
+    assert client.get(f"/api/creative/load/{share_id}").json() == {**body, "name": "x"}
+
+MALFORMED_PATCHES = [
+    [{"op": "add", "path": 5, "value": 1}],
+    [{"op": "move", "from": [], "path": "/name"}],
+    [{"op": "copy", "path": "/name"}],
+    [{"path": "/name", "value": 1}],
+    [{"op": 7, "path": "/name"}],
+]
+
+@pytest.mark.parametrize("patch", MALFORMED_PATCHES)
+def test_malformed_patch_ops_are_rejected(client, patch):
+    share_id = client.post("/api/creative/share", json={"objects": []}).json()["id"]
+    response = client.patch(f"/api/creative/share/{share_id}", json={"baseVersion": 1, "patch": patch})
+    assert response.status_code == 422
@@ -0,0 +1,19 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import creative
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(creative.router, prefix="/api/creative")
+    return TestClient(app)
+
+@pytest.mark.parametrize("rule_pack", ['5', '["tesco"]', '{"name": "tesco"}', 'true'])
+def test_ndjson_batch_rejects_non_string_rule_pack(client, rule_pack):
+    body = f'{{"rulePack": {rule_pack}}}\n{{"objects": []}}\n'
+    response = client.post("/api/creative/validate/batch", content=body,
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 422
+    assert response.json() == {"detail": "rulePack on line 1 must be a string"}
@@ -21,30 +21,57 @@ const AssetManager = ({ onSelectImage }) => {
         return `http://127.0.0.1:8000${url}`;
     };
 
+    // Sidebar thumbnails use a small server-side derivative instead of the full-resolution image
+    const getThumbUrl = (assetId) => getFullUrl(`/api/assets/${assetId}?w=256&h=256&fmt=webp`);
+
+    const waitForJob = (jobId) => new Promise((resolve, reject) => {
+        const events = new EventSource(`http://127.0.0.1:8000/api/jobs/${jobId}/events`);
+        events.addEventListener('done', (event) => {
+            events.close();
+            const job = JSON.parse(event.data);
+            if (job.status === 'succeeded') resolve(job.result);
+            else reject(new Error(job.error || job.status));
+        });
+        events.onerror = () => {
+            events.close();
+            reject(new Error('Lost connection to job updates'));
+        };
+    });
+
     const onDrop = async (acceptedFiles) => {
+        if (!acceptedFiles.length) return;
         setUploading(true);
         const formData = new FormData();
-        formData.append('file', acceptedFiles[0]);
+        acceptedFiles.forEach((file) => formData.append('files', file));
 
         try {
-            const response = await axios.post('http://127.0.0.1:8000/api/creative/upload', formData, {
+            // One request for the whole drop; the server stores each file as it finishes streaming
+            const response = await axios.post('http://127.0.0.1:8000/api/creative/upload/batch', formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
             });
-            const newAsset = {
-                id: Date.now(),
-                url: getFullUrl(response.data.url),
-                name: response.data.filename,
-            };
-            setAssets([...assets, newAsset]);
+            const results = response.data.results;
+            const uploaded = results
+                .filter((result) => !result.error)
+                .map((result, i) => ({
+                    id: `${Date.now()}-${i}`,
+                    url: getFullUrl(result.url),
+                    thumbUrl: getThumbUrl(result.id),
+                    name: result.filename,
+                }));
+            setAssets([...assets, ...uploaded]);
+            const failed = results.filter((result) => result.error);
+            if (failed.length) {
+                alert(failed.map((result) => `${result.filename}: ${result.error}`).join('\n'));
+            }
         } catch (error) {
             console.error('Upload failed:', error);
-            alert('Upload failed!');
+            alert(error.response?.data?.detail || 'Upload failed!');
         } finally {
             setUploading(false);
         }
     };
 
-    const { getRootProps, getInputProps, isDragActive } = useDropzone({ onDrop });
+    const { getRootProps, getInputProps, isDragActive } = useDropzone({ onDrop, accept: { 'image/*': ['.png', '.jpg', '.jpeg', '.gif', '.webp'] } });
 
     const handleRemoveBg = async (asset) => {
         try {
@@ -69,14 +96,15 @@ const AssetManager = ({ onSelectImage }) => {
         setGenerating(true);
         setError(null);
         try {
-            const formData = new FormData();
-            formData.append('prompt', prompt);
-            const response = await axios.post('http://127.0.0.1:8000/api/creative/generate-bg', formData);
+            // Queue the generation and follow its progress instead of holding a request open
+            const { data: job } = await axios.post('http://127.0.0.1:8000/api/jobs/generate-bg', { params: { prompt } });
+            const result = await waitForJob(job.id);
 
             const newAsset = {
                 id: Date.now(),
-                url: getFullUrl(response.data.url),
-                name: response.data.name,
+                url: getFullUrl(result.url),
+                thumbUrl: getThumbUrl(result.id),
+                name: result.name,
             };
             setAssets(prev => [...prev, newAsset]);
         } catch (error) {
@@ -111,7 +139,7 @@ const AssetManager = ({ onSelectImage }) => {
                                 </div>
                                 <div className="space-y-0.5">
                                     <p className="text-sm font-medium">Click to upload</p>
-                                    <p className="text-xs text-muted-foreground">PNG, JPG up to 10MB</p>
+                                    <p className="text-xs text-muted-foreground">PNG, JPG, GIF, WebP up to 25MB</p>
                                 </div>
                             </div>
                         )}
@@ -177,7 +205,7 @@ const AssetManager = ({ onSelectImage }) => {
                         {assets.map((asset) => (
                             <div key={asset.id} className="group relative aspect-square rounded-lg border bg-muted overflow-hidden hover:ring-2 hover:ring-primary/50 transition-all hover:scale-[1.02] cursor-pointer shadow-sm hover:shadow-md">
                                 <img
-                                    src={asset.url}
+                                    src={asset.thumbUrl || asset.url}
                                     alt={asset.name}
                                     className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-110"
                                     onClick={() => onSelectImage(asset.url)}
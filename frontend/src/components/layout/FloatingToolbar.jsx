@@ -7,7 +7,7 @@ import { applyAutoLayout } from '@/lib/layoutEngine';
 import { exportCanvas } from '@/lib/exportEngine';
 
 const FloatingToolbar = ({ onExport, onValidate, onAddText, canvasRef, onOpenTemplates }) => {
-    const { creative, updateFormat, undo, redo, validateCreative, saveHistory } = useCreativeStore();
+    const { creative, updateFormat, undo, redo, validateCreative, saveHistory, shareCreative, resolveShareConflict } = useCreativeStore();
     const [position, setPosition] = React.useState({ x: 0, y: 0 });
     const [isDragging, setIsDragging] = React.useState(false);
     const dragStartRef = React.useRef({ x: 0, y: 0 });
@@ -62,10 +62,43 @@ const FloatingToolbar = ({ onExport, onValidate, onAddText, canvasRef, onOpenTem
 
     const handleValidate = () => {
         if (canvasRef.current) {
-            validateCreative(canvasRef.current.toJSON());
+            // Include object ids so the validation session can match objects between calls
+            validateCreative(canvasRef.current.toJSON(['id']));
         }
     };
 
+    const handleShare = async () => {
+        if (!canvasRef.current) return;
+        const canvasJson = canvasRef.current.toJSON(['id']);
+        let result = await shareCreative(canvasJson);
+        if (result?.conflict) {
+            const overwrite = window.confirm(
+                'Someone else saved a newer version of this creative.\n\n' +
+                'OK: overwrite it with your version.\nCancel: discard your edits and load theirs (undo brings yours back).'
+            );
+            result = await resolveShareConflict(result, overwrite ? 'overwrite' : 'reload', canvasJson);
+            if (result && !overwrite) {
+                saveHistory(canvasRef.current.toJSON());
+                canvasRef.current.loadFromJSON(result.json, () => {
+                    canvasRef.current.renderAll();
+                });
+            }
+        } else if (result?.rebased) {
+            // Show the other writer's changes merged with ours
+            saveHistory(canvasRef.current.toJSON());
+            canvasRef.current.loadFromJSON(result.json, () => {
+                canvasRef.current.renderAll();
+            });
+        }
+        if (!result) {
+            alert('Share failed.');
+            return;
+        }
+        const link = `${window.location.origin}${result.url}`;
+        await navigator.clipboard?.writeText(link).catch(() => {});
+        alert(`Share link copied: ${link}`);
+    };
+
     const handleUndo = () => {
         const json = undo();
         if (json && canvasRef.current) {
@@ -140,6 +173,11 @@ const FloatingToolbar = ({ onExport, onValidate, onAddText, canvasRef, onOpenTem
                     <LayoutGrid className="w-3.5 h-3.5 text-white/70" />
                     <span>AI Layout</span>
                 </button>
+
+                <button className="flex items-center gap-1.5 px-2 py-1.5 rounded-md hover:bg-white/10 transition" onClick={handleShare}>
+                    <Share2 className="w-3.5 h-3.5 text-white/70" />
+                    <span>Share</span>
+                </button>
             </div>
 
             <div className="border-t border-white/10"></div>
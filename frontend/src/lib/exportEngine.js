@@ -1,4 +1,49 @@
-export const exportCanvas = (canvas, format = 'png', quality = 1.0) => {
+import axios from 'axios';
+
+const EXPORT_URL = 'http://localhost:8000/api/creative/export';
+const MAX_EXPORT_BYTES = 500 * 1024; // 500KB
+
+// The server compositor only draws plain images and rects; text would come out in a
+// fallback font and effects would be dropped, so anything else is exported in the browser.
+const SERVER_KINDS = new Set(['image', 'rect']);
+
+const serverCanRender = (json) => {
+    const objects = [...(json.objects || []), ...(json.backgroundImage ? [json.backgroundImage] : [])];
+    if (json.overlayImage || json.clipPath || (json.background && typeof json.background !== 'string')) return false;
+    return objects.every((obj) =>
+        SERVER_KINDS.has(String(obj.type).toLowerCase())
+        && !obj.shadow && !obj.clipPath && !(obj.filters && obj.filters.length)
+        && !(obj.stroke && obj.strokeWidth) && !obj.skewX && !obj.skewY
+        && (obj.fill == null || typeof obj.fill === 'string'));
+};
+
+// Exports in the browser. Canvases the server renders identically go to the server instead,
+// which finds the best quality under the size limit in one request.
+export const exportCanvas = async (canvas, format = 'png') => {
+    if (!canvas) return null;
+    const json = canvas.toJSON();
+    if (!serverCanRender(json)) return exportCanvasLocally(canvas, format);
+    try {
+        const response = await axios.post(EXPORT_URL, {
+            creative: { ...json, width: canvas.getWidth(), height: canvas.getHeight() },
+            format,
+            maxBytes: MAX_EXPORT_BYTES,
+            multiplier: 2,
+        }, { responseType: 'blob' });
+
+        const disposition = response.headers['content-disposition'] || '';
+        const filename = (disposition.match(/filename="([^"]+)"/) || [])[1] || `creative.${format}`;
+        const url = URL.createObjectURL(response.data);
+        downloadImage(url, filename);
+        setTimeout(() => URL.revokeObjectURL(url), 1000);
+        return response.data;
+    } catch (error) {
+        console.error('Server export failed, exporting in the browser', error);
+        return exportCanvasLocally(canvas, format);
+    }
+};
+
+const exportCanvasLocally = (canvas, format = 'png', quality = 1.0) => {
     return new Promise((resolve) => {
         if (!canvas) return resolve(null);
 
@@ -11,7 +56,7 @@ export const exportCanvas = (canvas, format = 'png', quality = 1.0) => {
 
         // Check size
         let sizeInBytes = (dataURL.length * 3) / 4;
-        const maxSize = 500 * 1024; // 500KB
+        const maxSize = MAX_EXPORT_BYTES;
 
         if (sizeInBytes <= maxSize) {
             downloadImage(dataURL, `creative.${format}`);
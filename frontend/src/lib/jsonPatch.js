@@ -0,0 +1,64 @@
+// Minimal RFC 6902 diff, applied by the backend with app/utils/json_patch.apply_patch:
+// objects are diffed key by key, arrays element by element, anything else is replaced.
+const escape = (key) => String(key).replace(/~/g, '~0').replace(/\//g, '~1');
+
+const isObject = (value) => value !== null && typeof value === 'object' && !Array.isArray(value);
+
+const sameType = (a, b) =>
+    Array.isArray(a) === Array.isArray(b) && isObject(a) === isObject(b) && typeof a === typeof b && (a === null) === (b === null);
+
+const equal = (a, b) => a === b || JSON.stringify(a) === JSON.stringify(b);
+
+export const createPatch = (oldDoc, newDoc, path = '') => {
+    if (!sameType(oldDoc, newDoc)) return [{ op: 'replace', path, value: newDoc }];
+
+    if (isObject(oldDoc)) {
+        const ops = [];
+        Object.keys(oldDoc).forEach((key) => {
+            if (!(key in newDoc)) ops.push({ op: 'remove', path: `${path}/${escape(key)}` });
+        });
+        Object.entries(newDoc).forEach(([key, value]) => {
+            const child = `${path}/${escape(key)}`;
+            if (!(key in oldDoc)) ops.push({ op: 'add', path: child, value });
+            else if (!equal(oldDoc[key], value)) ops.push(...createPatch(oldDoc[key], value, child));
+        });
+        return ops;
+    }
+
+    if (Array.isArray(oldDoc)) {
+        const ops = [];
+        const common = Math.min(oldDoc.length, newDoc.length);
+        for (let i = 0; i < common; i++) {
+            if (!equal(oldDoc[i], newDoc[i])) ops.push(...createPatch(oldDoc[i], newDoc[i], `${path}/${i}`));
+        }
+        for (let i = oldDoc.length - 1; i >= common; i--) ops.push({ op: 'remove', path: `${path}/${i}` });
+        for (let i = common; i < newDoc.length; i++) ops.push({ op: 'add', path: `${path}/-`, value: newDoc[i] });
+        return ops;
+    }
+
+    return equal(oldDoc, newDoc) ? [] : [{ op: 'replace', path, value: newDoc }];
+};
+
+const unescape = (token) => token.replace(/~1/g, '/').replace(/~0/g, '~');
+
+const resolve = (doc, pointer) => {
+    if (pointer === '') return { found: true, value: doc };
+    let value = doc;
+    for (const token of pointer.slice(1).split('/').map(unescape)) {
+        if (value === null || typeof value !== 'object' || !Object.prototype.hasOwnProperty.call(value, token)) {
+            return { found: false };
+        }
+        value = value[token];
+    }
+    return { found: true, value };
+};
+
+// True when the patch guards itself with `test` ops and every one of them still holds on doc,
+// i.e. it is safe to re-apply on top of someone else's version.
+export const testsPass = (doc, patch) => {
+    const tests = patch.filter((op) => op.op === 'test');
+    return tests.length > 0 && tests.every((op) => {
+        const target = resolve(doc, op.path);
+        return target.found && equal(target.value, op.value);
+    });
+};
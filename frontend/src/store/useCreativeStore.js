@@ -1,6 +1,7 @@
 import { create } from 'zustand';
 import axios from 'axios';
 import { templates } from '../data/templates';
+import { createPatch, testsPass } from '../lib/jsonPatch';
 
 export const useCreativeStore = create((set, get) => ({
     // Creative State
@@ -104,14 +105,33 @@ export const useCreativeStore = create((set, get) => ({
     },
 
     // Validation Actions
+    // Live validation keeps a server-side session, so each call only sends what changed
+    validationSession: null, // { id, revision, json }
+
     validateCreative: async (canvasJson) => {
+        const { brandKit, validationSession } = get();
+        const baseUrl = 'http://127.0.0.1:8000/api/creative/validate/session';
         try {
-            const { brandKit } = get();
-            const response = await axios.post('http://127.0.0.1:8000/api/creative/validate', {
-                creative: canvasJson,
-                brandKit: brandKit
+            let response = null;
+            if (validationSession) {
+                const patch = createPatch(validationSession.json, canvasJson);
+                response = await axios.post(`${baseUrl}/${validationSession.id}`, {
+                    patch, baseRevision: validationSession.revision, brandKit
+                }).catch((error) => {
+                    // Session expired or out of step: start a new one below
+                    if ([404, 409, 422].includes(error.response?.status)) return null;
+                    throw error;
+                });
+            }
+            if (!response) {
+                response = await axios.post(baseUrl, { creative: canvasJson, brandKit });
+            }
+            const { session, ...report } = response.data;
+            set({
+                complianceReport: report,
+                isValidationModalOpen: true,
+                validationSession: { id: session.id, revision: session.revision, json: canvasJson },
             });
-            set({ complianceReport: response.data, isValidationModalOpen: true });
         } catch (error) {
             console.error("Validation failed", error);
         }
@@ -119,6 +139,70 @@ export const useCreativeStore = create((set, get) => ({
 
     closeValidationModal: () => set({ isValidationModalOpen: false }),
 
+    // Sharing / Autosave
+    // After the first full save, only a JSON Patch against the last saved version is sent.
+    // If someone else saved in between, the same edits are replayed on their version
+    // instead of overwriting it; edits that no longer apply are reported as a conflict.
+    shared: null, // { id, url, version, json }
+
+    shareCreative: async (canvasJson) => {
+        const { shared } = get();
+        const apiUrl = 'http://127.0.0.1:8000/api/creative';
+        const saved = (response, json, rebased = false) => {
+            const next = { id: response.data.id, url: response.data.url, version: response.data.version, json };
+            set({ shared: next });
+            return { ...next, rebased };
+        };
+        try {
+            if (!shared) return saved(await axios.post(`${apiUrl}/share`, canvasJson), canvasJson);
+            const patch = createPatch(shared.json, canvasJson);
+            if (patch.length === 0) return { ...shared, rebased: false };
+            let headVersion;
+            try {
+                return saved(await axios.patch(`${apiUrl}/share/${shared.id}`, { baseVersion: shared.version, patch }), canvasJson);
+            } catch (error) {
+                if (error.response?.status !== 409) throw error;
+                headVersion = error.response.data.detail.headVersion;
+            }
+            // Someone else saved in between. Index-based paths like /objects/3 may now point at other
+            // objects, so only replay our edits when the patch's test ops prove they still line up.
+            const head = await axios.get(`${apiUrl}/load/${shared.id}`, { params: { version: headVersion } });
+            if (!testsPass(head.data, patch)) {
+                return { ...shared, conflict: { version: headVersion, json: head.data } };
+            }
+            const response = await axios.patch(`${apiUrl}/share/${shared.id}`, { baseVersion: headVersion, patch });
+            const merged = await axios.get(`${apiUrl}/load/${shared.id}`, { params: { version: response.data.version } });
+            return saved(response, merged.data, true);
+        } catch (error) {
+            if (shared && error.response?.status === 404) {
+                // The shared creative is gone: start a new one
+                set({ shared: null });
+                return get().shareCreative(canvasJson);
+            }
+            console.error("Share failed", error);
+            return null;
+        }
+    },
+
+    // Settle a share conflict: 'reload' adopts the other writer's version, 'overwrite' saves ours over it
+    resolveShareConflict: async (result, choice, canvasJson) => {
+        const apiUrl = 'http://127.0.0.1:8000/api/creative';
+        if (choice === 'reload') {
+            const next = { id: result.id, url: result.url, version: result.conflict.version, json: result.conflict.json };
+            set({ shared: next });
+            return next;
+        }
+        try {
+            const response = await axios.put(`${apiUrl}/share/${result.id}`, canvasJson);
+            const next = { id: response.data.id, url: response.data.url, version: response.data.version, json: canvasJson };
+            set({ shared: next });
+            return next;
+        } catch (error) {
+            console.error("Share failed", error);
+            return null;
+        }
+    },
+
     // Template Actions
     loadTemplate: (templateId) => {
         const template = templates.find(t => t.id === templateId);